@@ -0,0 +1,67 @@
+"""
+Renderer e parser JSON rápidos (orjson) para o DRF.
+
+Ativados com FAST_JSON=True (ver REST_FRAMEWORK em settings). Produzem os mesmos bytes que o JSONRenderer
+do DRF para os tipos que os nossos serializers devolvem (Decimal como string, UUID, datetime, ReturnDict/ReturnList).
+Quando o orjson não está instalado, ou o pedido exige algo que ele não suporta (indentação,
+inteiros acima de 64 bits, UNICODE_JSON/COMPACT_JSON/STRICT_JSON desligados), caem no DRF/json da stdlib.
+Diferenças assumidas nos floats, que a API não devolve: o orjson escreve 1e16 e 0.00001 onde o Python
+escreve 1e+16 e 1e-05 (o valor lido é o mesmo), e NaN/Infinity como null, onde o DRF levanta ValueError
+por causa do STRICT_JSON. Detetá-los obrigava a percorrer os dados (ou os bytes) em Python a cada render,
+o que custa mais do que o próprio orjson.dumps.
+No parser, inteiros acima de 64 bits chegam como float (a validação dos IntegerField rejeita-os).
+"""
+from io import BytesIO
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# datetime/date/time passam pelo encoder do DRF para manter o mesmo formato ("Z" em vez de "+00:00")
+_ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_USE_ORJSON = orjson is not None and api_settings.UNICODE_JSON and api_settings.COMPACT_JSON and api_settings.STRICT_JSON
+_drf_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not _USE_ORJSON or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_drf_encoder.default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Tal como o DRF, escapamos U+2028 e U+2029 para o JSON continuar a ser JavaScript válido
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if not _USE_ORJSON or encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+
+        raw = stream.read()
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # Mesma resposta de erro que o parser do DRF
+            return super().parse(BytesIO(raw), media_type, parser_context)
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,7 +46,6 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'users.middleware.auth_middleware.AuthMiddleware',
     'users.helpers.errors.global_handler_error.GlobalExceptionMiddleware',
     'store.helpers.errors.global_handler_error.GlobalExceptionMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -53,6 +53,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Depois do AuthenticationMiddleware: com um JWT válido, request.user passa a ser a conta do token (lazy)
+    'users.middleware.auth_middleware.AuthMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -107,6 +109,9 @@ else:
         }
     }
 
+# O índice do histórico de compras leva colunas em INCLUDE, que só o PostgreSQL suporta; no SQLite ficam de fora
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -125,6 +130,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# JSON rápido (orjson) no DRF; sem o orjson instalado usa o json da stdlib
+FAST_JSON = os.getenv("FAST_JSON", "False") == "True"
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "users.middleware.authentication.TokenMiddlewareAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer" if FAST_JSON else "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.renderers.FastJSONParser" if FAST_JSON else "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
 # Cache usando Redis
 CACHES = {
     "default": {
@@ -136,6 +161,79 @@ CACHES = {
     }
 }
 
+# Os testes não dependem de um Redis a correr
+if "test" in sys.argv[1:2] or "pytest" in sys.modules:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Cache de detalhes de itens (Redis + LRU local por processo)
+ITEM_CACHE_TTL = int(os.getenv("ITEM_CACHE_TTL", 600))
+ITEM_CACHE_LOCAL_MAXSIZE = int(os.getenv("ITEM_CACHE_LOCAL_MAXSIZE", 1024))
+ITEM_CACHE_LOCAL_TTL = int(os.getenv("ITEM_CACHE_LOCAL_TTL", 30))
+
+# Cache dos utilizadores autenticados no AuthMiddleware (Redis + LRU local por processo);
+# as estatísticas (hit ratio, latência) vão para o log a cada USER_CACHE_STATS_INTERVAL lookups (0 desliga)
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 300))
+USER_CACHE_LOCAL_MAXSIZE = int(os.getenv("USER_CACHE_LOCAL_MAXSIZE", 4096))
+USER_CACHE_LOCAL_TTL = int(os.getenv("USER_CACHE_LOCAL_TTL", 30))
+USER_CACHE_STATS_INTERVAL = int(os.getenv("USER_CACHE_STATS_INTERVAL", 10000))
+# Espelho no Redis do token_version de cada utilizador (a coluna em users_user é a fonte)
+TOKEN_VERSION_CACHE_TTL = int(os.getenv("TOKEN_VERSION_CACHE_TTL", 60 * 60 * 24))
+
+# Resumo do carrinho (store/cart/summary/): validade das linhas guardadas por utilizador no Redis
+CART_SUMMARY_TTL = int(os.getenv("CART_SUMMARY_TTL", 60 * 60))
+# Máximo de operações num pedido a store/cart/batch/
+CART_BATCH_MAX_OPERATIONS = int(os.getenv("CART_BATCH_MAX_OPERATIONS", 100))
+
+# Índice dos favoritos no Redis (um set por utilizador) e máximo de ids em store/favorites/lookup/
+FAVORITE_INDEX_TTL = int(os.getenv("FAVORITE_INDEX_TTL", 60 * 60))
+FAVORITE_LOOKUP_MAX_IDS = int(os.getenv("FAVORITE_LOOKUP_MAX_IDS", 500))
+
+# Cache das respostas públicas do catálogo (ETag / 304)
+CATALOG_RESPONSE_CACHE_TTL = int(os.getenv("CATALOG_RESPONSE_CACHE_TTL", 300))
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", 60))
+
+# Paginação do catálogo
+STORE_PAGE_SIZE = int(os.getenv("STORE_PAGE_SIZE", 20))
+STORE_MAX_PAGE_SIZE = int(os.getenv("STORE_MAX_PAGE_SIZE", 100))
+
+# Tempo (segundos) que o stock fica reservado à espera do pagamento
+STOCK_RESERVATION_TTL = int(os.getenv("STOCK_RESERVATION_TTL", 900))
+
+# Idempotency-Key: quanto tempo a resposta fica guardada, quanto dura o claim do pedido em curso
+# e quanto tempo um duplicado espera pelo pedido original
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 60 * 60 * 24))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", 60))
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", 10))
+
+# Pagamentos (comando process_payments): gateway usado, timeout de cada chamada, tentativas para erros
+# transitórios (backoff exponencial a partir de PAYMENT_RETRY_DELAY) e chamadas em paralelo por processo.
+# Para testes de carga: PAYMENT_GATEWAY=store.helpers.payment_gateway.FakePaymentGateway
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "store.helpers.payment_gateway.PaymentGateway")
+PAYMENT_TIMEOUT = float(os.getenv("PAYMENT_TIMEOUT", 10))
+PAYMENT_MAX_ATTEMPTS = int(os.getenv("PAYMENT_MAX_ATTEMPTS", 5))
+PAYMENT_RETRY_DELAY = float(os.getenv("PAYMENT_RETRY_DELAY", 2))
+PAYMENT_WORKERS = int(os.getenv("PAYMENT_WORKERS", 8))
+# Retry-After (segundos) devolvido a quem consulta uma compra ou encomenda ainda PENDING
+PAYMENT_POLL_INTERVAL = int(os.getenv("PAYMENT_POLL_INTERVAL", 2))
+FAKE_PAYMENT_LATENCY = tuple(float(v) for v in os.getenv("FAKE_PAYMENT_LATENCY", "0.05,0.5").split(","))
+FAKE_PAYMENT_ERROR_RATE = float(os.getenv("FAKE_PAYMENT_ERROR_RATE", 0.05))
+FAKE_PAYMENT_DECLINE_RATE = float(os.getenv("FAKE_PAYMENT_DECLINE_RATE", 0.05))
+
+# Uploads em partes (store/uploads/): pasta onde as partes ficam até o upload terminar (partilhada por todos
+# os workers web), tamanho máximo de cada parte e de cada tipo de ficheiro, e prazo para terminar e associar o upload
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", str(BASE_DIR / "uploads_staging"))
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", 8 * 1024 * 1024))
+UPLOAD_MAX_PAYMENT_PROOF_SIZE = int(os.getenv("UPLOAD_MAX_PAYMENT_PROOF_SIZE", 10 * 1024 * 1024))
+UPLOAD_MAX_ITEM_IMAGE_SIZE = int(os.getenv("UPLOAD_MAX_ITEM_IMAGE_SIZE", 20 * 1024 * 1024))
+UPLOAD_TTL = int(os.getenv("UPLOAD_TTL", 60 * 60 * 24))
+
+# Variantes das imagens dos itens (comando generate_image_variants): processos usados para gerar as imagens
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", os.cpu_count() or 1))
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
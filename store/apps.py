@@ -5,5 +5,5 @@ class StoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'store'
 
-def ready(self):
-    import store.signals
\ No newline at end of file
+    def ready(self):
+        import store.signals
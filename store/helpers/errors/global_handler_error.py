@@ -3,7 +3,7 @@ import traceback
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from loguru import logger
-from users.helpers.errors.error import AppError
+from store.helpers.errors.error import AppError
 
 class GlobalExceptionMiddleware(MiddlewareMixin):
     """
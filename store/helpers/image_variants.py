@@ -0,0 +1,61 @@
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# (nome, lado máximo em px, formato, extensão), da maior para a menor: cada tamanho é reduzido a partir do anterior
+VARIANTS: Tuple[Tuple[str, int, str, str], ...] = (
+    ("medium", 800, "JPEG", "jpg"),
+    ("medium_webp", 800, "WEBP", "webp"),
+    ("thumbnail", 200, "JPEG", "jpg"),
+    ("thumbnail_webp", 200, "WEBP", "webp"),
+)
+
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+
+def variant_urls(variants: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """Caminhos guardados em Item.image_variants -> URLs públicas."""
+    if variants is None:
+        return None
+    return {name: default_storage.url(path) for name, path in variants.items()}
+
+
+def render_variants(data: bytes) -> Dict[str, bytes]:
+    """
+    Gera todas as variantes de uma imagem. Corre nos processos do pool do ImageVariantService, por isso
+    recebe e devolve só bytes. A imagem original é descodificada uma única vez (num JPEG, já reduzida
+    pelo draft) e cada tamanho é obtido a partir do anterior. Levanta ValueError se não for uma imagem válida.
+    """
+    largest = VARIANTS[0][1]
+    try:
+        with Image.open(BytesIO(data)) as source:
+            source.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(source)
+            has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            image = image.convert("RGBA" if has_alpha else "RGB")
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Invalid image: {e}") from e
+
+    rendered: Dict[str, bytes] = {}
+    for name, size, image_format, _ in VARIANTS:
+        if image.width > size or image.height > size:
+            image = image.copy()
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        rendered[name] = _encode(image, image_format)
+    return rendered
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    out = BytesIO()
+    if image_format == "JPEG":
+        if image.mode == "RGBA":
+            # JPEG não tem transparência: fundo branco
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        image.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+    return out.getvalue()
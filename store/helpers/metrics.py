@@ -0,0 +1,48 @@
+import threading
+from collections import Counter
+from typing import Dict, List
+from loguru import logger
+
+
+class CacheMetrics:
+    """
+    Contadores de cache por processo (hit, miss, stale, rebuild...).
+    São baratos (sem ida ao Redis) e substituem os antigos print() nos serviços de cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._counts: Counter = Counter()
+        # Tempos (segundos) por evento: [número de medições, soma, máximo]
+        self._timings: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, event: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[event] += amount
+        logger.debug("cache {} {}", self.name, event)
+
+    def observe(self, event: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings.setdefault(event, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            data: Dict[str, float] = dict(self._counts)
+            for event, (count, total, slowest) in self._timings.items():
+                data[f"{event}_avg_ms"] = round(total / count * 1000, 3)
+                data[f"{event}_max_ms"] = round(slowest * 1000, 3)
+
+        # "hit", "hit_local", "hit_redis" e "stale" contam todos como acerto
+        hits = sum(count for event, count in data.items() if event.startswith("hit") or event == "stale")
+        lookups = hits + data.get("miss", 0)
+        data["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._timings.clear()
@@ -0,0 +1,109 @@
+import base64
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, time
+from typing import Any, List, Optional, Tuple
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+@dataclass
+class CursorPage:
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def clamp_limit(limit: Optional[Any]) -> int:
+    """Converte o 'limit' recebido do cliente para um tamanho de página válido."""
+    if limit in (None, ""):
+        return getattr(settings, "STORE_PAGE_SIZE", 20)
+    try:
+        value = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid page size")
+    if value < 1:
+        raise ValueError("Invalid page size")
+    return min(value, getattr(settings, "STORE_MAX_PAGE_SIZE", 100))
+
+
+def parse_date_bound(value: Optional[str]) -> Optional[datetime]:
+    """Filtro de datas recebido do cliente: data (início do dia) ou data/hora ISO 8601, no fuso do projeto se vier sem fuso."""
+    if value in (None, ""):
+        return None
+    try:
+        parsed = parse_datetime(value) or parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError("Invalid date")
+    if not isinstance(parsed, datetime):
+        parsed = datetime.combine(parsed, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def encode_cursor(created_at: datetime, id: Any, direction: str) -> str:
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(id), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        direction = data["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError
+        return datetime.fromisoformat(data["c"]), str(uuid.UUID(data["i"])), direction
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def paginate_keyset(queryset: QuerySet, cursor: Optional[str], limit: int, descending: bool = False) -> CursorPage:
+    """
+    Paginação por chave (keyset) sobre (created_at, id).
+    Cada página faz um único SELECT com LIMIT, por isso a página 1000 custa o mesmo que a primeira.
+    """
+    created_at, last_id, direction = (None, None, "next")
+    if cursor:
+        created_at, last_id, direction = decode_cursor(cursor)
+
+    # Ao andar para trás percorremos a ordem inversa e depois invertemos o resultado
+    backwards = direction == "prev"
+    ascending = descending == backwards
+
+    if created_at is not None:
+        if ascending:
+            boundary = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=last_id)
+        else:
+            boundary = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id)
+        queryset = queryset.filter(boundary)
+
+    ordering = ("created_at", "id") if ascending else ("-created_at", "-id")
+    rows = list(queryset.order_by(*ordering)[:limit + 1])
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    page = CursorPage(items=rows)
+    if not rows:
+        return page
+
+    # Indo para a frente, só há página anterior se viemos de um cursor; indo para trás, há sempre uma seguinte
+    has_next = backwards or has_more
+    has_prev = has_more if backwards else cursor is not None
+
+    first, last = rows[0], rows[-1]
+    if has_next:
+        page.next_cursor = encode_cursor(last.created_at, last.id, "next")
+    if has_prev:
+        page.prev_cursor = encode_cursor(first.created_at, first.id, "prev")
+
+    return page
@@ -1,9 +1,67 @@
+import random
+import time
+from typing import Optional, Tuple
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class PaymentGatewayError(Exception):
+    """Falha transitória do gateway (indisponível, timeout): o pagamento pode ser tentado outra vez."""
+
+
+class PaymentTimeout(PaymentGatewayError):
+    pass
+
+
 class PaymentGateway:
     @staticmethod
 
-    def process_payment(method: str, amount: float) -> bool:
+    def process_payment(method: str, amount: float, reference: Optional[str] = None, timeout: Optional[float] = None) -> bool:
 
         if method not in ["MULTICAIXA_EXPRESS", "ATM", "REFERENCE"]:
             raise ValueError("Ivalid payment methode")
-        
-        return True
\ No newline at end of file
+
+        return True
+
+
+class FakePaymentGateway:
+    """
+    Gateway local para testes de carga: cada pagamento demora uma latência aleatória e uma fração
+    dos pedidos falha com erro transitório ou é recusada. Ativa-se com
+    PAYMENT_GATEWAY=store.helpers.payment_gateway.FakePaymentGateway e configura-se com
+    FAKE_PAYMENT_LATENCY ("min,max" em segundos), FAKE_PAYMENT_ERROR_RATE e FAKE_PAYMENT_DECLINE_RATE.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[Tuple[float, float]] = None,
+        error_rate: Optional[float] = None,
+        decline_rate: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        if latency is None:
+            latency = getattr(settings, "FAKE_PAYMENT_LATENCY", (0.05, 0.5))
+        self.latency = (latency[0], latency[-1])
+        self.error_rate = error_rate if error_rate is not None else getattr(settings, "FAKE_PAYMENT_ERROR_RATE", 0.05)
+        self.decline_rate = decline_rate if decline_rate is not None else getattr(settings, "FAKE_PAYMENT_DECLINE_RATE", 0.05)
+        self.random = random.Random(seed)
+
+    def process_payment(self, method: str, amount: float, reference: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        if method not in ["MULTICAIXA_EXPESS", "ATM", "REFERENCE"]:
+            raise ValueError("Invalid payment method")
+
+        delay = self.random.uniform(*self.latency)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise PaymentTimeout(f"No answer from the gateway after {timeout}s")
+        time.sleep(delay)
+
+        roll = self.random.random()
+        if roll < self.error_rate:
+            raise PaymentGatewayError("Gateway unavailable")
+        return roll >= self.error_rate + self.decline_rate
+
+
+def get_payment_gateway():
+    """Gateway configurado em PAYMENT_GATEWAY (caminho da classe)."""
+    return import_string(getattr(settings, "PAYMENT_GATEWAY", "store.helpers.payment_gateway.PaymentGateway"))()
@@ -0,0 +1,144 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from django.core.cache import cache
+from store.helpers.metrics import CacheMetrics
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """LRU em memória do processo, com tamanho máximo e TTL por entrada."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    Cache de leitura em dois níveis: LRU local (por processo) à frente do Redis.
+
+    Cada chave tem um token de versão guardado no Redis. Os valores são gravados sob
+    "<namespace>:<chave>:<versão>" e a entrada local guarda a versão com que foi lida.
+    Invalidar é só trocar o token: todos os workers deixam de encontrar a versão antiga
+    na próxima leitura, nos dois níveis, sem precisarem de apagar nada.
+    """
+
+    def __init__(self, namespace: str, timeout: int = 600, local_maxsize: int = 1024, local_ttl: float = 30):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.local = LocalTTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.metrics = CacheMetrics(namespace)
+
+    def _version_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}:version"
+
+    def _value_key(self, key: str, version: str) -> str:
+        return f"{self.namespace}:{key}:{version}"
+
+    def _versions(self, keys: List[str]) -> Dict[str, str]:
+        stored = cache.get_many([self._version_key(k) for k in keys])
+        versions = {}
+        for key in keys:
+            version = stored.get(self._version_key(key))
+            if version is None:
+                # Chave nunca vista (ou removida do Redis): um token novo nunca coincide com valores antigos
+                version = uuid.uuid4().hex
+                if not cache.add(self._version_key(key), version, timeout=None):
+                    version = cache.get(self._version_key(key), version)
+            versions[key] = version
+        return versions
+
+    def get(self, key: str, loader: Callable[[List[str]], Dict[str, Any]]) -> Any:
+        return self.get_many([key], loader).get(key)
+
+    def get_many(self, keys: Iterable[str], loader: Callable[[List[str]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Devolve {chave: valor} para as chaves encontradas.
+        Custa uma ida ao Redis para as versões, outra para os valores que faltam no nível local,
+        e uma única chamada a `loader` com todas as chaves que faltam nos dois níveis.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        versions = self._versions(keys)
+        found: Dict[str, Any] = {}
+
+        pending = []
+        for key in keys:
+            entry = self.local.get(key)
+            if entry is not None and entry[0] == versions[key]:
+                found[key] = entry[1]
+                self.metrics.incr("hit_local")
+            else:
+                pending.append(key)
+
+        if pending:
+            stored = cache.get_many([self._value_key(k, versions[k]) for k in pending])
+            missing = []
+            for key in pending:
+                value = stored.get(self._value_key(key, versions[key]), _MISSING)
+                if value is _MISSING:
+                    missing.append(key)
+                    continue
+                found[key] = value
+                self.local.set(key, (versions[key], value))
+                self.metrics.incr("hit_redis")
+
+            if missing:
+                self.metrics.incr("miss", len(missing))
+                loaded = loader(missing)
+                cache.set_many({self._value_key(k, versions[k]): v for k, v in loaded.items()}, timeout=self.timeout)
+                for key, value in loaded.items():
+                    found[key] = value
+                    self.local.set(key, (versions[key], value))
+
+        return found
+
+    def invalidate_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        cache.set_many({self._version_key(k): uuid.uuid4().hex for k in keys}, timeout=None)
+        for key in keys:
+            self.local.delete(key)
+        self.metrics.incr("invalidate", len(keys))
+
+    def invalidate(self, key: str) -> None:
+        self.invalidate_many([key])
@@ -0,0 +1,131 @@
+"""
+Operações de migração que não bloqueiam escritas no PostgreSQL.
+
+No PostgreSQL os índices são criados com CREATE INDEX CONCURRENTLY e apagados com DROP INDEX CONCURRENTLY
+(a tabela continua a aceitar INSERT/UPDATE/DELETE durante a operação); nos outros bancos (SQLite em desenvolvimento e testes)
+comportam-se como AddIndex/RemoveIndex/AddConstraint normais. As migrações que as usam têm de ter atomic = False,
+porque o PostgreSQL não aceita CONCURRENTLY dentro de uma transação.
+"""
+from django.db import NotSupportedError
+from django.db.migrations.operations import AddConstraint, AddIndex, RemoveIndex
+from django.db.models import UniqueConstraint
+
+
+def _ensure_not_in_transaction(operation, schema_editor):
+    if schema_editor.connection.in_atomic_block:
+        raise NotSupportedError(
+            "The %s operation cannot be executed inside a transaction "
+            "(set atomic = False on the migration)." % operation.__class__.__name__
+        )
+
+
+def _drop_invalid_index(schema_editor, name):
+    """
+    Um CREATE INDEX CONCURRENTLY interrompido deixa para trás um índice INVALID com o mesmo nome;
+    apagamo-lo para que a migração possa simplesmente ser corrida outra vez.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = %s AND NOT i.indisvalid",
+            [name],
+        )
+        invalid = cursor.fetchone() is not None
+
+    if invalid:
+        schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS %s" % schema_editor.quote_name(name))
+
+
+class AddIndexConcurrently(AddIndex):
+    """AddIndex que usa CREATE INDEX CONCURRENTLY no PostgreSQL."""
+
+    atomic = False
+
+    def describe(self):
+        return "Concurrently create index %s on %s" % (self.index.name, self.model_name)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+        _ensure_not_in_transaction(self, schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            _drop_invalid_index(schema_editor, self.index.name)
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+        _ensure_not_in_transaction(self, schema_editor)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class RemoveIndexConcurrently(RemoveIndex):
+    """RemoveIndex que usa DROP INDEX CONCURRENTLY no PostgreSQL."""
+
+    atomic = False
+
+    def describe(self):
+        return "Concurrently remove index %s from %s" % (self.name, self.model_name)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+        _ensure_not_in_transaction(self, schema_editor)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            index = from_state.models[app_label, self.model_name_lower].get_index_by_name(self.name)
+            schema_editor.remove_index(model, index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+        _ensure_not_in_transaction(self, schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            index = to_state.models[app_label, self.model_name_lower].get_index_by_name(self.name)
+            _drop_invalid_index(schema_editor, self.name)
+            schema_editor.add_index(model, index, concurrently=True)
+
+
+class AddUniqueConstraintConcurrently(AddConstraint):
+    """
+    AddConstraint para UniqueConstraint simples (só campos, sem condição). No PostgreSQL o índice único
+    é construído com CONCURRENTLY e depois promovido a constraint com ADD CONSTRAINT ... USING INDEX,
+    que só precisa de um lock curto.
+    """
+
+    atomic = False
+
+    def __init__(self, model_name, constraint):
+        if not isinstance(constraint, UniqueConstraint) or not constraint.fields or constraint.condition is not None:
+            raise TypeError("AddUniqueConstraintConcurrently.constraint must be a plain UniqueConstraint.")
+        super().__init__(model_name, constraint)
+
+    def describe(self):
+        return "Concurrently create unique constraint %s on %s" % (self.constraint.name, self.model_name)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+        _ensure_not_in_transaction(self, schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        name = schema_editor.quote_name(self.constraint.name)
+        table = schema_editor.quote_name(model._meta.db_table)
+        columns = ", ".join(
+            schema_editor.quote_name(model._meta.get_field(field).column) for field in self.constraint.fields
+        )
+
+        _drop_invalid_index(schema_editor, self.constraint.name)
+        schema_editor.execute("CREATE UNIQUE INDEX CONCURRENTLY %s ON %s (%s)" % (name, table, columns))
+        schema_editor.execute("ALTER TABLE %s ADD CONSTRAINT %s UNIQUE USING INDEX %s" % (table, name, name))
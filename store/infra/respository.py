@@ -1,23 +1,60 @@
-from typing import Optional, List
-from store.models import Item, Category, CartItem, Favorite, Purchase
+import csv
+import io
+import operator
+import uuid
+from functools import reduce
+from typing import Any, Dict, Iterator, Optional, List, Tuple
+from django.db import connection
+from django.db.models import Case, F, Min, PositiveBigIntegerField, Q, Sum, Value, When
+from django.utils import timezone
+from store.models import Item, Category, CartItem, Favorite, Purchase, StockReservation, Order, OrderItem, Payment, SalesRollup
 from users.domain.entities.user_entity import UserEntity
+from store.helpers.pagination import CursorPage, paginate_keyset
+from store.infra.search import get_search_backend
+
+# Colunas lidas pelo ItemSerializer (inclui a categoria aninhada); evita carregar image e outras colunas
+ITEM_READ_FIELDS = (
+    "id", "name", "description", "price", "stock", "image_variants", "created_at", "updated_at",
+    "category__id", "category__name", "category__description",
+)
+
+# Colunas lidas pelo PurchaseListSerializer, todas na chave de store_purch_history_idx
+PURCHASE_LIST_FIELDS = ("id", "user", "created_at", "item", "quantity", "total_price", "status", "payment_method")
+
+# Colunas escritas pela importação em massa (o id é a chave do upsert; created_at só na inserção)
+ITEM_UPSERT_FIELDS = ["name", "description", "price", "stock", "category_id", "updated_at"]
+
+
+def item_read_queryset():
+    """Itens prontos para o ItemSerializer: categoria no mesmo SELECT e apenas as colunas usadas."""
+    return Item.objects.select_related("category").only(*ITEM_READ_FIELDS)
+
 
 class StoreRepository:
     #Item
     def get_item_by_id(self, id: str) -> Optional[Item]:
         try:
-            return Item.objects.filter(id=id).first()
+            return Item.objects.select_related("category").filter(id=id).first()
         except Exception:
             return None
     
-    def list_items(self) -> List[Item]:
-        return list(Item.objects.all().order_by("created_at"))
+    def get_items_by_ids(self, ids: List[str]) -> List[Item]:
+        return list(item_read_queryset().filter(id__in=ids))
+
+    def list_items(self, cursor: Optional[str] = None, limit: int = 20) -> CursorPage:
+        return paginate_keyset(item_read_queryset(), cursor=cursor, limit=limit)
     
     def search_by_name(self, name: str) -> List[Item]:
-        return list(Item.objects.filter(name__icontains=name))
+        return list(item_read_queryset().filter(name__icontains=name))
+
+    def search_items(self, query: str, limit: int, offset: int = 0) -> List[Item]:
+        ids = get_search_backend().search(query, limit=limit, offset=offset)
+        items = item_read_queryset().in_bulk(ids)
+        # in_bulk não preserva a ordem; mantemos a ordem de relevância do motor de pesquisa
+        return [items[id] for id in ids if id in items]
     
     def get_by_category(self, category_id: str) -> List[Item]:
-        return list(Item.objects.filter(category_id=category_id))
+        return list(item_read_queryset().filter(category_id=category_id))
     
     def create_item(self, item: Item) ->  Item:
         item.save()
@@ -27,6 +64,66 @@ class StoreRepository:
         item.save()
         return item
     
+    def upsert_items(self, items: List[Item]) -> int:
+        """Insere ou atualiza (pelo id) um lote de itens num único INSERT ... ON CONFLICT. Não dispara signals."""
+        Item.objects.bulk_create(
+            items,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=ITEM_UPSERT_FIELDS,
+        )
+        return len(items)
+
+    def copy_upsert_items(self, items: List[Item]) -> int:
+        """
+        Variante PostgreSQL de upsert_items: o lote entra por COPY numa tabela temporária
+        e passa para store_item com um único INSERT ... SELECT ... ON CONFLICT.
+        """
+        now = timezone.now()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for item in items:
+            writer.writerow([
+                item.id, item.name, item.description if item.description is not None else r"\N",
+                item.price, item.stock, item.category_id if item.category_id is not None else r"\N",
+            ])
+        buffer.seek(0)
+
+        columns = ", ".join(ITEM_UPSERT_FIELDS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in ITEM_UPSERT_FIELDS)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS store_item_import "
+                "(id uuid, name varchar(150), description text, price numeric(10, 2), stock bigint, category_id uuid) "
+                "ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(
+                "COPY store_item_import (id, name, description, price, stock, category_id) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+            cursor.execute(
+                f"INSERT INTO store_item (id, {columns}, created_at) "
+                f"SELECT id, name, description, price, stock, category_id, %s, %s FROM store_item_import "
+                f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                [now, now],
+            )
+            cursor.execute("TRUNCATE store_item_import")
+        return len(items)
+
+    def list_items_missing_variants(self, limit: int) -> List[Tuple[Any, str]]:
+        """(id, nome da imagem) dos itens com imagem cujas variantes ainda não foram geradas (índice parcial)."""
+        return list(
+            Item.objects.filter(image_variants__isnull=True, image__gt="")
+            .order_by("created_at")
+            .values_list("id", "image")[:limit]
+        )
+
+    def set_image_variants(self, item_id, image_name: str, variants: Dict[str, str]) -> bool:
+        # Só se a imagem não mudou entretanto; senão as variantes seriam da imagem antiga
+        return Item.objects.filter(id=item_id, image=image_name).update(image_variants=variants) > 0
+
     def delete_item(self, item_id: str) ->  bool:
         deleted, _ = Item.objects.filter(id=item_id).delete()
 
@@ -34,7 +131,7 @@ class StoreRepository:
     
     #Favorites
     def add_favorite(self, user, item) -> Favorite:
-        fav, _ = Favorite.objects.filter(user=user, item=item)
+        fav, _ = Favorite.objects.get_or_create(user=user, item=item)
 
         return fav
     
@@ -44,29 +141,383 @@ class StoreRepository:
         return deleted > 0
     
     def list_favorites(seld, user) -> List[Favorite]:
-        return list(Favorite.objects.filter(user=user).select_related("item"))
+        return list(
+            Favorite.objects.filter(user=user)
+            .select_related("item__category")
+            .only("id", "created_at", *(f"item__{field}" for field in ITEM_READ_FIELDS))
+        )
+
+    def list_favorite_item_ids(self, user) -> List[Any]:
+        return list(Favorite.objects.filter(user=user).values_list("item_id", flat=True))
+
+    def filter_favorite_item_ids(self, user, item_ids: List[Any]) -> List[Any]:
+        return list(Favorite.objects.filter(user=user, item_id__in=item_ids).values_list("item_id", flat=True))
+
+    def iter_favorite_user_ids(self, chunk_size: int = 1000) -> Iterator[Any]:
+        return (
+            Favorite.objects.order_by("user_id").values_list("user_id", flat=True).distinct()
+            .iterator(chunk_size=chunk_size)
+        )
     
     #Cart
     def add_cart_item(self, user, item, quantity) -> CartItem:
-        cart_item, created = CartItem.objects.get_or_create(user=user, item=item)
+        """
+        Soma `quantity` à linha (user, item) do carrinho, criando-a se não existir, num único
+        INSERT ... ON CONFLICT DO UPDATE ... RETURNING (PostgreSQL e SQLite >= 3.35).
+        Pedidos concorrentes do mesmo utilizador não perdem incrementos.
+        """
+        return self._upsert_cart_items(user, {getattr(item, "pk", item): quantity}, increment=True)[0]
+
+    def add_cart_items(self, user, quantities: Dict[Any, int]) -> List[CartItem]:
+        """add_cart_item para várias linhas, num único statement."""
+        return self._upsert_cart_items(user, quantities, increment=True)
+
+    def set_cart_items(self, user, quantities: Dict[Any, int]) -> List[CartItem]:
+        """Substitui a quantidade de várias linhas (criando as que faltam), num único statement."""
+        return self._upsert_cart_items(user, quantities, increment=False)
+
+    def _upsert_cart_items(self, user, quantities: Dict[Any, int], increment: bool) -> List[CartItem]:
+        if not quantities:
+            return []
 
-        if not created:
-            cart_item.quatity += quantity
-        else:
-            cart_item.quatity = quantity
-            cart_item.save()
+        fields = CartItem._meta
+        user_id = fields.get_field("user").target_field.get_db_prep_value(getattr(user, "pk", user), connection)
+        added_at = fields.get_field("added_at").get_db_prep_value(timezone.now(), connection)
+        params = []
+        for item_id, quantity in quantities.items():
+            params += [
+                fields.pk.get_db_prep_value(uuid.uuid4(), connection),
+                user_id,
+                fields.get_field("item").target_field.get_db_prep_value(item_id, connection),
+                quantity,
+                added_at,
+            ]
 
-            return cart_item
+        quantity_sql = "store_cartitem.quantity + excluded.quantity" if increment else "excluded.quantity"
+        return list(CartItem.objects.raw(
+            "INSERT INTO store_cartitem (id, user_id, item_id, quantity, added_at) VALUES "
+            + ", ".join(["(%s, %s, %s, %s, %s)"] * len(quantities))
+            + f" ON CONFLICT (user_id, item_id) DO UPDATE SET quantity = {quantity_sql} "
+            "RETURNING id, user_id, item_id, quantity, added_at",
+            params,
+        ))
     
     def remove_cart_item(self, user, item) -> bool:
         deleted, _ = CartItem.objects.filter(user=user, item=item).delete()
 
         return deleted > 0
+
+    def remove_cart_items(self, user, item_ids: List[Any]) -> int:
+        if not item_ids:
+            return 0
+        deleted, _ = CartItem.objects.filter(user=user, item_id__in=item_ids).delete()
+        return deleted
+
+    def get_items_stock(self, item_ids: List[Any]) -> Dict[Any, Item]:
+        """Itens existentes entre `item_ids` (só id e stock), numa query."""
+        return Item.objects.only("id", "stock").in_bulk(item_ids)
     
     def list_cart(self, user) -> List[CartItem]:
-        return list(CartItem.objects.filter(user=user).select_related("item"))
+        # O CartItemSerializer só expõe o id do item, não é preciso o JOIN
+        return list(CartItem.objects.filter(user=user).only("id", "item", "quantity", "added_at"))
     
+    def list_cart_quantities(self, user) -> List[Tuple[Any, int]]:
+        """(id do item, quantidade) de cada linha do carrinho, sem JOIN."""
+        return list(CartItem.objects.filter(user=user).order_by("added_at").values_list("item_id", "quantity"))
+
+    def list_cart_for_checkout(self, user) -> List[CartItem]:
+        # Preço e stock de cada linha no mesmo SELECT
+        return list(
+            CartItem.objects.filter(user=user)
+            .select_related("item")
+            .only("id", "quantity", "item__id", "item__price", "item__stock")
+            .order_by("added_at")
+        )
+
+    def remove_checked_out_cart_lines(self, user, lines: List[CartItem]) -> bool:
+        """
+        Tira do carrinho as linhas lidas pelo checkout, só se ainda estiverem como foram lidas (mesmo id e
+        quantidade). False se alguma mudou ou já saiu, p.ex. por um checkout concorrente do mesmo carrinho:
+        o DELETE do segundo espera pelo commit do primeiro e já não as encontra.
+        """
+        condition = reduce(operator.or_, (Q(id=line.id, quantity=line.quantity) for line in lines))
+        deleted, _ = CartItem.objects.filter(condition, user=user).delete()
+        return deleted == len(lines)
+
+    def restore_cart_for_order(self, order_id) -> List[CartItem]:
+        """Devolve ao carrinho do dono as linhas de uma encomenda que falhou, somadas às que ele juntou entretanto."""
+        order = Order.objects.only("user_id").get(id=order_id)
+        quantities = dict(OrderItem.objects.filter(order_id=order_id).values_list("item_id", "quantity"))
+        return self.add_cart_items(order.user_id, quantities)
+
     #purchase
     def create_purchase(self, purchase: Purchase) -> Purchase:
         purchase.save()
-        return purchase
\ No newline at end of file
+        return purchase
+
+    def create_order(self, order: Order, lines: List[OrderItem]) -> Order:
+        order.save(force_insert=True)
+        OrderItem.objects.bulk_create(lines)
+        return order
+
+    def list_purchases(self, user, cursor: Optional[str], limit: int, since=None, until=None) -> CursorPage:
+        """Histórico do utilizador, mais recentes primeiro; só lê colunas que estão em store_purch_history_idx."""
+        queryset = Purchase.objects.filter(user=user).only(*PURCHASE_LIST_FIELDS)
+        if since is not None:
+            queryset = queryset.filter(created_at__gte=since)
+        if until is not None:
+            queryset = queryset.filter(created_at__lt=until)
+        return paginate_keyset(queryset, cursor=cursor, limit=limit, descending=True)
+
+    def get_purchase(self, user, purchase_id) -> Optional[Purchase]:
+        return Purchase.objects.filter(user=user, id=purchase_id).first()
+
+    def get_order(self, user, order_id) -> Optional[Order]:
+        return Order.objects.filter(user=user, id=order_id).prefetch_related("items").first()
+
+    #Payments
+    def create_payment(self, payment: Payment) -> Payment:
+        payment.save(force_insert=True)
+        return payment
+
+    def claim_due_payments(self, now, limit: int, lease_until) -> List[Payment]:
+        """
+        Reclama até `limit` pagamentos PENDING já devidos: incrementa attempts e adia next_attempt_at até
+        `lease_until`, para nenhum outro worker os apanhar enquanto este trata deles.
+        Os que outro worker tem bloqueados neste momento são saltados.
+        """
+        payments = list(
+            Payment.objects.select_for_update(skip_locked=True)
+            .filter(status=Payment.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:limit]
+        )
+        if payments:
+            Payment.objects.filter(id__in=[payment.id for payment in payments]).update(
+                attempts=F("attempts") + 1, next_attempt_at=lease_until
+            )
+            for payment in payments:
+                payment.attempts += 1
+                payment.next_attempt_at = lease_until
+        return payments
+
+    def lock_payment(self, payment_id) -> Optional[Payment]:
+        return Payment.objects.select_for_update().filter(id=payment_id).first()
+
+    def reschedule_payment(self, payment_id, attempts: int, next_attempt_at, error: str) -> bool:
+        """Marca a próxima tentativa, se o pagamento ainda for deste worker (mesmo número de tentativas)."""
+        updated = Payment.objects.filter(id=payment_id, status=Payment.PENDING, attempts=attempts).update(
+            next_attempt_at=next_attempt_at, last_error=error[:255], updated_at=timezone.now()
+        )
+        return updated > 0
+
+    def finish_payment(self, payment: Payment, status: str, error: str = "") -> None:
+        """Grava o resultado no pagamento e na compra ou encomenda correspondente."""
+        Payment.objects.filter(id=payment.id).update(status=status, last_error=error[:255], updated_at=timezone.now())
+        if payment.purchase_id:
+            Purchase.objects.filter(id=payment.purchase_id).update(status=status)
+        if payment.order_id:
+            Order.objects.filter(id=payment.order_id).update(status=status)
+
+    def list_payment_reservations(self, payment_id) -> List[StockReservation]:
+        return list(StockReservation.objects.filter(payment_id=payment_id).only("id", "user_id", "item_id", "quantity"))
+
+    #Inventory
+    def decrement_stock(self, item_id, quantity: int) -> Optional[Tuple[int, Optional[str], str]]:
+        """
+        Retira `quantity` unidades só se houver stock suficiente (UPDATE condicional, sem ler antes).
+        Devolve (novo stock, category_id, price) ou None quando não há stock.
+        """
+        return self._update_stock(
+            "UPDATE store_item SET stock = stock - %s WHERE id = %s AND stock >= %s "
+            "RETURNING stock, category_id, price",
+            [quantity, self._item_pk(item_id), quantity],
+        )
+
+    def increment_stock(self, item_id, quantity: int) -> Optional[Tuple[int, Optional[str], str]]:
+        return self._update_stock(
+            "UPDATE store_item SET stock = stock + %s WHERE id = %s RETURNING stock, category_id, price",
+            [quantity, self._item_pk(item_id)],
+        )
+
+    def decrement_stock_many(self, quantities: Dict[Any, int]) -> Optional[List[Tuple[Any, int, Optional[str], Any]]]:
+        """
+        Versão em lote de decrement_stock: um único UPDATE condicional para todos os itens.
+        Devolve [(item_id, novo stock, category_id, price)], ou None se algum item não tinha stock suficiente;
+        nesse caso os outros itens já foram alterados, por isso tem de correr dentro de uma transação
+        que o chamador desfaz.
+        """
+        condition = reduce(operator.or_, (Q(id=item_id, stock__gte=quantity) for item_id, quantity in quantities.items()))
+        delta = Case(
+            *(When(id=item_id, then=Value(quantity)) for item_id, quantity in quantities.items()),
+            output_field=PositiveBigIntegerField(),
+        )
+
+        if Item.objects.filter(condition).update(stock=F("stock") - delta) != len(quantities):
+            return None
+        return list(Item.objects.filter(id__in=list(quantities)).values_list("id", "stock", "category_id", "price"))
+
+    def create_reservation(self, reservation: StockReservation) -> StockReservation:
+        reservation.save(force_insert=True)
+        return reservation
+
+    def create_reservations(self, reservations: List[StockReservation]) -> List[StockReservation]:
+        return StockReservation.objects.bulk_create(reservations)
+
+    def consume_reservations(self, reservation_ids: List[str]) -> int:
+        return StockReservation.objects.filter(id__in=reservation_ids, status=StockReservation.ACTIVE).update(
+            status=StockReservation.CONSUMED
+        )
+
+    def lock_active_reservations(self, reservation_ids: List[str]) -> List[StockReservation]:
+        return list(
+            StockReservation.objects.select_for_update()
+            .filter(id__in=reservation_ids, status=StockReservation.ACTIVE)
+            .only("id", "item_id", "quantity")
+        )
+
+    def consume_reservation(self, reservation_id) -> bool:
+        updated = StockReservation.objects.filter(id=reservation_id, status=StockReservation.ACTIVE).update(
+            status=StockReservation.CONSUMED
+        )
+        return updated > 0
+
+    def release_reservation(self, reservation_id) -> bool:
+        updated = StockReservation.objects.filter(id=reservation_id, status=StockReservation.ACTIVE).update(
+            status=StockReservation.RELEASED
+        )
+        return updated > 0
+
+    def lock_expired_reservations(self, now, limit: int) -> List[StockReservation]:
+        """
+        Reservas ativas já expiradas, bloqueadas para o sweeper (as que outro sweeper tem são saltadas).
+        As de pagamentos ainda PENDING ficam de fora: quem as liberta é o pipeline de pagamentos, se o pagamento falhar.
+        """
+        return list(
+            StockReservation.objects.select_for_update(skip_locked=True)
+            .filter(status=StockReservation.ACTIVE, expires_at__lte=now)
+            .exclude(payment_id__in=Payment.objects.filter(status=Payment.PENDING).values("id"))
+            .order_by("expires_at")
+            .only("id", "item_id", "quantity")[:limit]
+        )
+
+    def mark_reservations_released(self, reservation_ids: List[str]) -> int:
+        return StockReservation.objects.filter(id__in=reservation_ids, status=StockReservation.ACTIVE).update(
+            status=StockReservation.RELEASED
+        )
+
+    #Sales rollups
+    # Linhas de venda: (id da compra/encomenda, created_at, item_id, category_id, quantidade, receita)
+
+    def list_purchase_sale_lines(self, purchase_ids: List[Any]) -> List[Tuple]:
+        return list(
+            Purchase.objects.filter(id__in=purchase_ids)
+            .values_list("id", "created_at", "item_id", "item__category_id", "quantity", "total_price")
+        )
+
+    def list_order_sale_lines(self, order_ids: List[Any]) -> List[Tuple]:
+        return [
+            (order_id, created_at, item_id, category_id, quantity, unit_price * quantity)
+            for order_id, created_at, item_id, category_id, quantity, unit_price in OrderItem.objects.filter(order_id__in=order_ids)
+            .order_by("order_id")
+            .values_list("order_id", "order__created_at", "item_id", "item__category_id", "quantity", "unit_price")
+        ]
+
+    def iter_paid_sale_lines(self, since, until, chunk_size: int = 2000) -> Iterator[Tuple]:
+        """Linhas de todas as compras e encomendas PAID em [since, until), lidas em blocos de `chunk_size`."""
+        purchases = (
+            Purchase.objects.filter(status=Purchase.PAID, created_at__gte=since, created_at__lt=until)
+            .values_list("id", "created_at", "item_id", "item__category_id", "quantity", "total_price")
+        )
+        yield from purchases.iterator(chunk_size=chunk_size)
+
+        lines = (
+            OrderItem.objects.filter(order__status=Order.PAID, order__created_at__gte=since, order__created_at__lt=until)
+            .order_by("order_id")
+            .values_list("order_id", "order__created_at", "item_id", "item__category_id", "quantity", "unit_price")
+        )
+        for order_id, created_at, item_id, category_id, quantity, unit_price in lines.iterator(chunk_size=chunk_size):
+            yield order_id, created_at, item_id, category_id, quantity, unit_price * quantity
+
+    def first_sale_at(self):
+        dates = [
+            Purchase.objects.filter(status=Purchase.PAID).aggregate(first=Min("created_at"))["first"],
+            Order.objects.filter(status=Order.PAID).aggregate(first=Min("created_at"))["first"],
+        ]
+        return min((date for date in dates if date is not None), default=None)
+
+    def add_sales_rollups(self, deltas: Dict[Tuple[str, Any, str, Any], List], batch_size: int = 500) -> None:
+        """
+        Soma os deltas {(dimension, key, granularity, period_start): [units, revenue, order_count]} às linhas
+        de SalesRollup com INSERT ... ON CONFLICT DO UPDATE, criando as que faltam (um statement por lote).
+        """
+        fields = SalesRollup._meta
+        qn = connection.ops.quote_name
+        table = qn(fields.db_table)
+        columns = ["dimension", "key", "granularity", "period_start", "units", "revenue", "order_count", "updated_at"]
+        now = fields.get_field("updated_at").get_db_prep_value(timezone.now(), connection)
+
+        rows = list(deltas.items())
+        for start in range(0, len(rows), batch_size):
+            params = []
+            for (dimension, key, granularity, period_start), (units, revenue, order_count) in rows[start:start + batch_size]:
+                params += [
+                    dimension,
+                    fields.get_field("key").get_db_prep_value(key, connection),
+                    granularity,
+                    fields.get_field("period_start").get_db_prep_value(period_start, connection),
+                    units,
+                    fields.get_field("revenue").get_db_prep_value(revenue, connection),
+                    order_count,
+                    now,
+                ]
+            placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+            sql = (
+                f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) VALUES "
+                + ", ".join([placeholders] * (len(params) // len(columns)))
+                + f" ON CONFLICT ({', '.join(qn(c) for c in columns[:4])}) DO UPDATE SET "
+                + ", ".join(f"{qn(c)} = {table}.{qn(c)} + excluded.{qn(c)}" for c in ("units", "revenue", "order_count"))
+                + f", {qn('updated_at')} = excluded.{qn('updated_at')}"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+
+    def delete_sales_rollups(self, since, until) -> int:
+        deleted, _ = SalesRollup.objects.filter(period_start__gte=since, period_start__lt=until).delete()
+        return deleted
+
+    def list_sales_rollups(self, dimension: str, key, granularity: str, since, until) -> List[SalesRollup]:
+        return list(
+            SalesRollup.objects.filter(
+                dimension=dimension, key=key, granularity=granularity, period_start__gte=since, period_start__lt=until
+            )
+            .order_by("period_start")
+            .only("period_start", "units", "revenue", "order_count")
+        )
+
+    def top_sales_rollups(self, dimension: str, since, until, limit: int, order_by: str) -> List[Dict[str, Any]]:
+        """Itens ou categorias com mais vendas em [since, until), somando as linhas diárias."""
+        return list(
+            SalesRollup.objects.filter(
+                dimension=dimension, granularity=SalesRollup.DAY, period_start__gte=since, period_start__lt=until
+            )
+            .values("key")
+            .annotate(units=Sum("units"), revenue=Sum("revenue"), order_count=Sum("order_count"))
+            .order_by(f"-{order_by}", "key")[:limit]
+        )
+
+    def _update_stock(self, sql: str, params: list):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+
+        fields = Item._meta
+        return (
+            row[0],
+            fields.get_field("category").target_field.to_python(row[1]) if row[1] is not None else None,
+            fields.get_field("price").to_python(row[2]),
+        )
+
+    def _item_pk(self, item_id):
+        return Item._meta.pk.get_db_prep_value(getattr(item_id, "pk", item_id), connection)
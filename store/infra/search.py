@@ -0,0 +1,216 @@
+"""
+Pesquisa de texto completo no catálogo (nome, descrição e nome da categoria).
+
+- PostgreSQL: coluna `search_vector` (tsvector) mantida por trigger e indexada com GIN.
+- SQLite: tabela virtual FTS5 `store_item_fts` mantida por triggers (rowid = rowid de store_item).
+- Outros bancos: fallback com icontains, sem ranking.
+
+Os índices são instalados pela migração 0003 através de `install_search_index`. No SQLite, migrações
+que reconstroem a tabela store_item apagam os triggers: nesse caso corra `manage.py rebuild_search_index`.
+"""
+import re
+import uuid
+from typing import List
+from django.db import connection as default_connection
+from django.db.models import Q
+from store.models import Item
+
+MAX_TERMS = 8
+
+_POSTGRES_INSTALL = [
+    "ALTER TABLE store_item ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION store_item_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce((SELECT name FROM store_category WHERE id = NEW.category_id), '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS store_item_search_vector_trg ON store_item",
+    """
+    CREATE TRIGGER store_item_search_vector_trg
+    BEFORE INSERT OR UPDATE OF name, description, category_id ON store_item
+    FOR EACH ROW EXECUTE FUNCTION store_item_search_vector()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION store_category_search_vector() RETURNS trigger AS $$
+    BEGIN
+        UPDATE store_item SET category_id = category_id WHERE category_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS store_category_search_vector_trg ON store_category",
+    """
+    CREATE TRIGGER store_category_search_vector_trg
+    AFTER UPDATE OF name ON store_category
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION store_category_search_vector()
+    """,
+    # Preenche as linhas existentes reaproveitando o trigger
+    "UPDATE store_item SET name = name",
+    "CREATE INDEX IF NOT EXISTS store_item_search_vector_gin ON store_item USING GIN (search_vector)",
+]
+
+_POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS store_category_search_vector_trg ON store_category",
+    "DROP TRIGGER IF EXISTS store_item_search_vector_trg ON store_item",
+    "DROP FUNCTION IF EXISTS store_category_search_vector()",
+    "DROP FUNCTION IF EXISTS store_item_search_vector()",
+    "DROP INDEX IF EXISTS store_item_search_vector_gin",
+    "ALTER TABLE store_item DROP COLUMN IF EXISTS search_vector",
+]
+
+_SQLITE_ROW = """
+    INSERT INTO store_item_fts(rowid, name, description, category)
+    VALUES (new.rowid, new.name, coalesce(new.description, ''),
+            coalesce((SELECT name FROM store_category WHERE id = new.category_id), ''));
+"""
+
+_SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS store_item_fts_ai",
+    "DROP TRIGGER IF EXISTS store_item_fts_au",
+    "DROP TRIGGER IF EXISTS store_item_fts_ad",
+    "DROP TRIGGER IF EXISTS store_category_fts_au",
+    "DROP TABLE IF EXISTS store_item_fts",
+]
+
+_SQLITE_INSTALL = _SQLITE_UNINSTALL + [
+    """
+    CREATE VIRTUAL TABLE store_item_fts USING fts5(
+        name, description, category, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"CREATE TRIGGER store_item_fts_ai AFTER INSERT ON store_item BEGIN {_SQLITE_ROW} END",
+    f"""
+    CREATE TRIGGER store_item_fts_au AFTER UPDATE OF name, description, category_id ON store_item BEGIN
+        DELETE FROM store_item_fts WHERE rowid = old.rowid;
+        {_SQLITE_ROW}
+    END
+    """,
+    "CREATE TRIGGER store_item_fts_ad AFTER DELETE ON store_item BEGIN DELETE FROM store_item_fts WHERE rowid = old.rowid; END",
+    """
+    CREATE TRIGGER store_category_fts_au AFTER UPDATE OF name ON store_category BEGIN
+        DELETE FROM store_item_fts WHERE rowid IN (SELECT rowid FROM store_item WHERE category_id = new.id);
+        INSERT INTO store_item_fts(rowid, name, description, category)
+        SELECT rowid, name, coalesce(description, ''), new.name FROM store_item WHERE category_id = new.id;
+    END
+    """,
+    """
+    INSERT INTO store_item_fts(rowid, name, description, category)
+    SELECT i.rowid, i.name, coalesce(i.description, ''), coalesce(c.name, '')
+    FROM store_item i LEFT JOIN store_category c ON c.id = i.category_id
+    """,
+]
+
+
+def _run(connection, statements: List[str]) -> None:
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install_search_index(connection=default_connection) -> None:
+    """Cria (ou recria) a estrutura de pesquisa do banco atual e indexa os itens existentes."""
+    if connection.vendor == "postgresql":
+        _run(connection, _POSTGRES_INSTALL)
+    elif connection.vendor == "sqlite":
+        _run(connection, _SQLITE_INSTALL)
+
+
+def uninstall_search_index(connection=default_connection) -> None:
+    if connection.vendor == "postgresql":
+        _run(connection, _POSTGRES_UNINSTALL)
+    elif connection.vendor == "sqlite":
+        _run(connection, _SQLITE_UNINSTALL)
+
+
+def search_terms(query: str) -> List[str]:
+    """Separa a pesquisa em palavras (letras e dígitos), ignorando pontuação e operadores."""
+    return re.findall(r"[^\W_]+", (query or "").lower())[:MAX_TERMS]
+
+
+class SearchBackend:
+    def search(self, query: str, limit: int, offset: int = 0) -> List[uuid.UUID]:
+        """Devolve os ids dos itens encontrados, ordenados por relevância."""
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend):
+    def __init__(self, connection=default_connection):
+        self.connection = connection
+
+    def search(self, query: str, limit: int, offset: int = 0) -> List[uuid.UUID]:
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        # Cada termo é tratado como prefixo, para que "cami" encontre "camisa"
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT id FROM store_item, to_tsquery('simple', %s) query
+                WHERE search_vector @@ query
+                ORDER BY ts_rank_cd(search_vector, query) DESC, id
+                LIMIT %s OFFSET %s
+                """,
+                [tsquery, limit, offset],
+            )
+            return [uuid.UUID(str(row[0])) for row in cursor.fetchall()]
+
+
+class SqliteSearchBackend(SearchBackend):
+    # Pesos do bm25 por coluna: name, description, category
+    WEIGHTS = (10.0, 2.0, 5.0)
+
+    def __init__(self, connection=default_connection):
+        self.connection = connection
+
+    def search(self, query: str, limit: int, offset: int = 0) -> List[uuid.UUID]:
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        match = " ".join(f'"{term}"*' for term in terms)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT i.id FROM store_item_fts f JOIN store_item i ON i.rowid = f.rowid
+                WHERE store_item_fts MATCH %s
+                ORDER BY bm25(store_item_fts, %s, %s, %s), i.id
+                LIMIT %s OFFSET %s
+                """,
+                [match, *self.WEIGHTS, limit, offset],
+            )
+            return [uuid.UUID(str(row[0])) for row in cursor.fetchall()]
+
+
+class ContainsSearchBackend(SearchBackend):
+    """Fallback para bancos sem pesquisa de texto: filtra por icontains e ordena por nome."""
+
+    def search(self, query: str, limit: int, offset: int = 0) -> List[uuid.UUID]:
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        queryset = Item.objects.all()
+        for term in terms:
+            queryset = queryset.filter(
+                Q(name__icontains=term) | Q(description__icontains=term) | Q(category__name__icontains=term)
+            )
+        return list(queryset.order_by("name", "id").values_list("id", flat=True)[offset:offset + limit])
+
+
+def get_search_backend(connection=default_connection) -> SearchBackend:
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend(connection)
+    if connection.vendor == "sqlite":
+        return SqliteSearchBackend(connection)
+    return ContainsSearchBackend()
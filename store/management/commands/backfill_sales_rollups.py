@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from store.helpers.pagination import parse_date_bound
+from store.services.sales_rollup_service import SalesRollupService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os agregados de vendas (SalesRollup) a partir das compras e encomendas pagas, um dia por transação. "
+        "Sem datas processa todo o histórico; pode correr com a loja a funcionar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Data ISO 8601 (inclusiva); por omissão a primeira venda")
+        parser.add_argument("--until", help="Data ISO 8601 (exclusiva); por omissão agora")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Linhas de venda lidas do banco de cada vez")
+
+    def handle(self, *args, **options):
+        try:
+            since, until = parse_date_bound(options["since"]), parse_date_bound(options["until"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        days = SalesRollupService().backfill(since=since, until=until, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Sales rollups rebuilt for {days} days."))
@@ -0,0 +1,68 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw
+from store.helpers.image_variants import render_variants
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede quantas imagens por segundo o gerador de variantes processa, num processo e com o pool, "
+        "e quantas por segundo cada core faz. As imagens são geradas em memória; nada é gravado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=48)
+        parser.add_argument("--width", type=int, default=3000)
+        parser.add_argument("--height", type=int, default=2000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        images = self._images(options["images"], options["width"], options["height"], options["seed"])
+        workers = options["workers"]
+        size_mib = sum(len(image) for image in images) / len(images) / 1024 / 1024
+
+        self.stdout.write(f"\n{len(images)} JPEG images {options['width']}x{options['height']}, {size_mib:.1f} MiB on average")
+        self.stdout.write(f"{'processes':<12}{'seconds':>10}{'img/s':>10}{'img/s/core':>12}")
+
+        for processes in sorted({1, workers}):
+            seconds = self._run(images, processes)
+            rate = len(images) / seconds
+            self.stdout.write(f"{processes:<12}{seconds:>10.2f}{rate:>10.1f}{rate / processes:>12.1f}")
+
+    def _run(self, images, processes):
+        if processes == 1:
+            started = time.perf_counter()
+            for image in images:
+                render_variants(image)
+            return time.perf_counter() - started
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            # Aquecimento: o arranque dos processos não conta
+            list(pool.map(render_variants, images[:processes]))
+            started = time.perf_counter()
+            list(pool.map(render_variants, images))
+            return time.perf_counter() - started
+
+    def _images(self, count, width, height, seed):
+        rng = random.Random(seed)
+        images = []
+        for _ in range(count):
+            # Gradiente com formas e ruído, para o JPEG ter um tamanho parecido com o de uma fotografia
+            image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+            draw = ImageDraw.Draw(image)
+            for _ in range(40):
+                x, y = rng.randrange(width), rng.randrange(height)
+                radius = rng.randrange(20, max(21, width // 6))
+                draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=tuple(rng.randrange(256) for _ in range(3)))
+            noise = Image.effect_noise((width, height), 40).convert("RGB")
+            image = Image.blend(image, noise, 0.25)
+
+            out = BytesIO()
+            image.save(out, "JPEG", quality=90)
+            images.append(out.getvalue())
+        return images
@@ -0,0 +1,83 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from api.renderers import FastJSONParser, FastJSONRenderer, orjson
+from store.models import Category, Item
+from store.serializers import ItemSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o JSONRenderer/JSONParser do DRF com o FastJSONRenderer/FastJSONParser numa lista de itens. "
+        "Os itens não são gravados no banco. Falha se, com o orjson instalado, o renderer/parser rápido for mais lento."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=7)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson não está instalado: o FastJSONRenderer usa o json da stdlib"))
+
+        data = ItemSerializer(self._items(options["items"], options["seed"]), many=True).data
+        drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+        drf_bytes = drf_renderer.render(data, "application/json")
+        fast_bytes = fast_renderer.render(data, "application/json")
+        if drf_bytes != fast_bytes:
+            raise CommandError("FastJSONRenderer produced different bytes from JSONRenderer")
+
+        if JSONParser().parse(BytesIO(drf_bytes)) != FastJSONParser().parse(BytesIO(drf_bytes)):
+            raise CommandError("FastJSONParser produced a different result from JSONParser")
+
+        repeat = options["repeat"]
+        self.stdout.write(f"\n{options['items']} items, {len(drf_bytes) / 1024:.0f} KiB")
+        self.stdout.write(f"{'step':<10}{'drf ms':>10}{'fast ms':>10}{'speedup':>10}")
+
+        slower = []
+        for step, baseline, fast in (
+            ("render", lambda: drf_renderer.render(data, "application/json"), lambda: fast_renderer.render(data, "application/json")),
+            ("parse", lambda: JSONParser().parse(BytesIO(drf_bytes)), lambda: FastJSONParser().parse(BytesIO(drf_bytes))),
+        ):
+            baseline_ms, fast_ms = self._median(baseline, repeat), self._median(fast, repeat)
+            self.stdout.write(f"{step:<10}{baseline_ms:>10.2f}{fast_ms:>10.2f}{baseline_ms / fast_ms:>9.1f}x")
+            if fast_ms > baseline_ms:
+                slower.append(step)
+
+        if orjson is not None and slower:
+            raise CommandError(f"Fast JSON is slower than DRF: {', '.join(slower)}")
+
+    def _items(self, count, seed):
+        random.seed(seed)
+        now = timezone.now()
+        categories = [Category(id=uuid.uuid4(), name=f"Categoria {i}", description="Roupa e calçado") for i in range(10)]
+        return [
+            Item(
+                id=uuid.uuid4(),
+                name=f"Camisa {i} ção",
+                description="Algodão, tamanho único " * 3,
+                price=Decimal(random.randint(100, 100_000)) / 100,
+                stock=random.randint(0, 50),
+                category=random.choice(categories),
+                created_at=now - timedelta(seconds=i),
+            )
+            for i in range(count)
+        ]
+
+    def _median(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
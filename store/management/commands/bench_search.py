@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from store.infra.respository import StoreRepository
+from store.models import Category, Item
+
+WORDS = [
+    "camisa", "calça", "vestido", "sapatilha", "casaco", "saia", "boné", "meias", "blusa", "jaqueta",
+    "azul", "preto", "branco", "vermelho", "verde", "linho", "algodão", "couro", "ganga", "seda",
+    "verão", "inverno", "desporto", "clássico", "slim", "oversize", "infantil", "feminino", "masculino", "unissexo",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a pesquisa antiga (name__icontains) com o motor de pesquisa de texto. "
+        "Os itens sintéticos são criados dentro de uma transação que é revertida no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000])
+        parser.add_argument("--queries", nargs="+", default=["camisa", "azul linho", "sapatilha couro preto", "jaq"])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        repository = StoreRepository()
+
+        with transaction.atomic():
+            categories = [Category.objects.create(name=f"bench-{word}") for word in WORDS[:10]]
+            created = 0
+
+            for size in sorted(options["sizes"]):
+                self._fill(categories, size - created, options["batch_size"])
+                created = size
+
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute("ANALYZE store_item")
+
+                self.stdout.write(f"\n{size} items ({connection.vendor})")
+                self.stdout.write(f"{'query':<28}{'icontains ms':>14}{'search ms':>12}{'speedup':>10}")
+
+                for query in options["queries"]:
+                    baseline = self._median(lambda: repository.search_by_name(name=query), options["repeat"])
+                    ranked = self._median(lambda: repository.search_items(query, limit=20), options["repeat"])
+                    self.stdout.write(f"{query:<28}{baseline:>14.2f}{ranked:>12.2f}{baseline / ranked:>9.1f}x")
+
+            transaction.set_rollback(True)
+
+    def _fill(self, categories, count, batch_size):
+        started = time.perf_counter()
+        while count > 0:
+            batch = min(batch_size, count)
+            Item.objects.bulk_create([
+                Item(
+                    name=" ".join(random.sample(WORDS, 3)),
+                    description=" ".join(random.choices(WORDS, k=12)),
+                    price=Decimal(random.randint(100, 100_000)) / 100,
+                    stock=random.randint(0, 50),
+                    category=random.choice(categories),
+                )
+                for _ in range(batch)
+            ], batch_size=batch_size)
+            count -= batch
+        self.stdout.write(f"seeded in {time.perf_counter() - started:.1f}s")
+
+    def _median(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
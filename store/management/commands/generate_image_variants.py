@@ -0,0 +1,38 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from store.services.image_variant_service import ImageVariantService
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as variantes (thumbnail, medium e WebP) das imagens dos itens que ainda não as têm, num pool de processos. "
+        "Sem --loop corre uma vez; com --loop fica a correr como worker e apanha as imagens novas ou alteradas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=5.0, help="Segundos de espera quando não há imagens novas (com --loop)")
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--workers", type=int, default=None, help="Processos do pool (por omissão IMAGE_VARIANT_WORKERS)")
+
+    def handle(self, *args, **options):
+        workers = options["workers"] or getattr(settings, "IMAGE_VARIANT_WORKERS", 1)
+
+        # O pool vive enquanto o comando corre: os processos só arrancam (e importam o Pillow) uma vez
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            variants = ImageVariantService(executor=pool)
+            while True:
+                processed = 0
+                while True:
+                    count = variants.process_pending(limit=options["batch_size"])
+                    processed += count
+                    if count < options["batch_size"]:
+                        break
+
+                if processed or not options["loop"]:
+                    self.stdout.write(f"{processed} item images processed")
+                if not options["loop"]:
+                    return
+                time.sleep(options["interval"])
@@ -0,0 +1,56 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from store.services.item_import_service import ItemImportService, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa itens de um ficheiro CSV ou JSONL (colunas: id opcional, name, description, price, stock, category). "
+        "O ficheiro é lido em streaming e gravado em lotes com upsert pelo id; "
+        "as categorias são criadas pelo nome quando não existem."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Ficheiro .csv/.jsonl, ou - para ler do stdin")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Por omissão é deduzido da extensão")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--method", choices=["auto", "bulk", "copy"], default="auto",
+                            help="copy só existe no PostgreSQL; auto usa copy no PostgreSQL e bulk nos outros")
+        parser.add_argument("--max-errors", type=int, default=20, help="Quantos erros de linha mostrar no fim")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "jsonl" if path != "-" else None)
+        if fmt is None:
+            raise CommandError("Use --format when reading from stdin")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        service = ItemImportService(
+            batch_size=options["batch_size"],
+            use_copy={"auto": None, "bulk": False, "copy": True}[options["method"]],
+        )
+        started = time.perf_counter()
+
+        def progress(imported):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{imported} items imported ({imported / elapsed:,.0f} items/s)")
+
+        try:
+            if path == "-":
+                service.run(read_rows(sys.stdin, fmt), on_batch=progress)
+            else:
+                with open(path, encoding="utf-8-sig", newline="") as stream:
+                    service.run(read_rows(stream, fmt), on_batch=progress)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - started
+        for line_number, error in service.errors[:options["max_errors"]]:
+            self.stderr.write(f"line {line_number}: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {service.imported} items in {elapsed:.1f}s "
+            f"({service.imported / elapsed if elapsed else 0:,.0f} items/s), {len(service.errors)} rows skipped."
+        ))
@@ -0,0 +1,36 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from store.services.payment_service import PaymentService
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa os pagamentos PENDING: chama o gateway com timeout, repete os erros transitórios com backoff "
+        "e passa as compras e encomendas a PAID ou FAILED. Sem --loop corre uma vez; com --loop fica a correr como worker. "
+        "Vários processos em paralelo não apanham o mesmo pagamento."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=1.0, help="Segundos de espera quando a fila está vazia (com --loop)")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--workers", type=int, default=None, help="Chamadas ao gateway em paralelo (por omissão PAYMENT_WORKERS)")
+
+    def handle(self, *args, **options):
+        payments = PaymentService()
+        workers = options["workers"] or getattr(settings, "PAYMENT_WORKERS", 8)
+
+        while True:
+            processed = 0
+            while True:
+                count = payments.process_due(limit=options["batch_size"], workers=workers)
+                processed += count
+                if count < options["batch_size"]:
+                    break
+
+            if processed or not options["loop"]:
+                self.stdout.write(f"{processed} payments processed")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from store.services.upload_service import UploadService
+
+
+class Command(BaseCommand):
+    help = (
+        "Apaga os uploads em partes que expiraram sem serem associados a uma compra ou item (partes em staging "
+        "e ficheiro montado). Sem --loop corre uma vez (para cron); com --loop fica a correr como worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=600.0, help="Segundos entre passagens com --loop")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        uploads = UploadService()
+
+        while True:
+            purged = 0
+            while True:
+                count = uploads.purge_expired(limit=options["batch_size"])
+                purged += count
+                if count < options["batch_size"]:
+                    break
+
+            self.stdout.write(f"{purged} expired uploads purged")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from store.services.category_facet_service import CategoryFacetService
+
+
+class Command(BaseCommand):
+    help = "Recalcula a tabela de facetas por categoria a partir dos itens (backfill ou reparação)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--category", nargs="+", help="Só estas categorias (ids)")
+
+    def handle(self, *args, **options):
+        total = CategoryFacetService.rebuild(options["category"])
+        self.stdout.write(self.style.SUCCESS(f"{total} category facets rebuilt."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from store.services.favorite_index_service import FavoriteIndexService
+
+
+class Command(BaseCommand):
+    help = "Volta a preencher o índice de favoritos no Redis (um set por utilizador) a partir da tabela Favorite."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", nargs="+", help="Só estes utilizadores (ids)")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        service = FavoriteIndexService()
+        if not service.enabled:
+            raise CommandError("The default cache is not Redis; there is no favorite index to rebuild.")
+
+        if options["user"]:
+            for user_id in options["user"]:
+                service.rebuild(user_id)
+            total = len(options["user"])
+        else:
+            total = service.rebuild_all(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Favorite index rebuilt for {total} users."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from store.infra.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = "Recria a estrutura de pesquisa de texto do catálogo e reindexa todos os itens."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            install_search_index(connection)
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({connection.vendor})."))
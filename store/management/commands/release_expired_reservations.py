@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from store.services.inventory_service import InventoryService
+
+
+class Command(BaseCommand):
+    help = (
+        "Devolve ao stock as reservas expiradas. Sem --loop corre uma vez (para cron); "
+        "com --loop fica a correr como worker. Vários workers em paralelo não libertam a mesma reserva."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=30.0, help="Segundos entre passagens com --loop")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        inventory = InventoryService()
+
+        while True:
+            released = 0
+            while True:
+                count = inventory.release_expired(limit=options["batch_size"])
+                released += count
+                if count < options["batch_size"]:
+                    break
+
+            self.stdout.write(f"{released} expired reservations released")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
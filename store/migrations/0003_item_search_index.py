@@ -0,0 +1,21 @@
+from django.db import migrations
+from store.infra.search import install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_rename_quatity_cartitem_quantity'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from store.infra.db_operations import AddIndexConcurrently, AddUniqueConstraintConcurrently
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    """Junta as linhas repetidas de (user, item) no carrinho antes de criar a constraint única."""
+    CartItem = apps.get_model("store", "CartItem")
+
+    duplicates = (
+        CartItem.objects.values("user_id", "item_id")
+        .annotate(rows=Count("id"), total=Sum("quantity"))
+        .filter(rows__gt=1)
+    )
+
+    for duplicate in duplicates:
+        rows = CartItem.objects.filter(user_id=duplicate["user_id"], item_id=duplicate["item_id"]).order_by("added_at", "id")
+        keep = rows.first()
+        rows.exclude(id=keep.id).delete()
+        CartItem.objects.filter(id=keep.id).update(quantity=duplicate["total"])
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não pode correr dentro de uma transação no PostgreSQL
+    atomic = False
+
+    dependencies = [
+        ('store', '0003_item_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cart_items, migrations.RunPython.noop, atomic=True),
+        AddIndexConcurrently(
+            model_name='item',
+            index=models.Index(fields=['created_at', 'id'], name='store_item_created_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='item',
+            index=models.Index(fields=['category', 'created_at'], name='store_item_cat_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='favorite',
+            index=models.Index(fields=['user', 'created_at'], name='store_fav_user_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='purchase',
+            index=models.Index(fields=['user', 'created_at'], name='store_purch_user_created_idx'),
+        ),
+        AddUniqueConstraintConcurrently(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('user', 'item'), name='store_cartitem_user_item_uniq'),
+        ),
+    ]
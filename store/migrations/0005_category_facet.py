@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+
+
+def backfill_category_facets(apps, schema_editor):
+    Category = apps.get_model("store", "Category")
+    CategoryFacet = apps.get_model("store", "CategoryFacet")
+    Item = apps.get_model("store", "Item")
+
+    aggregates = {
+        row["category_id"]: row
+        for row in Item.objects.exclude(category_id=None)
+        .values("category_id")
+        .annotate(
+            item_count=Count("id"),
+            in_stock_count=Count("id", filter=Q(stock__gt=0)),
+            min_price=Min("price"),
+            max_price=Max("price"),
+        )
+    }
+
+    CategoryFacet.objects.bulk_create([
+        CategoryFacet(
+            category_id=category_id,
+            item_count=aggregates.get(category_id, {}).get("item_count", 0),
+            in_stock_count=aggregates.get(category_id, {}).get("in_stock_count", 0),
+            min_price=aggregates.get(category_id, {}).get("min_price"),
+            max_price=aggregates.get(category_id, {}).get("max_price"),
+        )
+        for category_id in Category.objects.values_list("id", flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_store_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryFacet',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='facet', serialize=False, to='store.category')),
+                ('item_count', models.PositiveBigIntegerField(default=0)),
+                ('in_stock_count', models.PositiveBigIntegerField(default=0)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_category_facets, migrations.RunPython.noop),
+    ]
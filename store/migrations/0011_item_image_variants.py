@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:40
+
+from django.db import migrations, models
+from store.infra.db_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não pode correr dentro de uma transação no PostgreSQL
+    atomic = False
+
+    dependencies = [
+        ('store', '0010_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='image_variants',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='item',
+            index=models.Index(condition=models.Q(('image__gt', ''), ('image_variants__isnull', True)), fields=['created_at'], name='store_item_variants_todo_idx'),
+        ),
+    ]
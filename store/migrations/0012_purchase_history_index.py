@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:20
+
+from django.conf import settings
+from django.db import migrations, models
+from store.infra.db_operations import AddIndexConcurrently, RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY não podem correr dentro de uma transação no PostgreSQL
+    atomic = False
+
+    dependencies = [
+        ('store', '0011_item_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # O índice antigo só sai depois de o novo existir: o histórico nunca fica sem índice
+        AddIndexConcurrently(
+            model_name='purchase',
+            index=models.Index(fields=['user', 'created_at', 'id'], include=['item', 'quantity', 'total_price', 'status', 'payment_method'], name='store_purch_history_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='purchase',
+            name='store_purch_user_created_idx',
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_purchase_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('dimension', models.CharField(choices=[('item', 'Item'), ('category', 'Category'), ('total', 'Total')], max_length=10)),
+                ('key', models.UUIDField()),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=5)),
+                ('period_start', models.DateTimeField()),
+                ('units', models.PositiveBigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dimension', 'granularity', 'period_start'], name='store_sales_dim_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key', 'granularity', 'period_start'), name='store_sales_rollup_uniq')],
+            },
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 import uuid
 from django.conf import settings
 # Create your models here.
@@ -19,12 +19,41 @@ class Item(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name="items")
     stock = models.PositiveBigIntegerField(default=0)
     image = models.ImageField(upload_to="items/", null=True, blank=True)
+    # Nome da variante -> caminho no storage, gerado pelo comando generate_image_variants.
+    # None: ainda por gerar (ou a imagem mudou); {}: a imagem não pôde ser processada
+    image_variants = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Listagem paginada por (created_at, id) e listagem por categoria
+            models.Index(fields=["created_at", "id"], name="store_item_created_id_idx"),
+            models.Index(fields=["category", "created_at"], name="store_item_cat_created_idx"),
+            # Fila do gerador de variantes: só os itens com imagem ainda por processar
+            models.Index(
+                fields=["created_at"],
+                name="store_item_variants_todo_idx",
+                condition=models.Q(image_variants__isnull=True, image__gt=""),
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores tal como estão no banco (o signal das variantes compara a imagem com a nova)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Os signals das facetas leem o estado anterior com SELECT FOR UPDATE e aplicam o delta na mesma
+        # transação: dois saves simultâneos do mesmo item ficam em série, cada um a partir do estado do outro
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
 class Favorite(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="favorites")
@@ -33,20 +62,47 @@ class Favorite(models.Model):
 
     class Meta:
         unique_together = ('user', 'item')
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="store_fav_user_created_idx"),
+        ]
 
 class CartItem(models.Model):
+    # Operações do endpoint store/cart/batch/: somar, substituir a quantidade ou tirar a linha
+    ADD = "add"
+    SET = "set"
+    REMOVE = "remove"
+    OPERATIONS = (
+        (ADD, "Add"),
+        (SET, "Set"),
+        (REMOVE, "Remove"),
+    )
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="cart_items")
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     quantity = models.PositiveBigIntegerField(default=1)
     added_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "item"], name="store_cartitem_user_item_uniq"),
+        ]
+
 class Purchase(models.Model):
     PAYMENT_METHODS = (
         ("MULTICAIXA_EXPESS", "Multicaixa Express"),
         ("ATM", "ATM"),
         ("REFERENCE", "Payment Reference"),
     )
+    # Estado do pagamento, usado também por Order e Payment
+    PENDING = "PENDING"
+    PAID = "PAID"
+    FAILED = "FAILED"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (PAID, "Paid"),
+        (FAILED, "Failed"),
+    )
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,related_name="purchase")
@@ -54,6 +110,7 @@ class Purchase(models.Model):
     quantity = models.PositiveBigIntegerField(default=1)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=30, choices=PAYMENT_METHODS)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
     payment_proof = models.FileField(upload_to="payment_proofs/", null=True, blank=True)
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
@@ -65,5 +122,247 @@ class Purchase(models.Model):
     email = models.EmailField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Histórico de compras (store/purchases/): keyset por (user, created_at, id), com as colunas da listagem
+            # em INCLUDE no PostgreSQL para a página ser lida só do índice (as colunas da morada ficam de fora)
+            models.Index(
+                fields=["user", "created_at", "id"],
+                include=["item", "quantity", "total_price", "status", "payment_method"],
+                name="store_purch_history_idx",
+            ),
+        ]
+
     def __start__(self):
-        return f"Purchase {self.id} by {self.user}"
\ No newline at end of file
+        return f"Purchase {self.id} by {self.user}"
+
+class CategoryFacet(models.Model):
+    """
+    Agregados por categoria (contagens e faixa de preço), mantidos incrementalmente
+    pelo CategoryFacetService sempre que um item é criado, alterado ou apagado.
+    """
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, primary_key=True, related_name="facet")
+    item_count = models.PositiveBigIntegerField(default=0)
+    in_stock_count = models.PositiveBigIntegerField(default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class StockReservation(models.Model):
+    """
+    Unidades de stock retiradas de Item.stock e guardadas para um utilizador enquanto o pagamento
+    não termina. Expiram em expires_at e são devolvidas ao stock pelo comando release_expired_reservations.
+    """
+    ACTIVE = "ACTIVE"
+    CONSUMED = "CONSUMED"
+    RELEASED = "RELEASED"
+    STATUSES = (
+        (ACTIVE, "Active"),
+        (CONSUMED, "Consumed"),
+        (RELEASED, "Released"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="stock_reservations")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="reservations")
+    quantity = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUSES, default=ACTIVE)
+    # Pagamento a que a reserva pertence; enquanto estiver PENDING o sweeper não a liberta
+    payment = models.ForeignKey("Payment", on_delete=models.SET_NULL, null=True, blank=True, related_name="reservations")
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # O sweeper procura reservas ACTIVE já expiradas
+            models.Index(fields=["status", "expires_at"], name="store_resv_status_exp_idx"),
+        ]
+
+
+class Order(models.Model):
+    """Compra de um carrinho inteiro: um pagamento e uma morada para várias linhas (OrderItem)."""
+    PENDING = Purchase.PENDING
+    PAID = Purchase.PAID
+    FAILED = Purchase.FAILED
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="orders")
+    total_price = models.DecimalField(max_digits=12, decimal_places=2)
+    payment_method = models.CharField(max_length=30, choices=Purchase.PAYMENT_METHODS)
+    status = models.CharField(max_length=10, choices=Purchase.STATUSES, default=Purchase.PENDING)
+    payment_proof = models.FileField(upload_to="payment_proofs/", null=True, blank=True)
+    first_name = models.CharField(max_length=100)
+    last_name = models.CharField(max_length=100)
+    city = models.CharField(max_length=100)
+    country = models.CharField(max_length=100)
+    street_address = models.CharField(max_length=255)
+    house_number = models.CharField(max_length=30)
+    phone = models.CharField(max_length=50)
+    email = models.EmailField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="store_order_user_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Order {self.id} by {self.user}"
+
+
+class OrderItem(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    quantity = models.PositiveBigIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+
+class Payment(models.Model):
+    """
+    Cobrança de uma compra (Purchase) ou encomenda (Order), feita fora do pedido HTTP pelo comando process_payments.
+    next_attempt_at é ao mesmo tempo a fila e o lease: o worker que reclama um pagamento empurra-o para a frente,
+    e se esse worker morrer o pagamento volta a estar disponível quando o prazo passa.
+    """
+    PENDING = Purchase.PENDING
+    PAID = Purchase.PAID
+    FAILED = Purchase.FAILED
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    purchase = models.OneToOneField(Purchase, on_delete=models.CASCADE, null=True, blank=True, related_name="payment")
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, null=True, blank=True, related_name="payment")
+    method = models.CharField(max_length=30, choices=Purchase.PAYMENT_METHODS)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    status = models.CharField(max_length=10, choices=Purchase.STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Os workers procuram pagamentos PENDING com next_attempt_at já passado
+            models.Index(fields=["status", "next_attempt_at"], name="store_pay_status_next_idx"),
+        ]
+
+    def __str__(self):
+        return f"Payment {self.id} ({self.status})"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Resposta guardada de um pedido com Idempotency-Key. Só é usada quando o Redis não está disponível;
+    normalmente estes registos vivem na cache.
+    """
+    PENDING = "PENDING"
+    DONE = "DONE"
+    STATES = (
+        (PENDING, "Pending"),
+        (DONE, "Done"),
+    )
+
+    key = models.CharField(max_length=64, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    state = models.CharField(max_length=10, choices=STATES, default=PENDING)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class Upload(models.Model):
+    """
+    Upload em partes (comprovativos de pagamento e imagens de itens). Os bytes vão para a pasta de staging
+    à medida que chegam, sem passar pela memória do worker; quando a última parte chega o ficheiro é montado
+    no storage e fica COMPLETE, à espera de ser associado a uma compra ou item pelo id.
+    """
+    PAYMENT_PROOF = "PAYMENT_PROOF"
+    ITEM_IMAGE = "ITEM_IMAGE"
+    PURPOSES = (
+        (PAYMENT_PROOF, "Payment proof"),
+        (ITEM_IMAGE, "Item image"),
+    )
+    UPLOADING = "UPLOADING"
+    COMPLETE = "COMPLETE"
+    ATTACHED = "ATTACHED"
+    FAILED = "FAILED"
+    STATUSES = (
+        (UPLOADING, "Uploading"),
+        (COMPLETE, "Complete"),
+        (ATTACHED, "Attached"),
+        (FAILED, "Failed"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="uploads")
+    purpose = models.CharField(max_length=20, choices=PURPOSES)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    # sha256 indicado pelo cliente (opcional) e, no fim, o calculado sobre o ficheiro montado
+    expected_sha256 = models.CharField(max_length=64, blank=True, default="")
+    sha256 = models.CharField(max_length=64, blank=True, default="")
+    status = models.CharField(max_length=10, choices=STATUSES, default=UPLOADING)
+    file = models.FileField(upload_to="uploads/", null=True, blank=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # purge_uploads procura uploads por associar já expirados
+            models.Index(fields=["status", "expires_at"], name="store_upload_status_exp_idx"),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.status})"
+
+
+
+class SalesRollup(models.Model):
+    """
+    Vendas pagas agregadas por período (hora ou dia) e por item, por categoria ou no total da loja.
+    Mantida incrementalmente pelo SalesRollupService quando um pagamento fica PAID; o comando
+    backfill_sales_rollups recalcula o histórico. `key` é o id do item ou da categoria (sem FK, para o
+    histórico sobreviver a itens apagados) e TOTAL_KEY na dimensão total.
+    """
+    HOUR = "hour"
+    DAY = "day"
+    GRANULARITIES = (
+        (HOUR, "Hour"),
+        (DAY, "Day"),
+    )
+    ITEM = "item"
+    CATEGORY = "category"
+    TOTAL = "total"
+    DIMENSIONS = (
+        (ITEM, "Item"),
+        (CATEGORY, "Category"),
+        (TOTAL, "Total"),
+    )
+    TOTAL_KEY = uuid.UUID(int=0)
+
+    id = models.BigAutoField(primary_key=True)
+    dimension = models.CharField(max_length=10, choices=DIMENSIONS)
+    key = models.UUIDField()
+    granularity = models.CharField(max_length=5, choices=GRANULARITIES)
+    period_start = models.DateTimeField()
+    units = models.PositiveBigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Compras e encomendas distintas que contam para a linha
+    order_count = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Chave do upsert incremental e caminho de acesso das séries de um item/categoria
+            models.UniqueConstraint(
+                fields=["dimension", "key", "granularity", "period_start"], name="store_sales_rollup_uniq"
+            ),
+        ]
+        indexes = [
+            # Rankings (top itens/categorias) num intervalo de datas
+            models.Index(fields=["dimension", "granularity", "period_start"], name="store_sales_dim_period_idx"),
+        ]
@@ -1,22 +1,39 @@
 from rest_framework import serializers 
-from .models import Category, Item, Favorite, CartItem, Purchase
+from store.helpers.image_variants import variant_urls
+from .models import Category, CategoryFacet, Item, Favorite, CartItem, Purchase, Order, OrderItem, Upload, SalesRollup
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name", "description"]
 
+class CategoryFacetSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(source="category_id", read_only=True)
+    name = serializers.CharField(source="category.name", read_only=True)
+
+    class Meta:
+        model = CategoryFacet
+        fields = ["id", "name", "item_count", "in_stock_count", "min_price", "max_price"]
+
 class ItemSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only= True)
+    # URLs das variantes da imagem (thumbnail, medium, ..._webp); null enquanto ainda não foram geradas
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Item
-        fields = ["id", "name", "description", "price", "category", "stock", "created_at", "updated_at"]
+        fields = ["id", "name", "description", "price", "category", "stock", "image_variants", "created_at", "updated_at"]
+
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants)
 
 class ItemCreateUpdateSerializer(serializers.ModelSerializer):
+    # Id de um upload ITEM_IMAGE completo (store/uploads/), em alternativa a enviar a imagem no multipart
+    image_upload = serializers.UUIDField(write_only=True, required=False)
+
     class Meta:
         model = Item
-        fields = ["name", "description", "price", "category", "stock", "image"]
+        fields = ["name", "description", "price", "category", "stock", "image", "image_upload"]
 
 class FavoriteSerializer(serializers.ModelSerializer):
     item = ItemSerializer(read_only=True)
@@ -25,6 +42,45 @@ class FavoriteSerializer(serializers.ModelSerializer):
         model = Favorite
         fields = ["id", "item", "created_at"]
 
+class CartOperationSerializer(serializers.Serializer):
+    item_id = serializers.UUIDField()
+    op = serializers.ChoiceField(choices=CartItem.OPERATIONS, default=CartItem.ADD)
+    # add: unidades a somar (>= 1); set: quantidade final (0 tira a linha); remove: ignorada
+    quantity = serializers.IntegerField(min_value=0, default=1)
+
+    def validate(self, attrs):
+        if attrs["op"] == CartItem.ADD and attrs["quantity"] < 1:
+            raise serializers.ValidationError({"quantity": "Must be at least 1 for add"})
+        return attrs
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False)
+
+class CartOperationResultSerializer(serializers.Serializer):
+    item_id = serializers.UUIDField(read_only=True)
+    op = serializers.CharField(read_only=True)
+    # ok, not_found ou insufficient_stock
+    status = serializers.CharField(read_only=True)
+    # Quantidade com que a linha ficou (0 = fora do carrinho); null se a operação falhou
+    quantity = serializers.IntegerField(read_only=True, allow_null=True)
+
+class CartSummaryLineSerializer(serializers.Serializer):
+    # Detalhe do item tal como em ItemSerializer (vem já serializado da cache de itens)
+    item = serializers.DictField(read_only=True)
+    quantity = serializers.IntegerField(read_only=True)
+    line_total = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    # null, "out_of_stock" ou "insufficient_stock"
+    stock_warning = serializers.CharField(read_only=True, allow_null=True)
+
+class CartSummarySerializer(serializers.Serializer):
+    lines = CartSummaryLineSerializer(many=True, read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    has_stock_warnings = serializers.BooleanField(read_only=True)
+
+class FavoriteLookupSerializer(serializers.Serializer):
+    item_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+
 class CartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
@@ -41,15 +97,23 @@ class CartAddSerializer(serializers.Serializer):
 
 
 
+class PurchaseListSerializer(serializers.ModelSerializer):
+    """Linha do histórico de compras: sem a morada nem o comprovativo (ver GET store/purchases/<id>/)."""
+
+    class Meta:
+        model = Purchase
+        fields = ["id", "item", "quantity", "total_price", "status", "payment_method", "created_at"]
+
 class PurchaseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Purchase
-        read_only_fields = ["id", "total_price", "created_at"]
+        read_only_fields = ["id", "total_price", "status", "created_at"]
         fields = [
             "id",
             "item",
             "quantity",
             "total_price",
+            "status",
             "payment_method",
             "payment_proof",
             "first_name",
@@ -73,6 +137,7 @@ class PurchaseRequestSerializer(serializers.Serializer):
     quantity = serializers.IntegerField()
     payment_method = serializers.ChoiceField(choices=["MULTICAIXA_EXPESS", "ATM", "REFERENCE"])
     payment_proof = serializers.FileField(required=False)
+    payment_proof_upload = serializers.UUIDField(required=False)
     first_name = serializers.CharField()
     last_name = serializers.CharField()
     city = serializers.CharField()
@@ -80,4 +145,79 @@ class PurchaseRequestSerializer(serializers.Serializer):
     street_address = serializers.CharField()
     house_number = serializers.CharField()
     phone = serializers.CharField()
-    email = serializers.EmailField()
\ No newline at end of file
+    email = serializers.EmailField()
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderItem
+        fields = ["item", "quantity", "unit_price"]
+
+class OrderSerializer(serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "items",
+            "total_price",
+            "status",
+            "payment_method",
+            "payment_proof",
+            "first_name",
+            "last_name",
+            "city",
+            "country",
+            "street_address",
+            "house_number",
+            "phone",
+            "email",
+            "created_at",
+        ]
+
+class CheckoutRequestSerializer(serializers.Serializer):
+    payment_method = serializers.ChoiceField(choices=["MULTICAIXA_EXPESS", "ATM", "REFERENCE"])
+    payment_proof = serializers.FileField(required=False)
+    payment_proof_upload = serializers.UUIDField(required=False)
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    city = serializers.CharField(max_length=100)
+    country = serializers.CharField(max_length=100)
+    street_address = serializers.CharField(max_length=255)
+    house_number = serializers.CharField(max_length=30)
+    phone = serializers.CharField(max_length=50)
+    email = serializers.EmailField()
+
+class UploadCreateSerializer(serializers.Serializer):
+    purpose = serializers.ChoiceField(choices=Upload.PURPOSES)
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    content_type = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False)
+
+class UploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Upload
+        fields = ["id", "purpose", "filename", "content_type", "size", "received", "sha256", "status", "expires_at", "created_at"]
+
+
+class SalesRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SalesRollup
+        fields = ["period_start", "units", "revenue", "order_count"]
+
+class SalesSeriesSerializer(serializers.Serializer):
+    granularity = serializers.CharField(read_only=True)
+    since = serializers.DateTimeField(read_only=True)
+    until = serializers.DateTimeField(read_only=True)
+    units = serializers.IntegerField(read_only=True)
+    revenue = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    order_count = serializers.IntegerField(read_only=True)
+    results = SalesRollupSerializer(many=True, read_only=True)
+
+class TopSellerSerializer(serializers.Serializer):
+    # Id do item ou da categoria
+    id = serializers.UUIDField(source="key", read_only=True)
+    units = serializers.IntegerField(read_only=True)
+    revenue = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    order_count = serializers.IntegerField(read_only=True)
@@ -1,20 +1,145 @@
+import math
+import random
+import time
+import uuid
 from django.core.cache import cache
-from store.models import Item
+from django_redis import get_redis_connection
+from loguru import logger
+from store.infra.respository import item_read_queryset
 from store.serializers import ItemSerializer
+from store.helpers.metrics import CacheMetrics
+
+# Compare-and-delete atómico: entre um GET e um DEL separados o lock pode expirar e passar para outro worker,
+# e o DEL apagaria o lock dele
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
 
 class ProductCacheService:
     CACHE_KEY = "featured_products"
+    GENERATION_KEY = "featured_products:generation"
+    LOCK_KEY = "featured_products:lock"
+
+    TTL = 60 * 5            # tempo em que o valor é considerado fresco
+    STALE_TTL = 60 * 60     # tempo extra em que o valor antigo ainda pode ser servido enquanto alguém reconstrói
+    LOCK_TIMEOUT = 30       # se o worker que reconstrói morrer, o lock expira sozinho
+    WAIT_TIMEOUT = 2.0      # sem valor antigo, quanto tempo esperamos pelo worker que está a reconstruir
+    WAIT_INTERVAL = 0.05
+    BETA = 1.0              # > 1 antecipa mais as renovações, < 1 menos
+
+    metrics = CacheMetrics(CACHE_KEY)
 
     @staticmethod
     def get_featured_products():
-        products = cache.get(ProductCacheService.CACHE_KEY)
+        """
+        Leitura com recomputação single-flight:
+        - só o worker que obtém o lock no Redis (SET NX) consulta o banco;
+        - os outros continuam a receber o valor antigo enquanto ele reconstrói;
+        - perto de expirar, o valor é renovado mais cedo de forma probabilística (XFetch),
+          para que as chaves quentes quase nunca cheguem a expirar.
+        """
+        values = cache.get_many([ProductCacheService.CACHE_KEY, ProductCacheService.GENERATION_KEY])
+        entry = values.get(ProductCacheService.CACHE_KEY)
+        generation = values.get(ProductCacheService.GENERATION_KEY)
+
+        if entry is not None:
+            if not ProductCacheService._needs_refresh(entry, generation):
+                ProductCacheService.metrics.incr("hit")
+                return entry["value"]
+
+            products = ProductCacheService._rebuild_if_leader(generation)
+            if products is not None:
+                return products
+
+            ProductCacheService.metrics.incr("stale")
+            return entry["value"]
+
+        ProductCacheService.metrics.incr("miss")
+
+        products = ProductCacheService._rebuild_if_leader(generation)
+        if products is not None:
+            return products
+
+        # Cache vazio e outro worker já está a reconstruir: esperamos um pouco pelo resultado dele
+        deadline = time.monotonic() + ProductCacheService.WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(ProductCacheService.WAIT_INTERVAL)
+            entry = cache.get(ProductCacheService.CACHE_KEY)
+            if entry is not None:
+                return entry["value"]
+
+        # O líder demorou demais (ou morreu); calculamos sem guardar para não bloquear o pedido
+        return ProductCacheService._compute()
+
+    @staticmethod
+    def invalidate():
+        """
+        Marca o valor atual como desatualizado sem o apagar: o próximo leitor reconstrói
+        e os restantes continuam a ser servidos com o valor antigo até lá.
+        """
+        cache.set(ProductCacheService.GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+        ProductCacheService.metrics.incr("invalidate")
+
+    @staticmethod
+    def _needs_refresh(entry, generation) -> bool:
+        if entry.get("generation") != generation:
+            return True
+
+        # XFetch: quanto mais perto de expirar e mais cara a reconstrução, maior a probabilidade de renovar já
+        jitter = entry["delta"] * ProductCacheService.BETA * -math.log(1.0 - random.random())
+        return time.time() + jitter >= entry["expires_at"]
+
+    @staticmethod
+    def _rebuild_if_leader(generation):
+        token = uuid.uuid4().hex
+        if not cache.add(ProductCacheService.LOCK_KEY, token, timeout=ProductCacheService.LOCK_TIMEOUT):
+            return None
+
+        try:
+            started = time.time()
+            products = ProductCacheService._compute()
+            delta = time.time() - started
+
+            entry = {
+                "value": products,
+                "generation": generation,
+                "delta": delta,
+                "expires_at": time.time() + ProductCacheService.TTL,
+            }
+            cache.set(ProductCacheService.CACHE_KEY, entry, timeout=ProductCacheService.TTL + ProductCacheService.STALE_TTL)
+            ProductCacheService.metrics.incr("rebuild")
+            return products
+        finally:
+            ProductCacheService._release_lock(token)
+
+    @staticmethod
+    def _release_lock(token):
+        # Só liberta o lock se ainda for nosso (pode ter expirado e passado para outro worker)
+        try:
+            try:
+                client = get_redis_connection("default")
+            except NotImplementedError:
+                # Backend de cache sem Redis (ex.: LocMem nos testes): é local ao processo, basta comparar e apagar
+                if cache.get(ProductCacheService.LOCK_KEY) == token:
+                    cache.delete(ProductCacheService.LOCK_KEY)
+                return
+            # A chave e o valor têm de ir como o django-redis os grava (prefixo/versão e serializer)
+            client.eval(
+                RELEASE_LOCK_SCRIPT,
+                1,
+                cache.client.make_key(ProductCacheService.LOCK_KEY),
+                cache.client.encode(token),
+            )
+        except Exception as e:
+            # O lock expira sozinho em LOCK_TIMEOUT; não vale a pena perder o valor já reconstruído por isto
+            logger.warning("Featured products lock not released: {}", e)
+
+    @staticmethod
+    def _compute():
         # Assim, estou garantindo que o cache armazene JSON (serializável) — e evita problemas de pickle com o ORM
-        if products is None:
-            print("Cache miss: fetching from DB")
-            queryset = Item.objects.all()
-            serializer = ItemSerializer(queryset, many=True)
-            products = serializer.data
-            cache.set(ProductCacheService.CACHE_KEY, products, timeout=60*5)
-        else: print("Cache hit: fetching from cache")
-        
-        return products
+        queryset = item_read_queryset().order_by("created_at", "id")
+        serializer = ItemSerializer(queryset, many=True)
+        return serializer.data
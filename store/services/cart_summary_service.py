@@ -0,0 +1,136 @@
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Any, Dict, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from store.infra.respository import StoreRepository
+from store.services.item_cache_service import ItemCacheService, item_cache_service
+
+OUT_OF_STOCK = "out_of_stock"
+INSUFFICIENT_STOCK = "insufficient_stock"
+
+
+class CartSummaryService:
+    """
+    Resumo do carrinho: cada linha com o item, a quantidade e o total da linha, o total do carrinho,
+    o número de unidades e avisos de stock.
+
+    As linhas de cada utilizador (item -> quantidade) ficam no Redis e são atualizadas em cada
+    add_to_cart/remove_from_cart, sem voltar a ler o carrinho. Preço, nome e stock vêm da cache de
+    detalhes dos itens, que já é invalidada quando o preço ou o stock mudam: uma alteração de preço
+    chega a todos os carrinhos sem ter de os percorrer. Num pedido com as duas caches quentes o resumo
+    não faz nenhuma query.
+    """
+    PREFIX = "cart_summary:"
+
+    def __init__(self, store_repository: Optional[StoreRepository] = None, item_cache: Optional[ItemCacheService] = None):
+        self.store_repository = store_repository or StoreRepository()
+        self.item_cache = item_cache or item_cache_service
+
+    def get(self, user) -> Dict[str, Any]:
+        lines = self._lines(user)
+        items = self.item_cache.get_many(lines.keys())
+
+        summary_lines, total, item_count, warnings = [], Decimal("0"), 0, 0
+        for item_id, quantity in lines.items():
+            item = items.get(item_id)
+            if item is None:
+                # Item apagado entretanto (a linha do carrinho foi apagada com ele)
+                continue
+
+            line_total = Decimal(item["price"]) * quantity
+            warning = None
+            if item["stock"] < 1:
+                warning = OUT_OF_STOCK
+            elif item["stock"] < quantity:
+                warning = INSUFFICIENT_STOCK
+
+            summary_lines.append({"item": item, "quantity": quantity, "line_total": line_total, "stock_warning": warning})
+            total += line_total
+            item_count += quantity
+            warnings += warning is not None
+
+        return {"lines": summary_lines, "item_count": item_count, "total": total, "has_stock_warnings": warnings > 0}
+
+    def line_changed(self, user_id, item_id, quantity: int) -> None:
+        """
+        Aplica ao resumo em cache a quantidade que ficou no banco (0 = linha removida), depois do commit.
+        Só aumentos de quantidade chegam aqui por add_to_cart, por isso duas adições simultâneas que
+        apliquem os resultados fora de ordem ficam com a maior, que é a do banco.
+        """
+        self.lines_changed(user_id, {item_id: quantity})
+
+    def lines_changed(self, user_id, quantities: Dict[Any, int], exact: bool = False) -> None:
+        """Várias linhas de uma vez; com `exact` a quantidade substitui a da cache mesmo que seja menor."""
+        changes = {str(item_id): quantity for item_id, quantity in quantities.items()}
+        if changes:
+            transaction.on_commit(lambda: self._apply(str(user_id), changes, exact))
+
+    def invalidate(self, user_id) -> None:
+        transaction.on_commit(lambda: self._delete(str(user_id)))
+
+    def _delete(self, user_id: str) -> None:
+        # Com o lock: uma reconstrução que leu o carrinho antes do commit não volta a gravar as linhas antigas
+        with self._lock(user_id):
+            cache.delete(self._key(user_id))
+
+    def _apply(self, user_id: str, changes: Dict[str, int], exact: bool) -> None:
+        with self._lock(user_id) as locked:
+            if not locked:
+                cache.delete(self._key(user_id))
+                return
+
+            lines = cache.get(self._key(user_id))
+            if lines is None:
+                # Sem resumo em cache: a próxima leitura reconstrói a partir do banco
+                return
+            for item_id, quantity in changes.items():
+                if quantity > 0:
+                    lines[item_id] = quantity if exact else max(quantity, lines.get(item_id, 0))
+                else:
+                    lines.pop(item_id, None)
+            cache.set(self._key(user_id), lines, timeout=self._ttl())
+
+    def _lines(self, user) -> Dict[str, int]:
+        user_id = str(getattr(user, "pk", user))
+        lines = cache.get(self._key(user_id))
+        if lines is not None:
+            return lines
+
+        # A reconstrução segura o lock: uma atualização que chegue entretanto é aplicada depois dela.
+        # Se o lock estiver ocupado, a leitura não espera e o resultado não vai para a cache
+        with self._lock(user_id, wait=False) as locked:
+            lines = {
+                str(item_id): quantity
+                for item_id, quantity in self.store_repository.list_cart_quantities(user)
+            }
+            if locked:
+                cache.set(self._key(user_id), lines, timeout=self._ttl())
+        return lines
+
+    @contextmanager
+    def _lock(self, user_id: str, wait: bool = True):
+        key = f"{self.PREFIX}{user_id}:lock"
+        timeout = getattr(settings, "CART_SUMMARY_LOCK_TIMEOUT", 2)
+        deadline = time.monotonic() + (timeout if wait else 0)
+        locked = cache.add(key, 1, timeout=timeout)
+        while not locked and time.monotonic() < deadline:
+            time.sleep(0.01)
+            locked = cache.add(key, 1, timeout=timeout)
+        try:
+            yield locked
+        finally:
+            if locked:
+                cache.delete(key)
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.PREFIX}{user_id}"
+
+    @staticmethod
+    def _ttl() -> int:
+        return getattr(settings, "CART_SUMMARY_TTL", 60 * 60)
+
+
+cart_summary_service = CartSummaryService()
@@ -0,0 +1,55 @@
+import hashlib
+import uuid
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class CatalogCacheService:
+    """
+    Cache das respostas JSON já renderizadas dos endpoints públicos do catálogo.
+
+    As entradas ficam sob a versão atual do catálogo; escrever no catálogo troca a versão,
+    o que torna todas as respostas (e ETags) antigas inválidas de uma vez. A versão muda com os
+    signals de Item e Category (qualquer save/delete, incluindo o admin) e com cada alteração de
+    stock feita por UPDATE; quem escreve itens por queryset tem de chamar bump().
+    """
+    VERSION_KEY = "catalog:version"
+
+    @staticmethod
+    def version() -> str:
+        version = cache.get(CatalogCacheService.VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(CatalogCacheService.VERSION_KEY, version, timeout=None):
+                version = cache.get(CatalogCacheService.VERSION_KEY, version)
+        return version
+
+    @staticmethod
+    def bump() -> None:
+        """Avança a versão do catálogo depois do commit da escrita."""
+        transaction.on_commit(
+            lambda: cache.set(CatalogCacheService.VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        )
+
+    @staticmethod
+    def etag(version: str, key: str) -> str:
+        # A mesma versão e o mesmo pedido produzem sempre os mesmos bytes, por isso o ETag é forte
+        return '"%s"' % hashlib.sha1(f"{version}:{key}".encode()).hexdigest()
+
+    @staticmethod
+    def get_response(version: str, key: str) -> Optional[bytes]:
+        return cache.get(CatalogCacheService._response_key(version, key))
+
+    @staticmethod
+    def set_response(version: str, key: str, content: bytes) -> None:
+        cache.set(
+            CatalogCacheService._response_key(version, key),
+            content,
+            timeout=getattr(settings, "CATALOG_RESPONSE_CACHE_TTL", 300),
+        )
+
+    @staticmethod
+    def _response_key(version: str, key: str) -> str:
+        return "catalog:response:%s:%s" % (version, hashlib.sha1(key.encode()).hexdigest())
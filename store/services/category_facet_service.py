@@ -0,0 +1,130 @@
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from store.models import Category, CategoryFacet, Item
+
+
+class FacetState(NamedTuple):
+    """O que um item conta nas facetas da sua categoria."""
+    category_id: Optional[str]
+    price: Decimal
+    stock: int
+
+
+class CategoryFacetService:
+    """
+    Mantém a tabela CategoryFacet a partir das alterações de cada item.
+
+    As contagens são ajustadas com deltas; o preço mínimo/máximo só é recalculado (com um agregado
+    limitado à categoria) quando sai da categoria o item que estava num dos extremos.
+    """
+
+    @staticmethod
+    def state(values: Optional[Mapping[str, Any]]) -> Optional[FacetState]:
+        """
+        Estado a partir de um dict de colunas (item.__dict__, valores lidos do banco ou .values()).
+        Devolve None se faltar alguma coluna, para não disparar queries em campos adiados (.only()).
+        """
+        if not values or "category_id" not in values or "price" not in values or "stock" not in values:
+            return None
+        return FacetState(values["category_id"], Decimal(str(values["price"])), int(values["stock"]))
+
+    @staticmethod
+    def item_changed(old: Optional[FacetState], new: Optional[FacetState]) -> None:
+        """Aplica a passagem de `old` para `new` (None = o item não existia / deixou de existir)."""
+        if old == new:
+            return
+
+        if old is not None and new is not None and old[:2] == new[:2]:
+            # Só o stock mudou (o caso das compras): a faceta só muda se o item entrou ou saiu de stock
+            in_stock = int(new.stock > 0) - int(old.stock > 0)
+            if in_stock and new.category_id is not None:
+                with transaction.atomic():
+                    CategoryFacetService._apply(new.category_id, items=0, in_stock=in_stock, added=[], removed=[])
+            return
+
+        changes: Dict[str, dict] = defaultdict(lambda: {"items": 0, "in_stock": 0, "added": [], "removed": []})
+
+        if old is not None and old.category_id is not None:
+            change = changes[old.category_id]
+            change["items"] -= 1
+            change["in_stock"] -= int(old.stock > 0)
+            change["removed"].append(old.price)
+
+        if new is not None and new.category_id is not None:
+            change = changes[new.category_id]
+            change["items"] += 1
+            change["in_stock"] += int(new.stock > 0)
+            change["added"].append(new.price)
+
+        with transaction.atomic():
+            for category_id, change in changes.items():
+                CategoryFacetService._apply(category_id, **change)
+
+    @staticmethod
+    def rebuild(category_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Recalcula as facetas a partir dos itens (todas, ou só as categorias indicadas).
+        Usado no backfill, depois de importações em massa e para reparar divergências.
+        """
+        categories = Category.objects.all()
+        if category_ids is not None:
+            categories = categories.filter(id__in=list(category_ids))
+        ids = list(categories.values_list("id", flat=True))
+
+        aggregates = {
+            row["category_id"]: row
+            for row in Item.objects.filter(category_id__in=ids)
+            .values("category_id")
+            .annotate(
+                item_count=Count("id"),
+                in_stock_count=Count("id", filter=Q(stock__gt=0)),
+                min_price=Min("price"),
+                max_price=Max("price"),
+            )
+        }
+
+        with transaction.atomic():
+            for category_id in ids:
+                row = aggregates.get(category_id, {})
+                CategoryFacet.objects.update_or_create(
+                    category_id=category_id,
+                    defaults={
+                        "item_count": row.get("item_count", 0),
+                        "in_stock_count": row.get("in_stock_count", 0),
+                        "min_price": row.get("min_price"),
+                        "max_price": row.get("max_price"),
+                    },
+                )
+        return len(ids)
+
+    @staticmethod
+    def list_facets() -> List[CategoryFacet]:
+        """Facetas de todas as categorias, lidas da tabela agregada (uma query, O(categorias))."""
+        return list(CategoryFacet.objects.select_related("category").order_by("category__name"))
+
+    @staticmethod
+    def _apply(category_id, items: int, in_stock: int, added: List[Decimal], removed: List[Decimal]) -> None:
+        facet = CategoryFacet.objects.select_for_update().filter(category_id=category_id).first()
+        if facet is None:
+            # Ainda sem linha (categoria antiga ou tabela por preencher): calculamos do zero
+            CategoryFacetService.rebuild([category_id])
+            return
+
+        facet.item_count = max(facet.item_count + items, 0)
+        facet.in_stock_count = max(facet.in_stock_count + in_stock, 0)
+
+        boundary_removed = any(price in (facet.min_price, facet.max_price) for price in removed)
+
+        if facet.item_count == 0:
+            facet.min_price = facet.max_price = None
+        elif boundary_removed:
+            bounds = Item.objects.filter(category_id=category_id).aggregate(min_price=Min("price"), max_price=Max("price"))
+            facet.min_price, facet.max_price = bounds["min_price"], bounds["max_price"]
+        elif added:
+            facet.min_price = min([p for p in (facet.min_price, *added) if p is not None])
+            facet.max_price = max([p for p in (facet.max_price, *added) if p is not None])
+
+        facet.save(update_fields=["item_count", "in_stock_count", "min_price", "max_price", "updated_at"])
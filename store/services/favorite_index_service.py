@@ -0,0 +1,149 @@
+from typing import Any, Dict, Iterable, List, Optional
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from loguru import logger
+from redis.exceptions import WatchError
+from store.infra.respository import StoreRepository
+
+_UNSET = object()
+
+
+class FavoriteIndexService:
+    """
+    Índice dos favoritos no Redis: um set por utilizador (favorites:<user_id>) com os ids dos itens.
+
+    Responde a "quais destes itens são favoritos?" para uma grelha inteira com um único SMISMEMBER.
+    O set leva um membro marcador (READY): sem ele o set não existe ou ficou incompleto, e a leitura
+    reconstrói-o a partir da tabela Favorite. As escritas no banco atualizam o set depois do commit;
+    a reconstrução usa WATCH, por isso uma escrita que chegue a meio não é apagada por dados antigos.
+    Um SREM num set que ainda não existe não toca na chave e o WATCH não o veria; por isso cada remoção
+    incrementa também um contador (favorites:<user_id>:removals), que a reconstrução vigia com o set.
+    Se uma atualização falhar, o set é apagado para ser reconstruído; o TTL curto limita o tempo em que um
+    set pode ficar errado se nem isso for possível. Sem Redis (LocMem nos testes e em desenvolvimento) ou com
+    o Redis em baixo, responde o banco.
+    """
+    PREFIX = "favorites:"
+    READY = "*"
+
+    def __init__(self, store_repository: Optional[StoreRepository] = None, client=_UNSET):
+        self.store_repository = store_repository or StoreRepository()
+        self._redis = client
+
+    @property
+    def enabled(self) -> bool:
+        return self._client() is not None
+
+    def lookup(self, user, item_ids: Iterable[Any]) -> Dict[str, bool]:
+        """{item_id: favorito?} para cada id pedido."""
+        ids = list(dict.fromkeys(str(item_id) for item_id in item_ids))
+        if not ids:
+            return {}
+
+        client = self._client()
+        if client is not None:
+            key = self._key(getattr(user, "pk", user))
+            try:
+                ready, *flags = client.smismember(key, [self.READY, *ids])
+                if ready:
+                    return {item_id: bool(flag) for item_id, flag in zip(ids, flags)}
+
+                favorites = self.rebuild(user)
+                return {item_id: item_id in favorites for item_id in ids}
+            except Exception as e:
+                logger.warning("Favorite index unavailable, using the database: {}", e)
+
+        favorites = {str(item_id) for item_id in self.store_repository.filter_favorite_item_ids(user, ids)}
+        return {item_id: item_id in favorites for item_id in ids}
+
+    def added(self, user_id, item_id) -> None:
+        transaction.on_commit(lambda: self._apply("sadd", user_id, item_id))
+
+    def removed(self, user_id, item_id) -> None:
+        transaction.on_commit(lambda: self._apply("srem", user_id, item_id))
+
+    def rebuild(self, user) -> set:
+        """
+        Volta a preencher o set de um utilizador a partir da tabela e devolve os ids favoritos.
+        Se o set mudar entre a leitura do banco e a escrita (WATCH), fica o que lá está.
+        """
+        client = self._client()
+        if client is None:
+            return {str(item_id) for item_id in self.store_repository.list_favorite_item_ids(user)}
+
+        key = self._key(getattr(user, "pk", user))
+        with client.pipeline() as pipe:
+            pipe.watch(key, self._removals_key(getattr(user, "pk", user)))
+            favorites = {str(item_id) for item_id in self.store_repository.list_favorite_item_ids(user)}
+            pipe.multi()
+            pipe.delete(key)
+            pipe.sadd(key, self.READY, *favorites)
+            pipe.expire(key, self._ttl())
+            try:
+                pipe.execute()
+            except WatchError:
+                logger.debug("Favorite index of user {} changed while rebuilding", getattr(user, "pk", user))
+        return favorites
+
+    def rebuild_all(self, chunk_size: int = 1000) -> int:
+        """Apaga todos os sets e reconstrói os dos utilizadores com favoritos. Devolve quantos foram reconstruídos."""
+        client = self._client()
+        if client is None:
+            return 0
+
+        stale: List[bytes] = []
+        for key in client.scan_iter(match=f"{self.PREFIX}*", count=chunk_size):
+            stale.append(key)
+            if len(stale) >= chunk_size:
+                client.delete(*stale)
+                stale = []
+        if stale:
+            client.delete(*stale)
+
+        rebuilt = 0
+        for user_id in self.store_repository.iter_favorite_user_ids(chunk_size=chunk_size):
+            self.rebuild(user_id)
+            rebuilt += 1
+        return rebuilt
+
+    def _apply(self, command: str, user_id, item_id) -> None:
+        client = self._client()
+        if client is None:
+            return
+        try:
+            # Num set ainda sem READY o SADD não o torna completo: a próxima leitura reconstrói
+            getattr(client, command)(self._key(user_id), str(item_id))
+            if command == "srem":
+                # Muda sempre, mesmo sem set: uma reconstrução a meio falha o WATCH e não grava o favorito removido
+                removals = self._removals_key(user_id)
+                client.incr(removals)
+                client.expire(removals, self._ttl())
+        except Exception as e:
+            logger.warning("Favorite index of user {} not updated: {}", user_id, e)
+            # Sem o set (e o READY) a próxima leitura reconstrói-o em vez de responder com ele desatualizado
+            try:
+                client.delete(self._key(user_id))
+            except Exception as e:
+                logger.warning("Favorite index of user {} not dropped: {}", user_id, e)
+
+    def _client(self):
+        if self._redis is _UNSET:
+            try:
+                self._redis = get_redis_connection("default")
+            except NotImplementedError:
+                # Backend de cache sem Redis: o índice fica desligado
+                self._redis = None
+        return self._redis
+
+    def _key(self, user_id) -> str:
+        return f"{self.PREFIX}{user_id}"
+
+    def _removals_key(self, user_id) -> str:
+        return f"{self.PREFIX}{user_id}:removals"
+
+    @staticmethod
+    def _ttl() -> int:
+        return getattr(settings, "FAVORITE_INDEX_TTL", 60 * 60)
+
+
+favorite_index_service = FavoriteIndexService()
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from loguru import logger
+from rest_framework.utils.encoders import JSONEncoder
+from store.helpers.errors.error import ConflictError, ValidationError
+from store.models import IdempotencyRecord
+
+PENDING = IdempotencyRecord.PENDING
+DONE = IdempotencyRecord.DONE
+
+
+class CacheIdempotencyStore:
+    """Registos no Redis: claim com SET NX (cache.add) e resposta final com TTL."""
+    PREFIX = "idempotency:"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return cache.get(self.PREFIX + key)
+
+    def claim(self, key: str, fingerprint: str, timeout: int) -> bool:
+        return cache.add(self.PREFIX + key, {"state": PENDING, "fingerprint": fingerprint}, timeout=timeout)
+
+    def complete(self, key: str, record: Dict[str, Any], ttl: int) -> None:
+        cache.set(self.PREFIX + key, record, timeout=ttl)
+
+    def release(self, key: str) -> None:
+        cache.delete(self.PREFIX + key)
+
+
+class DatabaseIdempotencyStore:
+    """Os mesmos registos na tabela IdempotencyRecord, para quando o Redis está em baixo."""
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        record = IdempotencyRecord.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+        if record is None:
+            return None
+        return {
+            "state": record.state,
+            "fingerprint": record.fingerprint,
+            "status": record.status_code,
+            "body": record.response_body,
+        }
+
+    def claim(self, key: str, fingerprint: str, timeout: int) -> bool:
+        now = timezone.now()
+        # Um claim expirado (worker que morreu) ou uma resposta fora do prazo deixam de contar
+        IdempotencyRecord.objects.filter(key=key, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    key=key, fingerprint=fingerprint, state=PENDING, expires_at=now + timedelta(seconds=timeout)
+                )
+            return True
+        except IntegrityError:
+            return False
+
+    def complete(self, key: str, record: Dict[str, Any], ttl: int) -> None:
+        # Cria o registo se o claim foi feito no Redis e só a resposta final veio parar aqui
+        IdempotencyRecord.objects.update_or_create(
+            key=key,
+            defaults={
+                "fingerprint": record["fingerprint"],
+                "state": DONE,
+                "status_code": record["status"],
+                "response_body": record["body"],
+                "expires_at": timezone.now() + timedelta(seconds=ttl),
+            },
+        )
+
+    def release(self, key: str) -> None:
+        IdempotencyRecord.objects.filter(key=key, state=PENDING).delete()
+
+
+class IdempotencyService:
+    """
+    Execução única de pedidos com Idempotency-Key.
+
+    O primeiro pedido com uma chave executa e a resposta fica guardada (IDEMPOTENCY_TTL); as repetições
+    recebem essa resposta com uma única leitura. Um duplicado que chega enquanto o primeiro ainda corre
+    espera pelo resultado em vez de executar outra vez. Se o pedido falhar com exceção ou 5xx, a chave é
+    libertada para que o cliente possa tentar de novo.
+
+    Se o Redis falhar depois de o pedido ter executado, a resposta vai para a tabela IdempotencyRecord e o
+    cliente recebe-a na mesma: a escrita já foi feita e um 500 levava-o a repeti-la. Por isso uma chave que
+    não está no Redis ainda é procurada na tabela antes de executar.
+    """
+
+    def __init__(self, primary=None, fallback=None):
+        self.primary = primary or CacheIdempotencyStore()
+        self.fallback = fallback or DatabaseIdempotencyStore()
+
+    @staticmethod
+    def scoped_key(user_id, method: str, path: str, key: str) -> str:
+        # A mesma chave enviada por utilizadores ou endpoints diferentes não colide
+        return hashlib.sha256(f"{user_id}:{method}:{path}:{key}".encode()).hexdigest()
+
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def run(self, key: str, fingerprint: str, execute: Callable[[], Tuple[int, Any]]) -> Tuple[int, Any, bool]:
+        """Devolve (status, dados, replayed)."""
+        store, record = self._lookup(key)
+        lock_timeout = getattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT", 60)
+        deadline = time.monotonic() + getattr(settings, "IDEMPOTENCY_WAIT_TIMEOUT", 10)
+
+        while True:
+            if record is None:
+                store, claimed = self._claim(store, key, fingerprint, lock_timeout)
+                if claimed:
+                    break
+
+            if record is not None:
+                if record["fingerprint"] != fingerprint:
+                    raise ValidationError(
+                        safe_message="Idempotency-Key was already used with a different request",
+                        code="idempotency_key_reused",
+                    )
+                if record["state"] == DONE:
+                    return record["status"], json.loads(record["body"]), True
+
+            if time.monotonic() >= deadline:
+                raise ConflictError(
+                    safe_message="A request with this Idempotency-Key is still being processed",
+                    code="idempotency_in_progress",
+                )
+            time.sleep(getattr(settings, "IDEMPOTENCY_WAIT_INTERVAL", 0.05))
+            record = store.get(key)
+
+        try:
+            status_code, data = execute()
+        except BaseException:
+            self._release(store, key)
+            raise
+
+        if status_code >= 500:
+            self._release(store, key)
+        else:
+            self._complete(
+                store,
+                key,
+                {"state": DONE, "fingerprint": fingerprint, "status": status_code, "body": json.dumps(data, cls=JSONEncoder)},
+            )
+        return status_code, data, False
+
+    def _lookup(self, key: str):
+        try:
+            record = self.primary.get(key)
+        except Exception as e:
+            logger.warning("Idempotency cache unavailable, using the database: {}", e)
+            return self.fallback, self.fallback.get(key)
+
+        if record is None:
+            # Resposta gravada na tabela porque o Redis falhou a meio de um pedido anterior
+            record = self.fallback.get(key)
+            if record is not None:
+                return self.fallback, record
+        return self.primary, record
+
+    def _claim(self, store, key: str, fingerprint: str, timeout: int):
+        try:
+            return store, store.claim(key, fingerprint, timeout)
+        except Exception as e:
+            if store is self.fallback:
+                raise
+            logger.warning("Idempotency cache unavailable, using the database: {}", e)
+            return self.fallback, self.fallback.claim(key, fingerprint, timeout)
+
+    def _complete(self, store, key: str, record: Dict[str, Any]) -> None:
+        ttl = getattr(settings, "IDEMPOTENCY_TTL", 60 * 60 * 24)
+        try:
+            store.complete(key, record, ttl)
+            return
+        except Exception as e:
+            if store is self.fallback:
+                logger.exception("Idempotency record {} not saved", key)
+                return
+            logger.warning("Idempotency cache unavailable, saving the response in the database: {}", e)
+
+        try:
+            self.fallback.complete(key, record, ttl)
+        except Exception:
+            # A escrita do pedido já está feita: o cliente recebe a resposta na mesma
+            logger.exception("Idempotency record {} not saved", key)
+
+    @staticmethod
+    def _release(store, key: str) -> None:
+        try:
+            store.release(key)
+        except Exception as e:
+            # O claim expira sozinho em IDEMPOTENCY_LOCK_TIMEOUT
+            logger.warning("Idempotency key {} not released: {}", key, e)
+
+
+idempotency_service = IdempotencyService()
@@ -0,0 +1,110 @@
+import hashlib
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from loguru import logger
+from store.helpers.image_variants import VARIANTS, render_variants
+from store.infra.respository import StoreRepository
+from store.services.cache_service import ProductCacheService
+from store.services.catalog_cache_service import CatalogCacheService
+from store.services.item_cache_service import ItemCacheService, item_cache_service
+
+
+class ImageVariantService:
+    """
+    Variantes das imagens dos itens (miniatura e tamanho médio, em JPEG e WebP).
+
+    Corre fora dos pedidos HTTP (comando generate_image_variants): apanha os itens com imagem e
+    image_variants a None, gera as variantes num pool de processos e grava os caminhos no item.
+    As variantes ficam em items/variants/<sha256 da imagem>/, por isso a mesma imagem enviada outra
+    vez (ou usada por vários itens) não volta a ser processada.
+    """
+
+    def __init__(
+        self,
+        store_repository: Optional[StoreRepository] = None,
+        executor: Optional[Executor] = None,
+        item_cache: Optional[ItemCacheService] = None,
+    ):
+        self.store_repository = store_repository or StoreRepository()
+        # Sem executor, as imagens são processadas no próprio processo (testes, lotes pequenos)
+        self.executor = executor
+        self.item_cache = item_cache or item_cache_service
+
+    @staticmethod
+    def variant_paths(sha256: str) -> Dict[str, str]:
+        return {name: f"items/variants/{sha256}/{name}.{extension}" for name, _, _, extension in VARIANTS}
+
+    def process_pending(self, limit: int = 50) -> int:
+        """Gera as variantes de até `limit` itens. Devolve quantos itens foram tratados."""
+        pending = self.store_repository.list_items_missing_variants(limit)
+        if not pending:
+            return 0
+
+        jobs: List[Tuple[Any, str, Optional[Dict[str, str]], Any]] = []
+        for item_id, image_name in pending:
+            try:
+                with default_storage.open(image_name, "rb") as source:
+                    data = source.read()
+            except OSError as e:
+                logger.warning("Image {} of item {} could not be read: {}", image_name, item_id, e)
+                jobs.append((item_id, image_name, {}, None))
+                continue
+
+            paths = self.variant_paths(hashlib.sha256(data).hexdigest())
+            if all(default_storage.exists(path) for path in paths.values()):
+                jobs.append((item_id, image_name, paths, None))
+            else:
+                jobs.append((item_id, image_name, paths, self._render(data)))
+
+        updated = []
+        for item_id, image_name, paths, rendering in jobs:
+            variants = self._store(item_id, paths, rendering) if rendering is not None else paths
+            if self.store_repository.set_image_variants(item_id, image_name, variants):
+                updated.append(item_id)
+
+        if updated:
+            # UPDATE em queryset não dispara os signals de Item
+            transaction.on_commit(lambda: self.item_cache.invalidate(updated))
+            transaction.on_commit(ProductCacheService.invalidate)
+            CatalogCacheService.bump()
+            logger.info("Image variants generated for {} items", len(updated))
+        return len(pending)
+
+    def _render(self, data: bytes):
+        if self.executor is None:
+            try:
+                return _Done(render_variants(data))
+            except Exception as e:
+                return _Done(error=e)
+        return self.executor.submit(render_variants, data)
+
+    def _store(self, item_id, paths: Dict[str, str], rendering) -> Dict[str, str]:
+        try:
+            rendered = rendering.result()
+        except Exception as e:
+            logger.warning("Image variants of item {} could not be generated: {}", item_id, e)
+            return {}
+
+        for name, path in paths.items():
+            if default_storage.exists(path):
+                continue
+            saved = default_storage.save(path, ContentFile(rendered[name]))
+            if saved != path:
+                # Outro worker gravou a mesma variante entretanto; ficamos com a dele
+                default_storage.delete(saved)
+        return paths
+
+
+class _Done:
+    """Resultado já calculado com a mesma interface de um Future."""
+
+    def __init__(self, value=None, error: Optional[BaseException] = None):
+        self.value, self.error = value, error
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
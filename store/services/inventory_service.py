@@ -0,0 +1,137 @@
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from loguru import logger
+from store.infra.respository import StoreRepository
+from store.models import StockReservation
+from store.services.cache_service import ProductCacheService
+from store.services.catalog_cache_service import CatalogCacheService
+from store.services.category_facet_service import CategoryFacetService, FacetState
+from store.services.item_cache_service import ItemCacheService, item_cache_service
+
+
+class InventoryService:
+    """
+    Reservas de stock.
+
+    Reservar retira as unidades de Item.stock com um UPDATE condicional (stock >= n) numa transação curta,
+    e grava a reserva com prazo. O lock da linha do item só dura essa transação, por isso compradores
+    do mesmo item não ficam à espera uns dos outros enquanto o pagamento decorre. No fim, a reserva
+    é consumida (compra feita) ou libertada (pagamento falhou, ou expirou e o sweeper devolveu o stock).
+    """
+
+    def __init__(self, store_repository: Optional[StoreRepository] = None, item_cache: Optional[ItemCacheService] = None):
+        self.store_repository = store_repository or StoreRepository()
+        self.item_cache = item_cache or item_cache_service
+
+    def reserve(self, user, item_id, quantity: int, ttl: Optional[int] = None, payment=None) -> StockReservation:
+        if quantity < 1:
+            raise ValueError("Quantity must be at least 1")
+
+        ttl = ttl if ttl is not None else getattr(settings, "STOCK_RESERVATION_TTL", 900)
+
+        with transaction.atomic():
+            row = self.store_repository.decrement_stock(item_id, quantity)
+            if row is None:
+                raise ValueError("Not enough stock")
+
+            reservation = self.store_repository.create_reservation(StockReservation(
+                user=user,
+                item_id=item_id,
+                quantity=quantity,
+                payment=payment,
+                expires_at=timezone.now() + timedelta(seconds=ttl),
+            ))
+            self._stock_changed(item_id, row, -quantity)
+
+        return reservation
+
+    def reserve_many(self, user, quantities: Dict[Any, int], ttl: Optional[int] = None, payment=None) -> List[StockReservation]:
+        """Reserva vários itens de uma vez (tudo ou nada): um UPDATE condicional e um INSERT em lote."""
+        if not quantities or any(quantity < 1 for quantity in quantities.values()):
+            raise ValueError("Quantity must be at least 1")
+
+        ttl = ttl if ttl is not None else getattr(settings, "STOCK_RESERVATION_TTL", 900)
+        expires_at = timezone.now() + timedelta(seconds=ttl)
+
+        with transaction.atomic():
+            rows = self.store_repository.decrement_stock_many(quantities)
+            if rows is None:
+                raise ValueError("Not enough stock")
+
+            reservations = self.store_repository.create_reservations([
+                StockReservation(user=user, item_id=item_id, quantity=quantity, payment=payment, expires_at=expires_at)
+                for item_id, quantity in quantities.items()
+            ])
+            for item_id, stock, category_id, price in rows:
+                self._stock_changed(item_id, (stock, category_id, price), -quantities[item_id])
+
+        return reservations
+
+    def commit(self, reservation: StockReservation) -> None:
+        """Marca a reserva como usada. Falha se entretanto expirou e o stock já foi devolvido."""
+        if not self.store_repository.consume_reservation(reservation.id):
+            raise ValueError("Reservation expired")
+
+    def commit_many(self, reservations: List[StockReservation]) -> None:
+        """Consome todas as reservas; tem de correr na transação da encomenda para ser desfeito se alguma expirou."""
+        if self.store_repository.consume_reservations([r.id for r in reservations]) != len(reservations):
+            raise ValueError("Reservation expired")
+
+    def release_many(self, reservations: List[StockReservation]) -> int:
+        with transaction.atomic():
+            active = self.store_repository.lock_active_reservations([r.id for r in reservations])
+            if active:
+                self.store_repository.mark_reservations_released([r.id for r in active])
+                self._return_to_stock(active)
+        return len(active)
+
+    def release(self, reservation: StockReservation) -> bool:
+        with transaction.atomic():
+            if not self.store_repository.release_reservation(reservation.id):
+                return False
+            row = self.store_repository.increment_stock(reservation.item_id, reservation.quantity)
+            if row is not None:
+                self._stock_changed(reservation.item_id, row, reservation.quantity)
+        return True
+
+    def release_expired(self, limit: int = 500) -> int:
+        """Devolve ao stock as reservas expiradas (até `limit` por chamada). Usado pelo sweeper."""
+        with transaction.atomic():
+            expired = self.store_repository.lock_expired_reservations(timezone.now(), limit)
+            if not expired:
+                return 0
+
+            self.store_repository.mark_reservations_released([reservation.id for reservation in expired])
+            self._return_to_stock(expired)
+
+        logger.info("Released {} expired stock reservations", len(expired))
+        return len(expired)
+
+    def _return_to_stock(self, reservations: List[StockReservation]) -> None:
+        quantities: Dict[Any, int] = defaultdict(int)
+        for reservation in reservations:
+            quantities[reservation.item_id] += reservation.quantity
+
+        for item_id, quantity in quantities.items():
+            row = self.store_repository.increment_stock(item_id, quantity)
+            if row is not None:
+                self._stock_changed(item_id, row, quantity)
+
+    def _stock_changed(self, item_id, row, delta: int) -> None:
+        """
+        As alterações de stock por UPDATE não disparam os signals de Item; atualizamos aqui o que depende do stock.
+        A cache de detalhe e a versão do catálogo (as respostas e os ETags levam o stock) mudam sempre;
+        os destaques só quando o item entra ou sai de stock.
+        """
+        stock, category_id, price = row
+        before, after = FacetState(category_id, price, stock - delta), FacetState(category_id, price, stock)
+        CategoryFacetService.item_changed(before, after)
+
+        transaction.on_commit(lambda: self.item_cache.invalidate([item_id]))
+        CatalogCacheService.bump()
+        if (before.stock > 0) != (after.stock > 0):
+            transaction.on_commit(ProductCacheService.invalidate)
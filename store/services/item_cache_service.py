@@ -0,0 +1,40 @@
+from typing import Any, Dict, Iterable, List, Optional
+from django.conf import settings
+from store.helpers.two_tier_cache import TwoTierCache
+from store.infra.respository import StoreRepository
+from store.serializers import ItemSerializer
+
+
+class ItemCacheService:
+    """
+    Cache de leitura dos detalhes de itens (já serializados, como em ProductCacheService).
+    Os sinais de Item em store/signals.py invalidam as entradas em todos os workers.
+    """
+
+    def __init__(self, store_repository: Optional[StoreRepository] = None, cache: Optional[TwoTierCache] = None):
+        self.store_repository = store_repository or StoreRepository()
+        self.cache = cache or TwoTierCache(
+            namespace="item",
+            timeout=getattr(settings, "ITEM_CACHE_TTL", 600),
+            local_maxsize=getattr(settings, "ITEM_CACHE_LOCAL_MAXSIZE", 1024),
+            local_ttl=getattr(settings, "ITEM_CACHE_LOCAL_TTL", 30),
+        )
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([item_id]).get(str(item_id))
+
+    def get_many(self, item_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        return self.cache.get_many([str(id) for id in item_ids], self._load)
+
+    def invalidate(self, item_ids: Iterable[str]) -> None:
+        self.cache.invalidate_many([str(id) for id in item_ids])
+
+    def stats(self) -> Dict[str, float]:
+        return self.cache.metrics.snapshot()
+
+    def _load(self, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        items = self.store_repository.get_items_by_ids(item_ids)
+        return {str(item.id): ItemSerializer(item).data for item in items}
+
+
+item_cache_service = ItemCacheService()
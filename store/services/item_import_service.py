@@ -0,0 +1,151 @@
+import csv
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from django.db import connection, transaction
+from store.infra.respository import StoreRepository
+from store.models import Category, Item
+from store.services.cache_service import ProductCacheService
+from store.services.catalog_cache_service import CatalogCacheService
+from store.services.category_facet_service import CategoryFacetService
+from store.services.item_cache_service import ItemCacheService, item_cache_service
+
+# Sem coluna "id", o id do item é derivado do nome e da categoria: importar o mesmo ficheiro outra vez atualiza
+# os itens em vez de os duplicar
+ITEM_IMPORT_NAMESPACE = uuid.UUID("9b7f4c0e-8a46-4f55-9a55-3f1f0d6f2b10")
+
+
+def read_rows(stream, fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Lê o ficheiro linha a linha (memória constante). Devolve (número da linha, dados)."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row
+
+
+class ItemImportService:
+    """
+    Importação em massa de itens: valida cada linha, resolve as categorias por nome num dict em memória
+    e grava em lotes (INSERT ... ON CONFLICT ou COPY no PostgreSQL), um lote por transação.
+
+    As escritas em massa não disparam os signals de Item, por isso as caches e as facetas são
+    atualizadas aqui: caches de detalhe por lote, destaques/catálogo/facetas uma única vez no fim.
+    """
+
+    def __init__(
+        self,
+        store_repository: Optional[StoreRepository] = None,
+        item_cache: Optional[ItemCacheService] = None,
+        batch_size: int = 1000,
+        use_copy: Optional[bool] = None,
+    ):
+        self.store_repository = store_repository or StoreRepository()
+        self.item_cache = item_cache or item_cache_service
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == "postgresql" if use_copy is None else use_copy
+        self.categories: Dict[str, Any] = dict(Category.objects.values_list("name", "id"))
+        self.imported = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    def run(self, rows: Iterable[Tuple[int, Optional[Dict[str, Any]]]], on_batch: Optional[Callable[[int], None]] = None) -> int:
+        batch: List[Item] = []
+
+        try:
+            for line_number, row in rows:
+                try:
+                    batch.append(self.build_item(row))
+                except ValueError as e:
+                    self.errors.append((line_number, str(e)))
+                    continue
+
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+                    if on_batch:
+                        on_batch(self.imported)
+
+            if batch:
+                self._flush(batch)
+                if on_batch:
+                    on_batch(self.imported)
+        finally:
+            if self.imported:
+                self._finish()
+
+        return self.imported
+
+    def build_item(self, row: Optional[Dict[str, Any]]) -> Item:
+        if not isinstance(row, dict):
+            raise ValueError("Invalid row")
+
+        name = str(row.get("name") or "").strip()
+        if not name or len(name) > 150:
+            raise ValueError("Invalid name")
+
+        try:
+            price = Decimal(str(row.get("price"))).quantize(Decimal("0.01"))
+        except (InvalidOperation, ValueError):
+            raise ValueError("Invalid price")
+        if price < 0 or price >= Decimal("100000000"):
+            raise ValueError("Invalid price")
+
+        try:
+            stock = int(row.get("stock") or 0)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid stock")
+        if stock < 0:
+            raise ValueError("Invalid stock")
+
+        category_name = str(row.get("category") or "").strip()
+        category_id = self._category_id(category_name) if category_name else None
+
+        try:
+            item_id = uuid.UUID(str(row["id"])) if row.get("id") else uuid.uuid5(ITEM_IMPORT_NAMESPACE, f"{category_name}/{name}")
+        except ValueError:
+            raise ValueError("Invalid id")
+
+        return Item(
+            id=item_id,
+            name=name,
+            description=row.get("description") or None,
+            price=price,
+            stock=stock,
+            category_id=category_id,
+        )
+
+    def _category_id(self, name: str):
+        category_id = self.categories.get(name)
+        if category_id is None:
+            if len(name) > 100:
+                raise ValueError("Invalid category")
+            category_id = Category.objects.get_or_create(name=name)[0].id
+            self.categories[name] = category_id
+        return category_id
+
+    def _flush(self, batch: List[Item]) -> None:
+        # Linhas repetidas no mesmo lote fariam o ON CONFLICT tocar a mesma linha duas vezes; fica a última
+        unique = list({item.id: item for item in batch}.values())
+
+        with transaction.atomic():
+            if self.use_copy:
+                self.store_repository.copy_upsert_items(unique)
+            else:
+                self.store_repository.upsert_items(unique)
+
+        self.item_cache.invalidate([item.id for item in unique])
+        self.imported += len(unique)
+
+    def _finish(self) -> None:
+        ProductCacheService.invalidate()
+        CatalogCacheService.bump()
+        CategoryFacetService.rebuild()
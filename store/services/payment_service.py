@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Optional
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from loguru import logger
+from store.helpers.payment_gateway import PaymentGatewayError, get_payment_gateway
+from store.infra.respository import StoreRepository
+from store.models import Payment
+from store.services.cart_summary_service import CartSummaryService, cart_summary_service
+from store.services.inventory_service import InventoryService
+from store.services.sales_rollup_service import SalesRollupService
+
+
+class PaymentService:
+    """
+    Pipeline de pagamentos.
+
+    O pedido HTTP só reserva o stock e grava a compra como PENDING com um Payment na fila. Os workers
+    (comando process_payments) reclamam os pagamentos devidos, chamam o gateway com timeout e levam o
+    estado a PAID (reservas consumidas) ou FAILED (stock devolvido). Erros transitórios do gateway são
+    repetidos com backoff exponencial até PAYMENT_MAX_ATTEMPTS; recusas e métodos inválidos falham logo.
+    Cada tentativa envia o id do pagamento como referência, para o gateway não cobrar duas vezes a mesma compra.
+    """
+
+    def __init__(
+        self,
+        store_repository: Optional[StoreRepository] = None,
+        inventory: Optional[InventoryService] = None,
+        gateway=None,
+        cart_summary: Optional[CartSummaryService] = None,
+        sales: Optional[SalesRollupService] = None,
+    ):
+        self.store_repository = store_repository or StoreRepository()
+        self.inventory = inventory or InventoryService(store_repository=self.store_repository)
+        self.gateway = gateway or get_payment_gateway()
+        self.cart_summary = cart_summary or cart_summary_service
+        self.sales = sales or SalesRollupService(store_repository=self.store_repository)
+
+    def enqueue(self, payment: Payment) -> Payment:
+        payment.next_attempt_at = timezone.now()
+        return self.store_repository.create_payment(payment)
+
+    def claim_due(self, limit: int = 100) -> List[Payment]:
+        now = timezone.now()
+        # O lease cobre a chamada ao gateway com folga; se o worker morrer, o pagamento volta à fila depois dele
+        lease_until = now + timedelta(seconds=2 * getattr(settings, "PAYMENT_TIMEOUT", 10))
+        with transaction.atomic():
+            return self.store_repository.claim_due_payments(now, limit, lease_until)
+
+    def process_due(self, limit: int = 100, workers: Optional[int] = None) -> int:
+        """Reclama e processa um lote de pagamentos devidos, com até `workers` chamadas ao gateway em paralelo."""
+        payments = self.claim_due(limit)
+        workers = workers or getattr(settings, "PAYMENT_WORKERS", 8)
+
+        if workers <= 1 or len(payments) <= 1:
+            for payment in payments:
+                self.process(payment)
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(payments))) as pool:
+                list(pool.map(self._process_in_thread, payments))
+
+        return len(payments)
+
+    def process(self, payment: Payment) -> str:
+        """Uma tentativa de cobrança. Devolve o estado em que o pagamento ficou."""
+        try:
+            approved = self.gateway.process_payment(
+                method=payment.method,
+                amount=float(payment.amount),
+                reference=str(payment.id),
+                timeout=getattr(settings, "PAYMENT_TIMEOUT", 10),
+            )
+        except ValueError as e:
+            return self._finish(payment, Payment.FAILED, str(e))
+        except PaymentGatewayError as e:
+            return self._retry(payment, str(e) or e.__class__.__name__)
+        except Exception as e:
+            logger.exception("Unexpected payment gateway error for payment {}", payment.id)
+            return self._retry(payment, str(e) or e.__class__.__name__)
+
+        if approved:
+            return self._finish(payment, Payment.PAID)
+        return self._finish(payment, Payment.FAILED, "Payment declined")
+
+    def _process_in_thread(self, payment: Payment) -> str:
+        try:
+            return self.process(payment)
+        except Exception:
+            # O pagamento fica com o lease e volta a ser tentado quando ele expirar
+            logger.exception("Could not process payment {}", payment.id)
+            return Payment.PENDING
+        finally:
+            connections.close_all()
+
+    def _retry(self, payment: Payment, error: str) -> str:
+        if payment.attempts >= getattr(settings, "PAYMENT_MAX_ATTEMPTS", 5):
+            return self._finish(payment, Payment.FAILED, error)
+
+        delay = getattr(settings, "PAYMENT_RETRY_DELAY", 2) * 2 ** (payment.attempts - 1)
+        self.store_repository.reschedule_payment(payment.id, payment.attempts, timezone.now() + timedelta(seconds=delay), error)
+        logger.warning("Payment {} attempt {} failed ({}), retrying in {}s", payment.id, payment.attempts, error, delay)
+        return Payment.PENDING
+
+    def _finish(self, payment: Payment, status: str, error: str = "") -> str:
+        with transaction.atomic():
+            current = self.store_repository.lock_payment(payment.id)
+            if current is None or current.status != Payment.PENDING or current.attempts != payment.attempts:
+                # Outro worker reclamou o pagamento depois de o nosso lease expirar; o resultado é dele
+                logger.warning("Discarding stale result for payment {}", payment.id)
+                return current.status if current is not None else status
+
+            reservations = self.store_repository.list_payment_reservations(payment.id)
+            if status == Payment.PAID:
+                self.inventory.commit_many(reservations)
+                # A venda entra nos agregados na mesma transação em que a compra passa a PAID
+                if current.purchase_id:
+                    self.sales.record_purchase(current.purchase_id)
+                if current.order_id:
+                    self.sales.record_order(current.order_id)
+            else:
+                self.inventory.release_many(reservations)
+                if current.order_id:
+                    # As linhas saíram do carrinho no checkout; voltam para o cliente poder tentar de novo
+                    restored = self.store_repository.restore_cart_for_order(current.order_id)
+                    if restored:
+                        self.cart_summary.lines_changed(
+                            restored[0].user_id, {line.item_id: line.quantity for line in restored}, exact=True
+                        )
+
+            self.store_repository.finish_payment(current, status, error)
+
+        logger.info("Payment {} {} after {} attempt(s)", payment.id, status, payment.attempts)
+        return status
@@ -0,0 +1,156 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.db import transaction
+from django.utils import timezone
+from loguru import logger
+from store.helpers.pagination import parse_date_bound
+from store.infra.respository import StoreRepository
+from store.models import SalesRollup
+
+GRANULARITIES = (SalesRollup.HOUR, SalesRollup.DAY)
+# Intervalo máximo de um relatório, em dias, para cada granularidade
+MAX_RANGE_DAYS = {SalesRollup.HOUR: 31, SalesRollup.DAY: 3660}
+
+
+class SalesRollupService:
+    """
+    Agregados de vendas (tabela SalesRollup) por hora e por dia, para cada item, cada categoria e a loja toda.
+
+    Quando um pagamento fica PAID, o PaymentService chama record_purchase/record_order na mesma transação:
+    as linhas da venda viram deltas que são somados às linhas de SalesRollup num único upsert. O comando
+    backfill_sales_rollups recalcula o histórico dia a dia com o mesmo código. Os relatórios só leem a
+    tabela agregada, por isso não dependem do tamanho de Purchase/Order.
+    """
+
+    def __init__(self, store_repository: Optional[StoreRepository] = None):
+        self.store_repository = store_repository or StoreRepository()
+
+    def record_purchase(self, purchase_id) -> None:
+        self.record(self.store_repository.list_purchase_sale_lines([purchase_id]))
+
+    def record_order(self, order_id) -> None:
+        self.record(self.store_repository.list_order_sale_lines([order_id]))
+
+    def record(self, lines: Iterable[Tuple]) -> int:
+        deltas = self.accumulate(lines)
+        if deltas:
+            self.store_repository.add_sales_rollups(deltas)
+        return len(deltas)
+
+    def backfill(self, since: Optional[datetime] = None, until: Optional[datetime] = None, chunk_size: int = 2000) -> int:
+        """
+        Recalcula os agregados de [since, until) a partir das compras e encomendas PAID, um dia por transação:
+        as linhas do dia são apagadas e voltam a ser somadas a partir do histórico (lido em blocos de `chunk_size`).
+        Vendas pagas durante o backfill contam uma única vez. Devolve o número de dias processados.
+        """
+        since = since or self.store_repository.first_sale_at()
+        if since is None:
+            return 0
+        day = self.period_start(since, SalesRollup.DAY)
+        until = until or timezone.now()
+
+        days = 0
+        while day < until:
+            next_day = self.period_start(day + timedelta(days=1, hours=1), SalesRollup.DAY)
+            with transaction.atomic():
+                self.store_repository.delete_sales_rollups(day, next_day)
+                rows = self.record(self.store_repository.iter_paid_sale_lines(day, next_day, chunk_size=chunk_size))
+            logger.debug("Sales rollups for {} rebuilt ({} rows)", day.date(), rows)
+            day, days = next_day, days + 1
+        return days
+
+    def series(self, granularity: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None, item_id=None, category_id=None) -> Dict[str, Any]:
+        """Vendas por período (só os períodos com vendas) de um item, de uma categoria ou da loja, com os totais."""
+        if item_id and category_id:
+            raise ValueError("Use either item_id or category_id")
+        granularity = granularity or SalesRollup.DAY
+        if granularity not in GRANULARITIES:
+            raise ValueError("Invalid granularity")
+        since_at, until_at = self._range(since, until, granularity)
+
+        if item_id:
+            dimension, key = SalesRollup.ITEM, item_id
+        elif category_id:
+            dimension, key = SalesRollup.CATEGORY, category_id
+        else:
+            dimension, key = SalesRollup.TOTAL, SalesRollup.TOTAL_KEY
+
+        rows = self.store_repository.list_sales_rollups(dimension, key, granularity, since_at, until_at)
+        return {
+            "granularity": granularity,
+            "since": since_at,
+            "until": until_at,
+            "units": sum(row.units for row in rows),
+            "revenue": sum((row.revenue for row in rows), Decimal("0")),
+            "order_count": sum(row.order_count for row in rows),
+            "results": rows,
+        }
+
+    def top(self, dimension: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None, limit: Optional[Any] = None, order_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        dimension = dimension or SalesRollup.ITEM
+        if dimension not in (SalesRollup.ITEM, SalesRollup.CATEGORY):
+            raise ValueError("Invalid dimension")
+        order_by = order_by or "revenue"
+        if order_by not in ("revenue", "units", "order_count"):
+            raise ValueError("Invalid order_by")
+        try:
+            limit = min(max(int(limit or 10), 1), 100)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid limit")
+
+        # Os rankings somam linhas diárias
+        since_at, until_at = self._range(since, until, SalesRollup.DAY)
+        return self.store_repository.top_sales_rollups(dimension, since_at, until_at, limit, order_by)
+
+    @staticmethod
+    def accumulate(lines: Iterable[Tuple]) -> Dict[Tuple[str, Any, str, datetime], List]:
+        """
+        Linhas de venda (id da venda, created_at, item_id, category_id, quantidade, receita) -> deltas por
+        (dimensão, chave, granularidade, início do período). order_count conta cada venda uma vez por linha
+        de agregado, mesmo que a encomenda tenha vários itens da mesma categoria.
+        """
+        deltas: Dict[Tuple[str, Any, str, datetime], List] = defaultdict(lambda: [0, Decimal("0"), 0])
+        counted = set()
+
+        for sale_id, created_at, item_id, category_id, quantity, revenue in lines:
+            keys = [(SalesRollup.ITEM, item_id), (SalesRollup.TOTAL, SalesRollup.TOTAL_KEY)]
+            if category_id is not None:
+                keys.append((SalesRollup.CATEGORY, category_id))
+
+            for granularity in GRANULARITIES:
+                period_start = SalesRollupService.period_start(created_at, granularity)
+                for dimension, key in keys:
+                    delta = deltas[(dimension, key, granularity, period_start)]
+                    delta[0] += quantity
+                    delta[1] += Decimal(revenue)
+                    if (sale_id, dimension, key, granularity) not in counted:
+                        counted.add((sale_id, dimension, key, granularity))
+                        delta[2] += 1
+
+        return dict(deltas)
+
+    @staticmethod
+    def period_start(moment: datetime, granularity: str) -> datetime:
+        """Início da hora ou do dia (no fuso do projeto) que contém `moment`."""
+        local = timezone.localtime(moment)
+        if granularity == SalesRollup.HOUR:
+            return local.replace(minute=0, second=0, microsecond=0)
+        return timezone.make_aware(datetime(local.year, local.month, local.day))
+
+    @staticmethod
+    def _range(since: Optional[str], until: Optional[str], granularity: str) -> Tuple[datetime, datetime]:
+        until_at = parse_date_bound(until) or timezone.now()
+        default_days = 2 if granularity == SalesRollup.HOUR else 30
+        since_at = parse_date_bound(since) or until_at - timedelta(days=default_days)
+        if since_at >= until_at:
+            raise ValueError("Invalid date range")
+
+        if until_at - since_at > timedelta(days=MAX_RANGE_DAYS[granularity]):
+            raise ValueError(f"Date range too large for {granularity} data (max {MAX_RANGE_DAYS[granularity]} days)")
+        # Os agregados começam no início da hora ou do dia
+        return SalesRollupService.period_start(since_at, granularity), until_at
+
+
+sales_rollup_service = SalesRollupService()
@@ -1,43 +1,97 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict, Any
 from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
 from store.infra.respository import StoreRepository
-from store.models import Item, Purchase
+from store.models import CartItem, Item, Order, OrderItem, Payment, Purchase, Upload
 from users.domain.entities.user_entity import UserEntity
-from store.helpers.payment_gateway import PaymentGateway
+from store.helpers.pagination import CursorPage, clamp_limit, parse_date_bound
+from store.services.item_cache_service import ItemCacheService, item_cache_service
+from store.services.cart_summary_service import CartSummaryService, cart_summary_service
+from store.services.favorite_index_service import FavoriteIndexService, favorite_index_service
+from store.services.inventory_service import InventoryService
+from store.services.payment_service import PaymentService
+from store.services.upload_service import UploadService, upload_service
 
 class StoreService:
-    def __init__(self, store_repository: Optional[StoreRepository] = None):
+    def __init__(
+        self,
+        store_repository: Optional[StoreRepository] = None,
+        item_cache: Optional[ItemCacheService] = None,
+        inventory: Optional[InventoryService] = None,
+        payments: Optional[PaymentService] = None,
+        uploads: Optional[UploadService] = None,
+        cart_summary: Optional[CartSummaryService] = None,
+        favorite_index: Optional[FavoriteIndexService] = None,
+    ):
         self.store_repository = store_repository or StoreRepository()
+        self.item_cache = item_cache or item_cache_service
+        self.inventory = inventory or InventoryService(store_repository=self.store_repository, item_cache=self.item_cache)
+        self.payments = payments or PaymentService(store_repository=self.store_repository, inventory=self.inventory)
+        self.uploads = uploads or upload_service
+        self.cart_summary = cart_summary or cart_summary_service
+        self.favorite_index = favorite_index or favorite_index_service
 
     #Items
-    def list_item(self)-> List[Item]:
-        return self.store_repository.list_items()
+    def list_item(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> CursorPage:
+        return self.store_repository.list_items(cursor=cursor, limit=clamp_limit(limit))
     
     def get_items(self, item_id: str) -> Optional[Item]:
         return self.store_repository.get_item_by_id(id=item_id)
     
-    def search_items(self, name:str) -> List[Item]:
-        return self.store_repository.search_by_name(name=name)
+    def get_item_detail(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Detalhe do item já serializado, lido da cache em dois níveis."""
+        return self.item_cache.get(item_id)
+
+    def get_item_details(self, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return self.item_cache.get_many(item_ids)
+
+    def search_items(self, query: str, page: int = 1, limit: Optional[int] = None) -> Tuple[List[Item], bool]:
+        """Pesquisa ordenada por relevância. Devolve os itens da página e se existe uma página seguinte."""
+        if page < 1:
+            raise ValueError("Invalid page")
+
+        size = clamp_limit(limit)
+        items = self.store_repository.search_items(query=query, limit=size + 1, offset=(page - 1) * size)
+
+        return items[:size], len(items) > size
     
     def get_by_category(self, category_id: str) -> List[Item]:
         return self.store_repository.get_by_category(category_id=category_id)
     
-    def create_item(self, item_data) -> Item:
+    def create_item(self, item_data, user=None) -> Item:
+        item_data = dict(item_data)
+        image_upload = item_data.pop("image_upload", None)
         item = Item(**item_data)
-        return self.store_repository.create_item(item=item)
+
+        with transaction.atomic():
+            if image_upload:
+                item.image = self.uploads.consume(user, image_upload, Upload.ITEM_IMAGE)
+            item = self.store_repository.create_item(item=item)
+        return item
     
-    def update_item(self, item_id: str, data) -> Optional[Item]:
+    def update_item(self, item_id: str, data, user=None) -> Optional[Item]:
         item = self.store_repository.get_item_by_id(id=item_id)
 
         if not item:
             return None
         
+        image_upload = None
         for k, v in data.items():
+            if k == "image_upload":
+                image_upload = v
+                continue
             setattr(item, k, v)
-        return self.store_repository.update_item(item=item)
+
+        with transaction.atomic():
+            if image_upload:
+                item.image = self.uploads.consume(user, image_upload, Upload.ITEM_IMAGE)
+            item = self.store_repository.update_item(item=item)
+        return item
     
     def delete_item(self, item_id: str) -> bool:
-        return self.store_repository.delete_item(item_id=item_id)
+        deleted = self.store_repository.delete_item(item_id=item_id)
+        return deleted
     
     #Favoritos
     def add_favorites(self, user, item_id: str):
@@ -45,17 +99,29 @@ class StoreService:
 
         if not item:
             return None
-        return self.store_repository.add_favorite(user=user, item=item)
+        favorite = self.store_repository.add_favorite(user=user, item=item)
+        self.favorite_index.added(getattr(user, "pk", user), item.id)
+        return favorite
     
     def remove_favorite(self, user, item_id:str) -> bool:
         item = self.store_repository.get_item_by_id(id=item_id)
 
         if not item:
             return False
-        return self.store_repository.remove_favorite(user=user, item=item)
+        removed = self.store_repository.remove_favorite(user=user, item=item)
+        if removed:
+            self.favorite_index.removed(getattr(user, "pk", user), item.id)
+        return removed
         
     def list_favorites(self, user):
         return self.store_repository.list_favorites(user=user)
+
+    def lookup_favorites(self, user, item_ids: List[str]) -> Dict[str, bool]:
+        """Quais dos itens pedidos são favoritos do utilizador (ícones de uma grelha de produtos)."""
+        max_ids = getattr(settings, "FAVORITE_LOOKUP_MAX_IDS", 500)
+        if len(item_ids) > max_ids:
+            raise ValueError(f"Too many item ids (max {max_ids})")
+        return self.favorite_index.lookup(user, item_ids)
     
     #cart
     def add_to_cart(self, user, item_id: str, quantity: int):
@@ -67,40 +133,146 @@ class StoreService:
         if item.stock < quantity:
             raise ValueError("Not enough stock")
         
-        return self.store_repository.add_cart_item(user=user, item=item_id, quantity=quantity)
+        cart_item = self.store_repository.add_cart_item(user=user, item=item_id, quantity=quantity)
+        self.cart_summary.line_changed(cart_item.user_id, cart_item.item_id, cart_item.quantity)
+        return cart_item
     
     def remove_from_cart(self, user, item_id: str):
         item = self.store_repository.get_item_by_id(id=item_id)
 
         if not item:
             return False
-        return self.store_repository.remove_cart_item(user=user, item=item_id)
+        removed = self.store_repository.remove_cart_item(user=user, item=item_id)
+        if removed:
+            self.cart_summary.line_changed(getattr(user, "pk", user), item.id, 0)
+        return removed
     
+    def update_cart(self, user, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Aplica um lote de operações ao carrinho (add soma, set substitui, remove tira a linha) e devolve o
+        resultado de cada uma pela mesma ordem, com a quantidade com que a linha ficou. Os itens são validados
+        numa query; as operações válidas são gravadas numa transação com um upsert para as somas, outro para
+        as substituições e um DELETE. Várias operações sobre o mesmo item combinam-se pela ordem em que vêm.
+        """
+        max_operations = getattr(settings, "CART_BATCH_MAX_OPERATIONS", 100)
+        if not operations or len(operations) > max_operations:
+            raise ValueError(f"Between 1 and {max_operations} operations are required")
+
+        # Por item: (ADD, quantidade a somar) ou (SET, quantidade final)
+        net: Dict[Any, Tuple[str, int]] = {}
+        for operation in operations:
+            item_id, op = operation["item_id"], operation["op"]
+            if op == CartItem.REMOVE:
+                net[item_id] = (CartItem.SET, 0)
+            elif op == CartItem.SET:
+                net[item_id] = (CartItem.SET, operation["quantity"])
+            else:
+                kind, quantity = net.get(item_id, (CartItem.ADD, 0))
+                net[item_id] = (kind, quantity + operation["quantity"])
+
+        items = self.store_repository.get_items_stock(list(net))
+        errors: Dict[Any, str] = {}
+        for item_id, (_, quantity) in net.items():
+            if item_id not in items:
+                errors[item_id] = "not_found"
+            elif items[item_id].stock < quantity:
+                errors[item_id] = "insufficient_stock"
+
+        added = {item_id: quantity for item_id, (kind, quantity) in net.items() if item_id not in errors and kind == CartItem.ADD}
+        replaced = {item_id: quantity for item_id, (kind, quantity) in net.items() if item_id not in errors and kind == CartItem.SET and quantity}
+        removed = [item_id for item_id, (kind, quantity) in net.items() if item_id not in errors and kind == CartItem.SET and not quantity]
+
+        final: Dict[Any, int] = dict.fromkeys(removed, 0)
+        user_id = getattr(user, "pk", user)
+        with transaction.atomic():
+            for line in self.store_repository.add_cart_items(user, added) + self.store_repository.set_cart_items(user, replaced):
+                final[line.item_id] = line.quantity
+            self.store_repository.remove_cart_items(user, removed)
+
+            self.cart_summary.lines_changed(user_id, {item_id: final[item_id] for item_id in added})
+            self.cart_summary.lines_changed(user_id, {item_id: final[item_id] for item_id in [*replaced, *removed]}, exact=True)
+
+        return [
+            {
+                "item_id": operation["item_id"],
+                "op": operation["op"],
+                "status": errors.get(operation["item_id"], "ok"),
+                "quantity": final.get(operation["item_id"]),
+            }
+            for operation in operations
+        ]
+
     def list_cart(self, user):
         return self.store_repository.list_cart(user=user)
+
+    def get_cart_summary(self, user) -> Dict[str, Any]:
+        return self.cart_summary.get(user)
     
-    def purchase_item(self, user, item_id: str, quantity: int, payment_method:str, payment_proof_file, shipping_data: dict) -> Optional[Purchase]:
+    def purchase_item(self, user, item_id: str, quantity: int, payment_method:str, payment_proof_file, shipping_data: dict, payment_proof_upload=None) -> Optional[Purchase]:
+        """
+        Reserva o stock e grava a compra como PENDING; o pagamento é feito depois pelos workers de process_payments,
+        que passam a compra a PAID ou FAILED. O comprovativo vem no pedido ou como id de um upload já terminado.
+        """
         item = self.store_repository.get_item_by_id(id=item_id)
 
         if not item:
             return None
         
+        # Rejeição rápida; a garantia real é o UPDATE condicional da reserva
         if item.stock < quantity:
             raise ValueError("Not enough stock")
             
         total = item.price * Decimal(quantity)
 
-        amount = float(total)
+        payment = Payment(method=payment_method, amount=total)
 
-        payment_simulator = PaymentGateway.process_payment(method=payment_method, amount=amount)
+        with transaction.atomic():
+            # A reserva vai primeiro para falhar cedo sem stock; a FK para o pagamento só é verificada no commit
+            self.inventory.reserve(user=user, item_id=item.id, quantity=quantity, payment=payment)
 
-        if not payment_simulator:
-            raise ValueError("Payment failed")
-        
-        purchase = Purchase(
+            if payment_proof_upload:
+                payment_proof_file = self.uploads.consume(user, payment_proof_upload, Upload.PAYMENT_PROOF)
+
+            purchase = self.store_repository.create_purchase(Purchase(
+                user=user,
+                item=item,
+                quantity=quantity,
+                total_price=total,
+                payment_method=payment_method,
+                payment_proof=payment_proof_file,
+                first_name=shipping_data["first_name"],
+                last_name=shipping_data["last_name"],
+                city=shipping_data["city"],
+                country=shipping_data["country"],
+                street_address=shipping_data["street_address"],
+                house_number=shipping_data["house_number"],
+                phone=shipping_data["phone"],
+                email=shipping_data["email"],
+            ))
+            payment.purchase = purchase
+            self.payments.enqueue(payment)
+
+        return purchase
+
+    def checkout(self, user, payment_method: str, payment_proof_file, shipping_data: dict, payment_proof_upload=None) -> Order:
+        """
+        Compra o carrinho inteiro: reserva o stock de todas as linhas numa transação (tudo ou nada) e grava
+        a encomenda PENDING com as linhas e um único pagamento pelo total. As linhas saem do carrinho na
+        mesma transação, para o mesmo carrinho não dar duas encomendas; os workers de process_payments fazem
+        a cobrança e, se ela falhar, devolvem-nas ao carrinho.
+        """
+        cart = self.store_repository.list_cart_for_checkout(user=user)
+
+        if not cart:
+            raise ValueError("Cart is empty")
+
+        if any(line.item.stock < line.quantity for line in cart):
+            raise ValueError("Not enough stock")
+
+        total = sum((line.item.price * Decimal(line.quantity) for line in cart), Decimal("0"))
+
+        order = Order(
             user=user,
-            item=item,
-            quantity=quantity,
             total_price=total,
             payment_method=payment_method,
             payment_proof=payment_proof_file,
@@ -113,6 +285,35 @@ class StoreService:
             phone=shipping_data["phone"],
             email=shipping_data["email"],
         )
+        lines = [
+            OrderItem(order=order, item_id=line.item.id, quantity=line.quantity, unit_price=line.item.price)
+            for line in cart
+        ]
+        payment = Payment(order=order, method=payment_method, amount=total)
+
+        with transaction.atomic():
+            if not self.store_repository.remove_checked_out_cart_lines(user, cart):
+                raise ValueError("Cart changed, please try again")
+            self.inventory.reserve_many(user=user, quantities={line.item.id: line.quantity for line in cart}, payment=payment)
+            if payment_proof_upload:
+                order.payment_proof = self.uploads.consume(user, payment_proof_upload, Upload.PAYMENT_PROOF)
+            order = self.store_repository.create_order(order, lines)
+            self.payments.enqueue(payment)
+            self.cart_summary.lines_changed(getattr(user, "pk", user), {line.item.id: 0 for line in cart}, exact=True)
+
+        return order
+
+    def list_purchases(self, user, cursor: Optional[str] = None, limit: Optional[Any] = None, since: Optional[str] = None, until: Optional[str] = None) -> CursorPage:
+        """Página do histórico de compras; `since` (inclusivo) e `until` (exclusivo) filtram pela data da compra."""
+        since_at, until_at = parse_date_bound(since), parse_date_bound(until)
+        if since_at and until_at and since_at >= until_at:
+            raise ValueError("Invalid date range")
+        return self.store_repository.list_purchases(
+            user=user, cursor=cursor, limit=clamp_limit(limit), since=since_at, until=until_at
+        )
 
-        return self.store_repository.create_purchase(purchase)
+    def get_purchase(self, user, purchase_id: str) -> Optional[Purchase]:
+        return self.store_repository.get_purchase(user=user, purchase_id=purchase_id)
 
+    def get_order(self, user, order_id: str) -> Optional[Order]:
+        return self.store_repository.get_order(user=user, order_id=order_id)
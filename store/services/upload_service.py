@@ -0,0 +1,222 @@
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import timedelta
+from typing import BinaryIO, List, Optional
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from loguru import logger
+from store.models import Upload
+
+READ_BLOCK = 64 * 1024
+
+
+class UploadOffsetMismatch(ValueError):
+    """O offset enviado não é o que o servidor tem; o cliente deve retomar a partir de `offset`."""
+
+    def __init__(self, offset: int):
+        super().__init__("Upload offset mismatch")
+        self.offset = offset
+
+
+class StagedFile(File):
+    """Ficheiro montado na pasta de staging; o FileSystemStorage move-o para o destino em vez de o copiar."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class UploadService:
+    """
+    Uploads em partes, retomáveis.
+
+    Cada parte é escrita em streaming para um ficheiro próprio na pasta de staging (UPLOAD_STAGING_DIR) e só
+    conta depois de um UPDATE condicional em `received`: duas tentativas da mesma parte não se pisam e um
+    cliente que perde a ligação retoma a partir do offset guardado. Com a última parte, as partes são
+    concatenadas num único ficheiro com o sha256 calculado durante a cópia e o resultado vai para o storage.
+    As imagens de itens passam antes pela mesma validação do Pillow que o ImageField aplica aos multipart.
+    """
+
+    def __init__(self, staging_dir: Optional[str] = None):
+        self._staging_dir = staging_dir
+
+    @property
+    def staging_dir(self) -> str:
+        return self._staging_dir or getattr(settings, "UPLOAD_STAGING_DIR", os.path.join(settings.BASE_DIR, "uploads_staging"))
+
+    @staticmethod
+    def max_size(purpose: str) -> int:
+        if purpose == Upload.ITEM_IMAGE:
+            return getattr(settings, "UPLOAD_MAX_ITEM_IMAGE_SIZE", 20 * 1024 * 1024)
+        return getattr(settings, "UPLOAD_MAX_PAYMENT_PROOF_SIZE", 10 * 1024 * 1024)
+
+    def create(self, user, purpose: str, filename: str, size: int, content_type: str = "", sha256: str = "") -> Upload:
+        if purpose not in dict(Upload.PURPOSES):
+            raise ValueError("Invalid purpose")
+        if size < 1 or size > self.max_size(purpose):
+            raise ValueError("File too large" if size > 0 else "Invalid size")
+
+        filename = get_valid_filename(os.path.basename(filename or ""))[:255] or "upload"
+        upload = Upload.objects.create(
+            user=user,
+            purpose=purpose,
+            filename=filename,
+            content_type=(content_type or "")[:100],
+            size=size,
+            expected_sha256=(sha256 or "").lower(),
+            expires_at=timezone.now() + timedelta(seconds=getattr(settings, "UPLOAD_TTL", 60 * 60 * 24)),
+        )
+        os.makedirs(self._dir(upload), exist_ok=True)
+        return upload
+
+    def get(self, user, upload_id) -> Optional[Upload]:
+        return Upload.objects.filter(id=upload_id, user=user).first()
+
+    def write_chunk(self, upload: Upload, offset: int, stream: BinaryIO, length: int) -> Upload:
+        """
+        Acrescenta `length` bytes lidos de `stream` a partir de `offset`. Devolve o upload atualizado;
+        a parte que completa o tamanho declarado fecha o upload.
+        """
+        if upload.status != Upload.UPLOADING:
+            raise ValueError("Upload is not in progress")
+        if offset != upload.received:
+            raise UploadOffsetMismatch(upload.received)
+        if length > getattr(settings, "UPLOAD_MAX_CHUNK_SIZE", 8 * 1024 * 1024):
+            raise ValueError("Chunk too large")
+        if offset + length > upload.size:
+            raise ValueError("Chunk exceeds the declared size")
+
+        directory = self._dir(upload)
+        if not os.path.isdir(directory):
+            raise ValueError("Upload is not in progress")
+
+        part = os.path.join(directory, f"{offset:020d}.part")
+        tmp = f"{part}.{uuid.uuid4().hex}.tmp"
+        written = 0
+        try:
+            with open(tmp, "wb") as out:
+                while written < length:
+                    block = stream.read(min(READ_BLOCK, length - written))
+                    if not block:
+                        break
+                    out.write(block)
+                    written += len(block)
+
+            if written != length:
+                # Ligação caiu a meio: a parte é descartada e o cliente retoma a partir do mesmo offset
+                raise ValueError("Incomplete chunk")
+
+            if length:
+                # A parte fica no lugar antes de contar; uma repetição do mesmo offset traz os mesmos bytes
+                os.replace(tmp, part)
+                if not Upload.objects.filter(id=upload.id, status=Upload.UPLOADING, received=offset).update(
+                    received=offset + length
+                ):
+                    current = Upload.objects.filter(id=upload.id).values_list("received", flat=True).first()
+                    raise UploadOffsetMismatch(current or 0)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        upload.received = offset + length
+        if upload.received == upload.size:
+            self.complete(upload)
+        return upload
+
+    def complete(self, upload: Upload) -> Upload:
+        """Monta as partes, confirma o sha256 e guarda o ficheiro no storage."""
+        parts = self._parts(upload)
+        assembled = os.path.join(self._dir(upload), f"assembled.{uuid.uuid4().hex}")
+        digest = hashlib.sha256()
+
+        with open(assembled, "wb") as out:
+            for part in parts:
+                with open(part, "rb") as source:
+                    for block in iter(lambda: source.read(READ_BLOCK), b""):
+                        digest.update(block)
+                        out.write(block)
+
+        sha256 = digest.hexdigest()
+        if os.path.getsize(assembled) != upload.size or (upload.expected_sha256 and upload.expected_sha256 != sha256):
+            self._fail(upload)
+            raise ValueError("Checksum mismatch")
+
+        if upload.purpose == Upload.ITEM_IMAGE and not self._is_image(assembled, upload.filename):
+            self._fail(upload)
+            raise ValueError("Upload is not a valid image")
+
+        with open(assembled, "rb") as source:
+            name = default_storage.save(f"uploads/{upload.id}/{upload.filename}", StagedFile(source))
+
+        if not Upload.objects.filter(id=upload.id, status=Upload.UPLOADING).update(
+            status=Upload.COMPLETE, sha256=sha256, file=name
+        ):
+            # Outro pedido já fechou este upload
+            default_storage.delete(name)
+        else:
+            upload.status, upload.sha256, upload.file.name = Upload.COMPLETE, sha256, name
+        self._discard(upload)
+        return upload
+
+    def consume(self, user, upload_id, purpose: str) -> str:
+        """
+        Marca um upload COMPLETE como usado e devolve o nome do ficheiro no storage. Deve correr na
+        transação que grava a compra ou o item, para o upload voltar a COMPLETE se essa gravação falhar.
+        """
+        upload = Upload.objects.filter(id=upload_id, user=user, purpose=purpose).only("file", "status").first()
+        if upload is None or not Upload.objects.filter(id=upload.id, status=Upload.COMPLETE).update(status=Upload.ATTACHED):
+            raise ValueError("Upload not found or not complete")
+        return upload.file.name
+
+    def purge_expired(self, limit: int = 500) -> int:
+        """Apaga os uploads expirados que nunca foram associados, com as partes e o ficheiro montado."""
+        expired: List[Upload] = list(
+            Upload.objects.filter(status__in=[Upload.UPLOADING, Upload.COMPLETE, Upload.FAILED], expires_at__lte=timezone.now())
+            .only("id", "file")[:limit]
+        )
+        purged = 0
+        for upload in expired:
+            # Só apagamos os ficheiros se a linha saiu mesmo: um upload associado entretanto fica intacto
+            deleted, _ = Upload.objects.filter(id=upload.id).exclude(status=Upload.ATTACHED).delete()
+            if deleted:
+                self._discard(upload)
+                if upload.file:
+                    default_storage.delete(upload.file.name)
+                purged += 1
+        if purged:
+            logger.info("Purged {} expired uploads", purged)
+        return purged
+
+    def _fail(self, upload: Upload) -> None:
+        Upload.objects.filter(id=upload.id, status=Upload.UPLOADING).update(status=Upload.FAILED)
+        upload.status = Upload.FAILED
+        self._discard(upload)
+
+    @staticmethod
+    def _is_image(path: str, filename: str) -> bool:
+        with open(path, "rb") as source:
+            staged = StagedFile(source, name=filename)
+            try:
+                forms.ImageField().clean(staged)
+            except ValidationError:
+                return False
+        return True
+
+    def _dir(self, upload: Upload) -> str:
+        return os.path.join(self.staging_dir, str(upload.id))
+
+    def _parts(self, upload: Upload) -> List[str]:
+        directory = self._dir(upload)
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(".part")]
+
+    def _discard(self, upload: Upload) -> None:
+        shutil.rmtree(self._dir(upload), ignore_errors=True)
+
+
+upload_service = UploadService()
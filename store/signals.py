@@ -1,14 +1,94 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
-from store.models import Item
-from django.core.cache import cache
+from loguru import logger
+from store.models import Category, CategoryFacet, Item
 from store.services.cache_service import ProductCacheService
+from store.services.catalog_cache_service import CatalogCacheService
+from store.services.item_cache_service import item_cache_service
+from store.services.category_facet_service import CategoryFacetService
 
 @receiver(post_save, sender=Item)
 def clear_featured_cache(sender, instance, **kwargs):
-    cache.delete(ProductCacheService.CACHE_KEY)
-    print(f"Cache cleared due to save: {instance.id}")
+    ProductCacheService.invalidate()
+    logger.debug("Featured cache invalidated due to save: {}", instance.id)
 
+@receiver(post_delete, sender=Item)
 def clear_cache_on_item_delete(sender, instance, **kwargs):
-    cache.delete(ProductCacheService.CACHE_KEY)
-    print(f"Cache cleared due to delete: {instance.id}")
\ No newline at end of file
+    ProductCacheService.invalidate()
+    logger.debug("Featured cache invalidated due to delete: {}", instance.id)
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def invalidate_item_cache(sender, instance, **kwargs):
+    # Só depois do commit, senão outro worker pode voltar a guardar a versão antiga entretanto
+    item_id = instance.id
+    transaction.on_commit(lambda: item_cache_service.invalidate([item_id]))
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_catalog_version(sender, raw=False, **kwargs):
+    # Qualquer escrita em itens ou categorias (serviço, admin, ORM) muda as respostas do catálogo
+    if not raw:
+        CatalogCacheService.bump()
+
+@receiver(post_save, sender=Category)
+def invalidate_category_items_cache(sender, instance, created, **kwargs):
+    # O detalhe do item inclui a categoria
+    if created:
+        return
+    item_ids = list(Item.objects.filter(category_id=instance.id).values_list("id", flat=True))
+    transaction.on_commit(lambda: item_cache_service.invalidate(item_ids))
+
+
+@receiver(post_save, sender=Category)
+def create_category_facet(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CategoryFacet.objects.get_or_create(category=instance)
+
+def _locked_facet_state(item_id):
+    # Estado atual no banco, com a linha bloqueada até ao fim da transação (não os valores de quando a
+    # instância foi carregada: outro save pode tê-los mudado entretanto)
+    return CategoryFacetService.state(
+        Item.objects.select_for_update().filter(pk=item_id).values("category_id", "price", "stock").first()
+    )
+
+@receiver(pre_save, sender=Item)
+def remember_item_facet_state(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._facet_previous = None
+        return
+    instance._facet_previous = _locked_facet_state(instance.pk)
+
+@receiver(pre_delete, sender=Item)
+def remember_deleted_item_facet_state(sender, instance, **kwargs):
+    # O Collector apaga dentro de uma transação; uma linha que já saiu não conta
+    instance._facet_previous = _locked_facet_state(instance.pk)
+
+@receiver(post_save, sender=Item)
+def update_category_facets_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    current = CategoryFacetService.state(instance.__dict__)
+    if current is None:
+        current = CategoryFacetService.state(
+            Item.objects.filter(pk=instance.pk).values("category_id", "price", "stock").first()
+        )
+
+    CategoryFacetService.item_changed(getattr(instance, "_facet_previous", None), current)
+
+@receiver(post_delete, sender=Item)
+def update_category_facets_on_delete(sender, instance, **kwargs):
+    CategoryFacetService.item_changed(getattr(instance, "_facet_previous", None), None)
+
+@receiver(pre_save, sender=Item)
+def reset_image_variants(sender, instance, raw=False, **kwargs):
+    # Imagem nova: as variantes antigas deixam de servir e o gerador volta a apanhar o item
+    if raw or instance._state.adding or "image" not in instance.__dict__:
+        return
+    previous = getattr(instance, "_loaded_values", {}).get("image")
+    if previous is None or previous != (instance.image.name or ""):
+        instance.image_variants = None
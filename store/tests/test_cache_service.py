@@ -0,0 +1,127 @@
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase
+from store.models import Item
+from store.services.cache_service import RELEASE_LOCK_SCRIPT, ProductCacheService
+
+
+class FakeRedis:
+    """
+    Só o EVAL do script de libertação do lock, com a mesma semântica (compare-and-delete).
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.scripts = []
+
+    def eval(self, script, numkeys, key, value):
+        self.scripts.append(script)
+        if self.values.get(key) == value:
+            del self.values[key]
+            return 1
+        return 0
+
+
+class FakeRedisClient:
+    """
+    O cliente do django-redis: chave com prefixo/versão e valor serializado.
+    """
+
+    def make_key(self, key):
+        return f":1:{key}"
+
+    def encode(self, value):
+        return f"pickled:{value}".encode()
+
+
+class TestProductCacheService(TestCase):
+    """
+    Testes da cache de produtos em destaque (single-flight, valor antigo e renovação antecipada).
+    """
+
+    def setUp(self):
+        cache.clear()
+        ProductCacheService.metrics.reset()
+        self.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=3)
+
+    def test_second_read_is_a_hit_without_queries(self):
+        ProductCacheService.get_featured_products()
+        with self.assertNumQueries(0):
+            products = ProductCacheService.get_featured_products()
+
+        self.assertEqual([p["id"] for p in products], [str(self.item.id)])
+        stats = ProductCacheService.metrics.snapshot()
+        self.assertEqual((stats["miss"], stats["rebuild"], stats["hit"]), (1, 1, 1))
+
+    def test_item_save_marks_cache_stale_and_next_read_rebuilds(self):
+        ProductCacheService.get_featured_products()
+
+        self.item.name = "Camisa nova"
+        self.item.save()
+
+        products = ProductCacheService.get_featured_products()
+        self.assertEqual(products[0]["name"], "Camisa nova")
+        self.assertEqual(ProductCacheService.metrics.snapshot()["rebuild"], 2)
+
+    def test_stale_value_is_served_while_another_worker_rebuilds(self):
+        ProductCacheService.get_featured_products()
+        Item.objects.filter(id=self.item.id).update(name="Outro nome")
+        ProductCacheService.invalidate()
+
+        # Simula outro worker com o lock
+        cache.add(ProductCacheService.LOCK_KEY, "other-worker")
+
+        with self.assertNumQueries(0):
+            products = ProductCacheService.get_featured_products()
+
+        self.assertEqual(products[0]["name"], "Camisa")
+        self.assertEqual(ProductCacheService.metrics.snapshot()["stale"], 1)
+
+    def test_cold_cache_waits_for_leader_instead_of_querying(self):
+        cache.add(ProductCacheService.LOCK_KEY, "other-worker")
+
+        def leader_finishes(_):
+            cache.set(ProductCacheService.CACHE_KEY, {"value": ["from-leader"]})
+
+        with patch("store.services.cache_service.time.sleep", side_effect=leader_finishes):
+            with self.assertNumQueries(0):
+                products = ProductCacheService.get_featured_products()
+
+        self.assertEqual(products, ["from-leader"])
+
+    def test_close_to_expiry_refreshes_early(self):
+        ProductCacheService.get_featured_products()
+        entry = cache.get(ProductCacheService.CACHE_KEY)
+        entry["delta"] = ProductCacheService.TTL
+        cache.set(ProductCacheService.CACHE_KEY, entry)
+
+        # random() perto de 1 => -log(1 - r) grande => renova antes de expirar
+        with patch("store.services.cache_service.random.random", return_value=0.999):
+            ProductCacheService.get_featured_products()
+
+        self.assertEqual(ProductCacheService.metrics.snapshot()["rebuild"], 2)
+
+    def test_lock_taken_over_by_another_worker_is_not_released(self):
+        def lock_expires_and_another_worker_takes_it():
+            cache.set(ProductCacheService.LOCK_KEY, "other-worker")
+            return []
+
+        with patch.object(ProductCacheService, "_compute", side_effect=lock_expires_and_another_worker_takes_it):
+            ProductCacheService.get_featured_products()
+
+        self.assertEqual(cache.get(ProductCacheService.LOCK_KEY), "other-worker")
+
+    def test_redis_lock_is_released_with_an_atomic_compare_and_delete(self):
+        client = FakeRedisClient()
+        redis = FakeRedis({client.make_key(ProductCacheService.LOCK_KEY): client.encode("other-worker")})
+
+        with patch("store.services.cache_service.get_redis_connection", return_value=redis), \
+                patch.object(cache, "client", client, create=True):
+            ProductCacheService._release_lock("our-token")
+            self.assertIn(client.make_key(ProductCacheService.LOCK_KEY), redis.values)
+
+            ProductCacheService._release_lock("other-worker")
+            self.assertEqual(redis.values, {})
+
+        self.assertEqual(redis.scripts, [RELEASE_LOCK_SCRIPT, RELEASE_LOCK_SCRIPT])
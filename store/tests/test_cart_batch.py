@@ -0,0 +1,109 @@
+import uuid
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from store.models import CartItem, Item
+from store.services.cart_summary_service import cart_summary_service
+
+
+class TestCartBatch(TestCase):
+    """
+    Testes do endpoint de operações em lote no carrinho (sincronização offline).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="batch", password="batch-password")
+        cls.shirt = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=10)
+        cls.shoes = Item.objects.create(name="Sapatos", price=Decimal("40.00"), stock=2)
+        cls.hat = Item.objects.create(name="Chapéu", price=Decimal("5.00"), stock=5)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def batch(self, *operations, expected_status=200):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/v1/store/cart/batch/", {"operations": list(operations)}, format="json")
+        self.assertEqual(response.status_code, expected_status, response.content)
+        return response.json()
+
+    def cart(self):
+        return dict(CartItem.objects.filter(user=self.user).values_list("item_id", "quantity"))
+
+    def test_add_set_and_remove_in_one_request(self):
+        CartItem.objects.create(user=self.user, item=self.shoes, quantity=1)
+        CartItem.objects.create(user=self.user, item=self.hat, quantity=4)
+
+        body = self.batch(
+            {"item_id": str(self.shirt.id), "op": "add", "quantity": 2},
+            {"item_id": str(self.shoes.id), "op": "add", "quantity": 1},
+            {"item_id": str(self.hat.id), "op": "set", "quantity": 1},
+        )
+
+        self.assertEqual([result["quantity"] for result in body["results"]], [2, 2, 1])
+        self.assertEqual({result["status"] for result in body["results"]}, {"ok"})
+        self.assertEqual(self.cart(), {self.shirt.id: 2, self.shoes.id: 2, self.hat.id: 1})
+
+        body = self.batch({"item_id": str(self.hat.id), "op": "remove"}, {"item_id": str(self.shoes.id), "op": "set", "quantity": 0})
+        self.assertEqual([result["quantity"] for result in body["results"]], [0, 0])
+        self.assertEqual(self.cart(), {self.shirt.id: 2})
+
+    def test_operations_on_the_same_item_are_combined_in_order(self):
+        body = self.batch(
+            {"item_id": str(self.shirt.id), "op": "add", "quantity": 2},
+            {"item_id": str(self.shirt.id), "op": "set", "quantity": 5},
+            {"item_id": str(self.shirt.id), "op": "add", "quantity": 1},
+        )
+
+        self.assertEqual([result["quantity"] for result in body["results"]], [6, 6, 6])
+        self.assertEqual(self.cart(), {self.shirt.id: 6})
+
+    def test_failed_lines_do_not_stop_the_others(self):
+        missing = uuid.uuid4()
+
+        body = self.batch(
+            {"item_id": str(missing), "op": "add", "quantity": 1},
+            {"item_id": str(self.shoes.id), "op": "set", "quantity": 3},
+            {"item_id": str(self.shirt.id), "op": "add", "quantity": 1},
+        )
+
+        self.assertEqual(
+            [(result["status"], result["quantity"]) for result in body["results"]],
+            [("not_found", None), ("insufficient_stock", None), ("ok", 1)],
+        )
+        self.assertEqual(self.cart(), {self.shirt.id: 1})
+
+    def test_items_are_validated_in_one_query(self):
+        operations = [{"item_id": str(item.id), "op": "add", "quantity": 1} for item in (self.shirt, self.shoes, self.hat)]
+
+        # Itens + upsert das somas, dentro de uma transação (SAVEPOINT/RELEASE no TestCase)
+        with self.assertNumQueries(4):
+            self.batch(*operations)
+
+    def test_updates_the_cached_summary(self):
+        self.batch({"item_id": str(self.shirt.id), "op": "add", "quantity": 3})
+        cart_summary_service.get(self.user)
+
+        self.batch({"item_id": str(self.shirt.id), "op": "set", "quantity": 1}, {"item_id": str(self.hat.id), "op": "add", "quantity": 2})
+
+        with self.assertNumQueries(1):
+            summary = cart_summary_service.get(self.user)
+        self.assertEqual(summary["item_count"], 3)
+        self.assertEqual(summary["total"], Decimal("20.00"))
+
+    def test_invalid_payload(self):
+        self.batch(expected_status=400)
+        self.batch({"item_id": "not-a-uuid", "op": "add"}, expected_status=400)
+        self.batch({"item_id": str(self.shirt.id), "op": "add", "quantity": 0}, expected_status=400)
+        self.batch({"item_id": str(self.shirt.id), "op": "replace"}, expected_status=400)
+
+    @override_settings(CART_BATCH_MAX_OPERATIONS=2)
+    def test_operation_limit(self):
+        operations = [{"item_id": str(item.id), "op": "add"} for item in (self.shirt, self.shoes, self.hat)]
+
+        self.batch(*operations, expected_status=400)
+        self.assertEqual(self.cart(), {})
@@ -0,0 +1,130 @@
+import threading
+import time
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from store.models import CartItem, Item
+from store.services.cart_summary_service import CartSummaryService, cart_summary_service
+from store.services.item_cache_service import item_cache_service
+
+
+class TestCartSummary(TestCase):
+    """
+    Testes do resumo do carrinho em cache: totais, avisos de stock e atualização incremental.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="summary", password="summary-password")
+        cls.shirt = Item.objects.create(name="Camisa", price=Decimal("10.50"), stock=10)
+        cls.shoes = Item.objects.create(name="Sapatos", price=Decimal("40.00"), stock=1)
+
+    def setUp(self):
+        cache.clear()
+        item_cache_service.cache.local.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, item, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/v1/store/cart/", {"item_id": str(item.id), "quantity": quantity}, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def summary(self):
+        response = self.client.get("/api/v1/store/cart/summary/")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_totals_and_warnings(self):
+        self.add(self.shirt, 2)
+        self.add(self.shoes, 1)
+        CartItem.objects.filter(item=self.shoes).update(quantity=3)
+        cache.clear()
+
+        summary = self.summary()
+
+        self.assertEqual(summary["item_count"], 5)
+        self.assertEqual(Decimal(summary["total"]), Decimal("141.00"))
+        self.assertTrue(summary["has_stock_warnings"])
+        lines = {line["item"]["id"]: line for line in summary["lines"]}
+        self.assertEqual(Decimal(lines[str(self.shirt.id)]["line_total"]), Decimal("21.00"))
+        self.assertIsNone(lines[str(self.shirt.id)]["stock_warning"])
+        self.assertEqual(lines[str(self.shoes.id)]["stock_warning"], "insufficient_stock")
+        self.assertEqual(lines[str(self.shoes.id)]["item"]["name"], "Sapatos")
+
+    def test_warm_summary_needs_no_queries(self):
+        self.add(self.shirt, 1)
+        self.summary()
+
+        with self.assertNumQueries(0):
+            cart_summary_service.get(self.user)
+
+    def test_add_and_remove_update_the_cached_summary(self):
+        self.add(self.shirt, 1)
+        self.summary()
+
+        self.add(self.shirt, 2)
+        self.add(self.shoes, 1)
+        item_cache_service.get(self.shoes.id)
+        with self.assertNumQueries(0):
+            summary = cart_summary_service.get(self.user)
+        self.assertEqual(summary["item_count"], 4)
+        self.assertEqual(summary["total"], Decimal("71.50"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/v1/store/cart/remove/?item_id={self.shirt.id}")
+        self.assertEqual(response.status_code, 204)
+        with self.assertNumQueries(0):
+            summary = cart_summary_service.get(self.user)
+        self.assertEqual(summary["item_count"], 1)
+        self.assertEqual([line["item"]["id"] for line in summary["lines"]], [str(self.shoes.id)])
+
+    def test_price_and_stock_changes_reach_the_summary(self):
+        self.add(self.shirt, 2)
+        self.summary()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shirt.price = Decimal("12.00")
+            self.shirt.stock = 0
+            self.shirt.save()
+
+        summary = self.summary()
+        self.assertEqual(Decimal(summary["total"]), Decimal("24.00"))
+        self.assertEqual(summary["lines"][0]["stock_warning"], "out_of_stock")
+
+    def test_deleted_item_leaves_the_summary(self):
+        self.add(self.shirt, 1)
+        self.add(self.shoes, 1)
+        self.summary()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shoes.delete()
+
+        summary = self.summary()
+        self.assertEqual(summary["item_count"], 1)
+        self.assertEqual(Decimal(summary["total"]), Decimal("10.50"))
+
+    def test_invalidate_waits_for_a_rebuild_that_read_the_old_cart(self):
+        service = CartSummaryService()
+        key = service._key(str(self.user.pk))
+        invalidated = threading.Thread(target=service.invalidate, args=(self.user.pk,))
+
+        def read_then_cart_is_cleared(user):
+            # O carrinho é esvaziado e invalidado (fora de transação: on_commit corre logo) antes de a reconstrução gravar
+            invalidated.start()
+            time.sleep(0.05)
+            return [(self.shirt.id, 2)]
+
+        with patch.object(service.store_repository, "list_cart_quantities", side_effect=read_then_cart_is_cleared):
+            service._lines(self.user)
+        invalidated.join()
+
+        self.assertIsNone(cache.get(key))
+
+    def test_empty_cart(self):
+        summary = self.summary()
+
+        self.assertEqual(summary, {"lines": [], "item_count": 0, "total": "0.00", "has_stock_warnings": False})
@@ -0,0 +1,97 @@
+import threading
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from store.infra.respository import StoreRepository
+from store.models import CartItem, Item
+
+
+class TestCartUpsert(TestCase):
+    """
+    Testes do upsert atómico do carrinho (INSERT ... ON CONFLICT ... RETURNING).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="cart", password="cart-password")
+        cls.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=100)
+
+    def test_first_add_creates_the_row(self):
+        with self.assertNumQueries(1):
+            cart_item = StoreRepository().add_cart_item(user=self.user, item=str(self.item.id), quantity=2)
+
+        self.assertEqual((cart_item.user_id, cart_item.item_id, cart_item.quantity), (self.user.id, self.item.id, 2))
+        self.assertEqual(CartItem.objects.get().id, cart_item.id)
+
+    def test_next_adds_increment_the_same_row(self):
+        first = StoreRepository().add_cart_item(user=self.user, item=self.item, quantity=2)
+
+        with self.assertNumQueries(1):
+            second = StoreRepository().add_cart_item(user=self.user, item=self.item, quantity=3)
+
+        self.assertEqual(second.id, first.id)
+        self.assertEqual(second.quantity, 5)
+        self.assertEqual(CartItem.objects.get().quantity, 5)
+
+    def test_cart_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        client.post("/api/v1/store/cart/", {"item_id": str(self.item.id), "quantity": 1})
+        response = client.post("/api/v1/store/cart/", {"item_id": str(self.item.id), "quantity": 4})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["quantity"], 5)
+
+        response = client.post("/api/v1/store/cart/", {"item_id": str(self.item.id), "quantity": 1000})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestCartUpsertConcurrency(TransactionTestCase):
+    """
+    Vários threads a somar ao mesmo carrinho ao mesmo tempo não podem perder incrementos.
+    """
+
+    THREADS = 8
+    ADDS_PER_THREAD = 25
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="stress", password="stress-password")
+        self.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=100)
+
+    def test_concurrent_adds_do_not_lose_increments(self):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def add_once(repository):
+            while True:
+                try:
+                    return repository.add_cart_item(user=self.user.id, item=self.item.id, quantity=1)
+                except OperationalError as e:
+                    # A base SQLite de testes (memória partilhada) recusa escritas simultâneas com
+                    # "table is locked" em vez de esperar; a instrução não foi aplicada e pode ser repetida
+                    if connection.vendor != "sqlite" or "locked" not in str(e):
+                        raise
+
+        def worker():
+            try:
+                barrier.wait()
+                repository = StoreRepository()
+                for _ in range(self.ADDS_PER_THREAD):
+                    add_once(repository)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(CartItem.objects.count(), 1)
+        self.assertEqual(CartItem.objects.get().quantity, self.THREADS * self.ADDS_PER_THREAD)
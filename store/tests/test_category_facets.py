@@ -0,0 +1,128 @@
+import random
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from store.models import Category, CategoryFacet, Item
+from store.services.category_facet_service import CategoryFacetService
+from store.services.store_service import StoreService
+
+
+class TestCategoryFacets(TestCase):
+    """
+    Testes da tabela de facetas por categoria, mantida a cada escrita de item.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.shirts = Category.objects.create(name="Camisas")
+        self.shoes = Category.objects.create(name="Sapatos")
+
+    def facet(self, category):
+        return CategoryFacet.objects.get(category=category)
+
+    def assertFacet(self, category, item_count, in_stock_count, min_price, max_price):
+        facet = self.facet(category)
+        self.assertEqual(
+            (facet.item_count, facet.in_stock_count, facet.min_price, facet.max_price),
+            (item_count, in_stock_count, min_price, max_price),
+        )
+
+    def create(self, price, stock=1, category=None):
+        return Item.objects.create(name="Item", price=Decimal(price), stock=stock, category=category or self.shirts)
+
+    def test_new_category_starts_empty(self):
+        self.assertFacet(self.shirts, 0, 0, None, None)
+
+    def test_create_updates_counts_and_price_range(self):
+        self.create("10.00")
+        self.create("25.00", stock=0)
+        self.create("5.00")
+
+        self.assertFacet(self.shirts, 3, 2, Decimal("5.00"), Decimal("25.00"))
+        self.assertFacet(self.shoes, 0, 0, None, None)
+
+    def test_update_stock_and_price(self):
+        cheapest = self.create("5.00")
+        self.create("10.00")
+
+        StoreService().update_item(str(cheapest.id), {"price": "12.00", "stock": 0})
+
+        self.assertFacet(self.shirts, 2, 1, Decimal("10.00"), Decimal("12.00"))
+
+    def test_move_item_between_categories(self):
+        item = self.create("30.00")
+        self.create("10.00")
+
+        item.category = self.shoes
+        item.save()
+
+        self.assertFacet(self.shirts, 1, 1, Decimal("10.00"), Decimal("10.00"))
+        self.assertFacet(self.shoes, 1, 1, Decimal("30.00"), Decimal("30.00"))
+
+    def test_delete_removes_item_from_facet(self):
+        item = self.create("30.00")
+        self.create("10.00")
+
+        StoreService().delete_item(str(item.id))
+        self.assertFacet(self.shirts, 1, 1, Decimal("10.00"), Decimal("10.00"))
+
+        Item.objects.all().delete()
+        self.assertFacet(self.shirts, 0, 0, None, None)
+
+    def test_incremental_matches_rebuild(self):
+        random.seed(7)
+        categories = [self.shirts, self.shoes, None]
+        items = []
+
+        for _ in range(60):
+            action = random.random()
+            if action < 0.5 or not items:
+                items.append(self.create(f"{random.randint(1, 50)}.00", random.randint(0, 2), random.choice(categories)))
+            elif action < 0.8:
+                item = Item.objects.get(id=random.choice(items).id)
+                item.price = Decimal(random.randint(1, 50))
+                item.stock = random.randint(0, 2)
+                item.category = random.choice(categories)
+                item.save()
+            else:
+                Item.objects.filter(id=items.pop(random.randrange(len(items))).id).delete()
+
+        incremental = list(CategoryFacet.objects.order_by("category_id").values())
+        CategoryFacetService.rebuild()
+        rebuilt = list(CategoryFacet.objects.order_by("category_id").values())
+
+        for facet in incremental + rebuilt:
+            facet.pop("updated_at")
+        self.assertEqual(incremental, rebuilt)
+
+    def test_saves_from_stale_instances_start_from_the_current_row(self):
+        self.create("10.00")
+        item = self.create("30.00")
+        # Dois pedidos carregaram o mesmo item antes de qualquer um gravar
+        first, second = Item.objects.get(id=item.id), Item.objects.get(id=item.id)
+
+        first.stock = 0
+        first.save()
+        second.category = self.shoes
+        second.save()
+        stale = Item.objects.get(id=item.id)
+        first.delete()
+        # O delete de uma instância antiga não volta a descontar o item
+        stale.delete()
+
+        self.assertFacet(self.shirts, 1, 1, Decimal("10.00"), Decimal("10.00"))
+        self.assertFacet(self.shoes, 0, 0, None, None)
+
+    def test_facets_endpoint_reads_the_aggregate_table(self):
+        self.create("10.00")
+        self.create("20.00", stock=0, category=self.shoes)
+
+        with self.assertNumQueries(1):
+            response = APIClient().get("/api/v1/store/categories/facets/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [
+            {"id": str(self.shirts.id), "name": "Camisas", "item_count": 1, "in_stock_count": 1, "min_price": "10.00", "max_price": "10.00"},
+            {"id": str(self.shoes.id), "name": "Sapatos", "item_count": 1, "in_stock_count": 0, "min_price": "20.00", "max_price": "20.00"},
+        ])
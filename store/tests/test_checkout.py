@@ -0,0 +1,137 @@
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+from store.infra.respository import StoreRepository
+from store.models import CartItem, Item, Order, StockReservation
+from store.services.payment_service import PaymentService
+
+SHIPPING = {
+    "payment_method": "ATM", "first_name": "Romeu", "last_name": "Cajamba", "city": "Luanda",
+    "country": "Angola", "street_address": "Sambizanga", "house_number": "13",
+    "phone": "123456789", "email": "romeu@example.com",
+}
+
+
+class TestCheckout(TestCase):
+    """
+    Testes do checkout do carrinho inteiro numa única encomenda.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="checkout", password="checkout-password")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.shirt = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=5)
+        self.shoes = Item.objects.create(name="Sapatilha", price=Decimal("59.90"), stock=1)
+        CartItem.objects.create(user=self.user, item=self.shirt, quantity=3)
+        CartItem.objects.create(user=self.user, item=self.shoes, quantity=1)
+
+    def stock(self):
+        return dict(Item.objects.values_list("name", "stock"))
+
+    def test_checkout_turns_the_cart_into_one_order(self):
+        response = self.client.post("/api/v1/store/checkout/", SHIPPING)
+
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(response.json()["status"], Order.PENDING)
+
+        order = Order.objects.get()
+        self.assertEqual(response.json()["id"], str(order.id))
+        self.assertEqual(order.total_price, Decimal("89.90"))
+        self.assertEqual(
+            sorted((line["item"], line["quantity"], line["unit_price"]) for line in response.json()["items"]),
+            sorted([(str(self.shirt.id), 3, "10.00"), (str(self.shoes.id), 1, "59.90")]),
+        )
+        # Stock reservado e carrinho esvaziado logo, na transação da encomenda
+        self.assertEqual(self.stock(), {"Camisa": 2, "Sapatilha": 0})
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+
+        with patch("store.helpers.payment_gateway.PaymentGateway.process_payment", return_value=True) as payment:
+            PaymentService().process_due()
+
+        payment.assert_called_once_with(method="ATM", amount=89.90, reference=str(order.payment.id), timeout=10)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.PAID)
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+        self.assertEqual(set(StockReservation.objects.values_list("status", flat=True)), {StockReservation.CONSUMED})
+
+    def test_one_line_without_stock_fails_the_whole_checkout(self):
+        Item.objects.filter(id=self.shoes.id).update(stock=0)
+
+        response = self.client.post("/api/v1/store/checkout/", SHIPPING)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stock(), {"Camisa": 5, "Sapatilha": 0})
+        self.assertEqual(CartItem.objects.filter(user=self.user).count(), 2)
+        self.assertFalse(Order.objects.exists())
+
+    def test_conditional_decrement_is_all_or_nothing(self):
+        with transaction.atomic():
+            sid = transaction.savepoint()
+            rows = StoreRepository().decrement_stock_many({self.shirt.id: 2, self.shoes.id: 2})
+            transaction.savepoint_rollback(sid)
+
+        self.assertIsNone(rows)
+        self.assertEqual(self.stock(), {"Camisa": 5, "Sapatilha": 1})
+
+    def test_failed_payment_returns_the_stock(self):
+        self.client.post("/api/v1/store/checkout/", SHIPPING)
+
+        with patch("store.helpers.payment_gateway.PaymentGateway.process_payment", return_value=False):
+            PaymentService().process_due()
+
+        self.assertEqual(Order.objects.get().status, Order.FAILED)
+        self.assertEqual(self.stock(), {"Camisa": 5, "Sapatilha": 1})
+        self.assertEqual(CartItem.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(set(StockReservation.objects.values_list("status", flat=True)), {StockReservation.RELEASED})
+
+    def test_second_checkout_of_the_same_cart_is_rejected(self):
+        self.assertEqual(self.client.post("/api/v1/store/checkout/", SHIPPING).status_code, 202)
+
+        response = self.client.post("/api/v1/store/checkout/", SHIPPING)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.stock(), {"Camisa": 2, "Sapatilha": 0})
+
+    def test_lines_added_after_checkout_stay_in_the_cart(self):
+        self.client.post("/api/v1/store/checkout/", SHIPPING)
+        CartItem.objects.create(user=self.user, item=self.shirt, quantity=1)
+
+        with patch("store.helpers.payment_gateway.PaymentGateway.process_payment", return_value=True):
+            PaymentService().process_due()
+
+        self.assertEqual(list(CartItem.objects.filter(user=self.user).values_list("item_id", "quantity")), [(self.shirt.id, 1)])
+
+    def test_failed_payment_adds_the_lines_back_to_the_current_cart(self):
+        self.client.post("/api/v1/store/checkout/", SHIPPING)
+        CartItem.objects.create(user=self.user, item=self.shirt, quantity=1)
+
+        with patch("store.helpers.payment_gateway.PaymentGateway.process_payment", return_value=False):
+            PaymentService().process_due()
+
+        self.assertEqual(
+            dict(CartItem.objects.filter(user=self.user).values_list("item_id", "quantity")),
+            {self.shirt.id: 4, self.shoes.id: 1},
+        )
+
+    def test_cart_changed_after_it_was_read(self):
+        lines = StoreRepository().list_cart_for_checkout(self.user)
+        CartItem.objects.filter(item=self.shirt).update(quantity=4)
+
+        with transaction.atomic():
+            self.assertFalse(StoreRepository().remove_checked_out_cart_lines(self.user, lines))
+            transaction.set_rollback(True)
+
+        self.assertEqual(CartItem.objects.filter(user=self.user).count(), 2)
+
+    def test_empty_cart(self):
+        CartItem.objects.all().delete()
+        response = self.client.post("/api/v1/store/checkout/", SHIPPING)
+        self.assertEqual(response.status_code, 400)
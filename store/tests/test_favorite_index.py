@@ -0,0 +1,219 @@
+from decimal import Decimal
+from fnmatch import fnmatch
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from redis.exceptions import ConnectionError as RedisConnectionError, WatchError
+from rest_framework.test import APIClient
+from store.models import Favorite, Item
+from store.services.favorite_index_service import FavoriteIndexService, favorite_index_service
+
+
+class FakeRedis:
+    """Os comandos de set que o índice usa, em memória (os testes correm sem servidor Redis)."""
+
+    def __init__(self):
+        self.sets = {}
+        self.counters = {}
+
+    def smismember(self, key, values):
+        members = self.sets.get(key, set())
+        return [int(value in members) for value in values]
+
+    def sadd(self, key, *values):
+        self.sets.setdefault(key, set()).update(values)
+
+    def srem(self, key, *values):
+        self.sets.get(key, set()).difference_update(values)
+
+    def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+
+    def delete(self, *keys):
+        for key in keys:
+            key = key.decode() if isinstance(key, bytes) else key
+            self.sets.pop(key, None)
+            self.counters.pop(key, None)
+
+    def expire(self, key, seconds):
+        pass
+
+    def scan_iter(self, match, count=None):
+        return [key.encode() for key in [*self.sets, *self.counters] if fnmatch(key, match)]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis, self.watched, self.commands = redis, {}, None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def watch(self, *keys):
+        for key in keys:
+            self.watched[key] = self.snapshot(key)
+
+    def snapshot(self, key):
+        return set(self.redis.sets.get(key, set())), self.redis.counters.get(key)
+
+    def multi(self):
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        if any(self.snapshot(key) != value for key, value in self.watched.items()):
+            raise WatchError("Watched variable changed")
+        for name, args in self.commands:
+            getattr(self.redis, name)(*args)
+
+
+class TestFavoriteIndex(TestCase):
+    """
+    Testes do índice de favoritos no Redis e do lookup em bloco.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="fan", password="fan-password")
+
+    def setUp(self):
+        self.items = [Item.objects.create(name=f"Camisa {i}", price=Decimal("10.00"), stock=1) for i in range(3)]
+        self.redis = FakeRedis()
+        redis = patch.object(favorite_index_service, "_redis", self.redis)
+        redis.start()
+        self.addCleanup(redis.stop)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def key(self):
+        return f"favorites:{self.user.pk}"
+
+    def lookup(self, items):
+        response = self.client.post(
+            "/api/v1/store/favorites/lookup/", {"item_ids": [str(item.id) for item in items]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["results"]
+
+    def favorite(self, item):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/api/v1/store/favorites/?item_id={item.id}")
+
+    def test_add_favorite_creates_the_row_once(self):
+        self.assertEqual(self.favorite(self.items[0]).status_code, 201)
+        self.assertEqual(self.favorite(self.items[0]).status_code, 201)
+
+        self.assertEqual(Favorite.objects.filter(user=self.user, item=self.items[0]).count(), 1)
+
+    def test_first_lookup_builds_the_set_and_the_next_ones_skip_the_database(self):
+        Favorite.objects.create(user=self.user, item=self.items[1])
+
+        first, second, third = (str(item.id) for item in self.items)
+        self.assertEqual(self.lookup(self.items), {first: False, second: True, third: False})
+        self.assertEqual(self.redis.sets[self.key()], {FavoriteIndexService.READY, second})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(favorite_index_service.lookup(self.user.pk, [first, second]), {first: False, second: True})
+
+    def test_add_and_remove_keep_the_set_in_sync(self):
+        self.lookup(self.items)
+
+        self.favorite(self.items[0])
+        self.assertEqual(self.lookup(self.items[:1]), {str(self.items[0].id): True})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/v1/store/favorites/remove/?item_id={self.items[0].id}")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.lookup(self.items[:1]), {str(self.items[0].id): False})
+
+    def test_write_before_the_set_exists_does_not_make_it_complete(self):
+        Favorite.objects.create(user=self.user, item=self.items[1])
+        self.favorite(self.items[0])
+
+        result = self.lookup(self.items[:2])
+
+        self.assertEqual(result, {str(self.items[0].id): True, str(self.items[1].id): True})
+
+    def test_concurrent_write_during_a_rebuild_wins(self):
+        service = FavoriteIndexService(client=self.redis)
+        late = str(self.items[2].id)
+
+        def read_then_write(user):
+            # Um favorito gravado por outro pedido entre a leitura do banco e a escrita do set
+            self.redis.sadd(self.key(), late)
+            return []
+
+        with patch.object(service.store_repository, "list_favorite_item_ids", side_effect=read_then_write):
+            service.rebuild(self.user.pk)
+
+        self.assertEqual(self.redis.sets[self.key()], {late})
+
+    def test_concurrent_remove_during_a_rebuild_wins(self):
+        service = FavoriteIndexService(client=self.redis)
+        removed = str(self.items[0].id)
+
+        def read_then_remove(user):
+            # A remoção é gravada e aplicada entre a leitura do banco e a escrita do set (que ainda não existe)
+            service._apply("srem", self.user.pk, removed)
+            return [removed]
+
+        with patch.object(service.store_repository, "list_favorite_item_ids", side_effect=read_then_remove):
+            service.rebuild(self.user.pk)
+
+        self.assertNotIn(self.key(), self.redis.sets)
+
+    def test_failed_update_drops_the_set(self):
+        self.favorite(self.items[0])
+        self.lookup(self.items)
+
+        with patch.object(self.redis, "srem", side_effect=RedisConnectionError("timeout")):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f"/api/v1/store/favorites/remove/?item_id={self.items[0].id}")
+
+        self.assertNotIn(self.key(), self.redis.sets)
+        self.assertEqual(self.lookup(self.items[:1]), {str(self.items[0].id): False})
+
+    def test_falls_back_to_the_database(self):
+        Favorite.objects.create(user=self.user, item=self.items[0])
+        expected = {str(self.items[0].id): True, str(self.items[1].id): False}
+
+        self.assertEqual(FavoriteIndexService(client=None).lookup(self.user, [item.id for item in self.items[:2]]), expected)
+
+        with patch.object(self.redis, "smismember", side_effect=RedisConnectionError("down")):
+            self.assertEqual(self.lookup(self.items[:2]), expected)
+
+    @override_settings(FAVORITE_LOOKUP_MAX_IDS=2)
+    def test_lookup_limits(self):
+        response = self.client.post(
+            "/api/v1/store/favorites/lookup/", {"item_ids": [str(item.id) for item in self.items]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/api/v1/store/favorites/lookup/", {"item_ids": ["not-a-uuid"]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_command(self):
+        Favorite.objects.create(user=self.user, item=self.items[0])
+        self.redis.sets["favorites:gone"] = {FavoriteIndexService.READY, "stale"}
+
+        with patch("store.management.commands.rebuild_favorite_index.FavoriteIndexService", return_value=FavoriteIndexService(client=self.redis)):
+            out = StringIO()
+            call_command("rebuild_favorite_index", stdout=out)
+
+        self.assertIn("rebuilt for 1 users", out.getvalue())
+        self.assertEqual(self.redis.sets, {self.key(): {FavoriteIndexService.READY, str(self.items[0].id)}})
+
+    def test_rebuild_command_without_redis(self):
+        with self.assertRaises(CommandError):
+            call_command("rebuild_favorite_index", stdout=StringIO())
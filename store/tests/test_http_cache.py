@@ -0,0 +1,103 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from store.models import Category, Item
+from store.services.inventory_service import InventoryService
+from store.services.store_service import StoreService
+from users.infra.userRepository import UserRepository
+from users.models import User
+from users.services.auth_service import AuthService
+
+
+class TestCatalogResponseCache(TestCase):
+    """
+    Testes da cache de respostas renderizadas do catálogo com ETag / 304.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=3)
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get("/api/v1/store/items/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/v1/store/items/")
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertIn("max-age", second["Cache-Control"])
+
+    def test_if_none_match_returns_304_without_queries(self):
+        etag = self.client.get(f"/api/v1/store/items/{self.item.id}/")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/api/v1/store/items/{self.item.id}/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_query_string_is_part_of_the_key(self):
+        page = self.client.get("/api/v1/store/items/", {"limit": 1})
+        other = self.client.get("/api/v1/store/items/", {"limit": 2})
+        self.assertNotEqual(page["ETag"], other["ETag"])
+
+    def test_catalog_write_moves_version_forward(self):
+        etag = self.client.get("/api/v1/store/featured/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StoreService().update_item(str(self.item.id), {"name": "Camisa nova"})
+
+        response = self.client.get("/api/v1/store/featured/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()[0]["name"], "Camisa nova")
+
+    def assertRefreshed(self, path, etag):
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        return response.json()
+
+    def test_stock_change_moves_version_forward(self):
+        path = f"/api/v1/store/items/{self.item.id}/"
+        etag = self.client.get(path)["ETag"]
+        buyer = get_user_model().objects.create_user(username="buyer", password="buyer-password")
+
+        # Uma compra normal: o item continua em stock
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryService().reserve(buyer, self.item.id, 1)
+
+        self.assertEqual(self.assertRefreshed(path, etag)["stock"], 2)
+
+    def test_orm_and_category_writes_move_version_forward(self):
+        path = f"/api/v1/store/items/{self.item.id}/"
+        category = Category.objects.create(name="Camisas")
+
+        # Gravação fora do StoreService (admin, shell)
+        etag = self.client.get(path)["ETag"]
+        self.item.category = category
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.save()
+        self.assertEqual(self.assertRefreshed(path, etag)["category"]["name"], "Camisas")
+
+        etag = self.client.get(path)["ETag"]
+        category.name = "Camisolas"
+        with self.captureOnCommitCallbacks(execute=True):
+            category.save()
+        self.assertEqual(self.assertRefreshed(path, etag)["category"]["name"], "Camisolas")
+
+    def test_not_found_is_not_cached(self):
+        response = self.client.get("/api/v1/store/items/00000000-0000-0000-0000-000000000000/")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        user = User.objects.create(name="Romeu", email="romeu@example.com", password="hash", is_active=True)
+        token = AuthService(UserRepository()).create_access_token(str(user.id))
+        response = self.client.get("/api/v1/store/items/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,166 @@
+import threading
+import time
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from store.models import CartItem, IdempotencyRecord, Item, Purchase
+from store.services.idempotency_service import CacheIdempotencyStore, IdempotencyService
+
+PURCHASE = {
+    "quantity": 1, "payment_method": "ATM", "first_name": "Romeu", "last_name": "Cajamba",
+    "city": "Luanda", "country": "Angola", "street_address": "Sambizanga", "house_number": "13",
+    "phone": "123456789", "email": "romeu@example.com",
+}
+
+
+class TestIdempotencyKey(TestCase):
+    """
+    Testes do header Idempotency-Key nos endpoints de escrita.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="retry", password="retry-password")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=10)
+
+    def add_to_cart(self, key, quantity=1):
+        return self.client.post(
+            "/api/v1/store/cart/", {"item_id": str(self.item.id), "quantity": quantity}, HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_returns_the_first_response_without_executing_again(self):
+        first = self.add_to_cart("abc")
+
+        with self.assertNumQueries(0):
+            retry = self.add_to_cart("abc")
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+        self.assertEqual(CartItem.objects.get().quantity, 1)
+
+    def test_new_key_executes_again(self):
+        self.add_to_cart("abc")
+        self.add_to_cart("def")
+        self.assertEqual(CartItem.objects.get().quantity, 2)
+
+    def test_key_reused_with_different_payload(self):
+        self.add_to_cart("abc", quantity=1)
+        response = self.add_to_cart("abc", quantity=2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["error"]["code"], "idempotency_key_reused")
+
+    def test_purchase_is_not_created_twice(self):
+        payload = {**PURCHASE, "item": str(self.item.id)}
+
+        first = self.client.post("/api/v1/store/purchase/", payload, HTTP_IDEMPOTENCY_KEY="order-1")
+        retry = self.client.post("/api/v1/store/purchase/", payload, HTTP_IDEMPOTENCY_KEY="order-1")
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(retry.json()["id"], first.json()["id"])
+        self.assertEqual(Purchase.objects.count(), 1)
+        self.assertEqual(Item.objects.get().stock, 9)
+
+    def test_failed_request_can_be_retried(self):
+        payload = {**PURCHASE, "item": str(self.item.id), "quantity": 11}
+
+        failed = self.client.post("/api/v1/store/purchase/", payload, HTTP_IDEMPOTENCY_KEY="order-2")
+        Item.objects.filter(id=self.item.id).update(stock=20)
+        retry = self.client.post("/api/v1/store/purchase/", payload, HTTP_IDEMPOTENCY_KEY="order-2")
+
+        self.assertEqual(failed.status_code, 400)
+        self.assertEqual(retry.status_code, 202)
+
+    def test_keys_are_scoped_per_user(self):
+        self.add_to_cart("shared")
+
+        other = get_user_model().objects.create_user(username="other", password="other-password")
+        self.client.force_authenticate(other)
+        self.add_to_cart("shared")
+
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_database_fallback_when_cache_is_down(self):
+        with patch.object(CacheIdempotencyStore, "get", side_effect=ConnectionError("redis down")):
+            first = self.add_to_cart("abc")
+            retry = self.add_to_cart("abc")
+
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(IdempotencyRecord.objects.get().state, IdempotencyRecord.DONE)
+        self.assertEqual(CartItem.objects.get().quantity, 1)
+
+    def test_cache_failure_after_the_write_returns_the_response_and_keeps_it(self):
+        with patch.object(CacheIdempotencyStore, "complete", side_effect=ConnectionError("redis down")):
+            first = self.client.post("/api/v1/store/purchase/", {**PURCHASE, "item": str(self.item.id)}, HTTP_IDEMPOTENCY_KEY="abc")
+
+        self.assertEqual(first.status_code, 202, first.content)
+        self.assertEqual(IdempotencyRecord.objects.get().state, IdempotencyRecord.DONE)
+
+        # O claim PENDING no Redis expira; a repetição encontra a resposta na tabela
+        cache.clear()
+        retry = self.client.post("/api/v1/store/purchase/", {**PURCHASE, "item": str(self.item.id)}, HTTP_IDEMPOTENCY_KEY="abc")
+
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Purchase.objects.count(), 1)
+
+    def test_claim_falls_back_to_the_database(self):
+        with patch.object(CacheIdempotencyStore, "claim", side_effect=ConnectionError("redis down")):
+            self.add_to_cart("abc")
+
+        self.assertEqual(IdempotencyRecord.objects.get().state, IdempotencyRecord.DONE)
+        self.assertEqual(self.add_to_cart("abc")["Idempotent-Replayed"], "true")
+        self.assertEqual(CartItem.objects.get().quantity, 1)
+
+
+class TestIdempotencyConcurrency(TestCase):
+    """
+    Duplicados simultâneos esperam pelo pedido original em vez de o executarem outra vez.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_duplicates_wait_for_the_in_flight_result(self):
+        service = IdempotencyService()
+        calls = []
+        results = []
+
+        def execute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 201, {"id": len(calls)}
+
+        def worker():
+            results.append(service.run("key", "fingerprint", execute))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(replayed for _, _, replayed in results), [False, True, True, True, True])
+        self.assertEqual({str(data) for _, data, _ in results}, {"{'id': 1}"})
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.1)
+    def test_gives_up_waiting_with_conflict(self):
+        service = IdempotencyService()
+        CacheIdempotencyStore().claim("key", "fingerprint", timeout=60)
+
+        with self.assertRaises(Exception) as raised:
+            service.run("key", "fingerprint", lambda: (201, {}))
+
+        self.assertEqual(raised.exception.status_code, 409)
@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+from store.helpers.image_variants import render_variants
+from store.models import Item
+from store.serializers import ItemSerializer
+from store.services.image_variant_service import ImageVariantService
+
+
+def make_image(size=(1600, 1200), color=(200, 30, 30), image_format="JPEG", mode="RGB"):
+    out = BytesIO()
+    Image.new(mode, size, color).save(out, image_format)
+    return out.getvalue()
+
+
+class TestRenderVariants(TestCase):
+    """
+    Testes da geração das variantes (sem banco nem storage).
+    """
+
+    def test_renders_every_variant_within_its_size(self):
+        variants = render_variants(make_image())
+
+        expected = {
+            "medium": ("JPEG", 800), "medium_webp": ("WEBP", 800),
+            "thumbnail": ("JPEG", 200), "thumbnail_webp": ("WEBP", 200),
+        }
+        self.assertEqual(set(variants), set(expected))
+        for name, (image_format, size) in expected.items():
+            with Image.open(BytesIO(variants[name])) as image:
+                self.assertEqual(image.format, image_format)
+                self.assertEqual(max(image.size), size)
+                self.assertEqual(image.size[0] * 3, image.size[1] * 4)
+
+    def test_small_images_are_not_upscaled(self):
+        variants = render_variants(make_image(size=(120, 90)))
+
+        with Image.open(BytesIO(variants["medium"])) as image:
+            self.assertEqual(image.size, (120, 90))
+
+    def test_transparent_png(self):
+        variants = render_variants(make_image(color=(0, 0, 0, 0), image_format="PNG", mode="RGBA"))
+
+        with Image.open(BytesIO(variants["thumbnail"])) as image:
+            self.assertEqual(image.getpixel((10, 10)), (255, 255, 255))
+        with Image.open(BytesIO(variants["thumbnail_webp"])) as image:
+            self.assertEqual(image.mode, "RGBA")
+
+    def test_invalid_image(self):
+        with self.assertRaises(ValueError):
+            render_variants(b"not an image")
+
+
+class TestImageVariantService(TestCase):
+    """
+    Testes do gerador de variantes das imagens dos itens.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        settings = override_settings(MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+        self.service = ImageVariantService()
+
+    def create_item(self, content, name="Camisa"):
+        item = Item(name=name, price=Decimal("10.00"), stock=1)
+        item.image.save("camisa.jpg", ContentFile(content), save=False)
+        item.save()
+        return item
+
+    def test_generates_variants_and_exposes_urls(self):
+        item = self.create_item(make_image())
+        self.assertIsNone(ItemSerializer(item).data["image_variants"])
+
+        self.assertEqual(self.service.process_pending(), 1)
+
+        item.refresh_from_db()
+        self.assertEqual(set(item.image_variants), {"medium", "medium_webp", "thumbnail", "thumbnail_webp"})
+        for path in item.image_variants.values():
+            self.assertTrue(default_storage.exists(path))
+        urls = ItemSerializer(item).data["image_variants"]
+        self.assertEqual(urls["thumbnail_webp"], default_storage.url(item.image_variants["thumbnail_webp"]))
+        self.assertEqual(self.service.process_pending(), 0)
+
+    def test_same_image_is_rendered_once(self):
+        content = make_image()
+        first = self.create_item(content)
+        self.service.process_pending()
+
+        second = self.create_item(content, name="Outra camisa")
+        with patch("store.services.image_variant_service.render_variants") as render:
+            self.service.process_pending()
+        render.assert_not_called()
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image_variants, second.image_variants)
+
+    def test_new_image_resets_variants(self):
+        item = self.create_item(make_image())
+        self.service.process_pending()
+        item = Item.objects.get(id=item.id)
+
+        item.name = "Camisa azul"
+        item.save()
+        item.refresh_from_db()
+        self.assertIsNotNone(item.image_variants)
+
+        item.image.save("azul.jpg", ContentFile(make_image(color=(30, 30, 200))), save=True)
+        item.refresh_from_db()
+        self.assertIsNone(item.image_variants)
+
+        self.service.process_pending()
+        item.refresh_from_db()
+        self.assertIn(os.path.basename(os.path.dirname(item.image_variants["medium"])), item.image_variants["thumbnail"])
+
+    def test_invalid_image_is_marked_as_failed(self):
+        item = self.create_item(b"not an image")
+
+        self.assertEqual(self.service.process_pending(), 1)
+
+        item.refresh_from_db()
+        self.assertEqual(item.image_variants, {})
+        self.assertEqual(ItemSerializer(item).data["image_variants"], {})
+        self.assertEqual(self.service.process_pending(), 0)
+
+    def test_image_replaced_while_rendering_is_not_overwritten(self):
+        item = self.create_item(make_image())
+
+        def replace_image(data):
+            Item.objects.filter(id=item.id).update(image="items/other.jpg")
+            return render_variants(data)
+
+        with patch("store.services.image_variant_service.render_variants", side_effect=replace_image):
+            self.service.process_pending()
+
+        item.refresh_from_db()
+        self.assertIsNone(item.image_variants)
+
+    def test_items_without_image_are_skipped(self):
+        Item.objects.create(name="Sem imagem", price=Decimal("5.00"), stock=1)
+
+        self.assertEqual(self.service.process_pending(), 0)
+
+    def test_uses_the_executor(self):
+        self.create_item(make_image())
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            self.assertEqual(ImageVariantService(executor=pool).process_pending(), 1)
+        self.assertFalse(Item.objects.filter(image_variants__isnull=True).exists())
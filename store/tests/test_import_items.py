@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from store.models import Category, CategoryFacet, Item
+from store.services.cache_service import ProductCacheService
+from store.services.catalog_cache_service import CatalogCacheService
+from store.services.item_import_service import ItemImportService
+from store.services.store_service import StoreService
+
+
+class TestImportItems(TestCase):
+    """
+    Testes do comando import_items (CSV/JSONL em lotes com upsert).
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w", encoding="utf-8") as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_items", path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import_creates_items_and_categories(self):
+        Category.objects.create(name="Camisas")
+        path = self.write(".csv", (
+            "name,description,price,stock,category\n"
+            "Camisa azul,\"Algodão, manga curta\",10.50,3,Camisas\n"
+            "Sapatilha,,59.90,0,Calçado\n"
+            "Boné,Sem categoria,5,1,\n"
+        ))
+
+        out, _ = self.run_import(path, "--batch-size", "2")
+
+        self.assertIn("Imported 3 items", out)
+        self.assertEqual(Item.objects.count(), 3)
+        self.assertEqual(Category.objects.count(), 2)
+        shirt = Item.objects.get(name="Camisa azul")
+        self.assertEqual((shirt.price, shirt.stock, shirt.category.name), (Decimal("10.50"), 3, "Camisas"))
+        self.assertEqual(CategoryFacet.objects.get(category__name="Calçado").in_stock_count, 0)
+        self.assertEqual([item.name for item in StoreService().search_items("algodao")[0]], ["Camisa azul"])
+
+    def test_reimport_updates_instead_of_duplicating(self):
+        path = self.write(".jsonl", json.dumps({"name": "Camisa", "price": "10.00", "stock": 1, "category": "Camisas"}) + "\n")
+        self.run_import(path)
+        created_at = Item.objects.get().created_at
+
+        path = self.write(".jsonl", json.dumps({"name": "Camisa", "price": "12.00", "stock": 4, "category": "Camisas"}) + "\n")
+        self.run_import(path)
+
+        item = Item.objects.get()
+        self.assertEqual((item.price, item.stock, item.created_at), (Decimal("12.00"), 4, created_at))
+        self.assertEqual(CategoryFacet.objects.get(category=item.category).max_price, Decimal("12.00"))
+
+    def test_invalid_rows_are_skipped_and_reported(self):
+        path = self.write(".jsonl", "\n".join([
+            json.dumps({"name": "Camisa", "price": "10.00", "stock": 1}),
+            "not json",
+            json.dumps({"name": "", "price": "1"}),
+            json.dumps({"name": "Calça", "price": "abc"}),
+            json.dumps({"name": "Meias", "price": "2.00", "stock": -1}),
+        ]))
+
+        out, err = self.run_import(path)
+
+        self.assertEqual(list(Item.objects.values_list("name", flat=True)), ["Camisa"])
+        self.assertIn("4 rows skipped", out)
+        self.assertIn("line 2: Invalid row", err)
+        self.assertIn("line 4: Invalid price", err)
+
+    def test_caches_are_invalidated_once_at_the_end(self):
+        self.assertEqual(ProductCacheService.get_featured_products(), [])
+        rows = ((i, {"name": f"Item {i}", "price": "1.00", "stock": 1}) for i in range(5))
+
+        with patch.object(ProductCacheService, "invalidate", wraps=ProductCacheService.invalidate) as invalidate, \
+                patch.object(CatalogCacheService, "bump") as bump:
+            imported = ItemImportService(batch_size=2).run(rows)
+
+        self.assertEqual(imported, 5)
+        invalidate.assert_called_once()
+        bump.assert_called_once()
+        self.assertEqual(len(ProductCacheService.get_featured_products()), 5)
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+from store.models import CartItem, Category, Favorite, Item, Purchase
+
+
+class TestAccessPathIndexes(TestCase):
+    """
+    Confirma com EXPLAIN que as consultas principais da loja usam os índices compostos.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="explain", password="explain-password")
+        cls.category = Category.objects.create(name="Camisas")
+        cls.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=5, category=cls.category)
+
+    def assertUsesIndex(self, queryset, index_name):
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Com tabelas pequenas o planner prefere seq scan; forçamos a escolha de um índice
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+
+        self.assertIn(index_name, plan, plan)
+
+    def test_item_keyset_page(self):
+        since = timezone.now() - timedelta(days=1)
+        queryset = Item.objects.filter(created_at__gt=since).order_by("created_at", "id")[:20]
+        self.assertUsesIndex(queryset, "store_item_created_id_idx")
+
+    def test_items_by_category(self):
+        queryset = Item.objects.filter(category=self.category).order_by("created_at")[:20]
+        self.assertUsesIndex(queryset, "store_item_cat_created_idx")
+
+    def test_purchase_history(self):
+        queryset = Purchase.objects.filter(user=self.user).order_by("-created_at")[:20]
+        self.assertUsesIndex(queryset, "store_purch_history_idx")
+
+    def test_favorites_by_user(self):
+        queryset = Favorite.objects.filter(user=self.user).order_by("-created_at")[:20]
+        self.assertUsesIndex(queryset, "store_fav_user_created_idx")
+
+    def test_cart_item_is_unique_per_user_and_item(self):
+        CartItem.objects.create(user=self.user, item=self.item, quantity=1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CartItem.objects.create(user=self.user, item=self.item, quantity=2)
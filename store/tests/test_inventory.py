@@ -0,0 +1,151 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from store.models import Category, CategoryFacet, Item, StockReservation
+from store.services.inventory_service import InventoryService
+from store.services.item_cache_service import item_cache_service
+from store.services.payment_service import PaymentService
+
+
+class TestInventoryService(TestCase):
+    """
+    Testes das reservas de stock (UPDATE condicional, prazo e sweeper).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="stock", password="stock-password")
+        cls.category = Category.objects.create(name="Camisas")
+
+    def setUp(self):
+        cache.clear()
+        self.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=3, category=self.category)
+        self.inventory = InventoryService()
+
+    def stock(self):
+        return Item.objects.values_list("stock", flat=True).get(id=self.item.id)
+
+    def test_reserve_takes_units_from_stock(self):
+        reservation = self.inventory.reserve(self.user, self.item.id, 2, ttl=60)
+
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(reservation.status, StockReservation.ACTIVE)
+        self.assertAlmostEqual(reservation.expires_at, timezone.now() + timedelta(seconds=60), delta=timedelta(seconds=5))
+
+    def test_reserve_never_oversells(self):
+        self.inventory.reserve(self.user, self.item.id, 2)
+
+        with self.assertRaisesMessage(ValueError, "Not enough stock"):
+            self.inventory.reserve(self.user, self.item.id, 2)
+
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(StockReservation.objects.count(), 1)
+
+    def test_release_returns_units_once(self):
+        reservation = self.inventory.reserve(self.user, self.item.id, 2)
+
+        self.assertTrue(self.inventory.release(reservation))
+        self.assertFalse(self.inventory.release(reservation))
+
+        self.assertEqual(self.stock(), 3)
+        with self.assertRaisesMessage(ValueError, "Reservation expired"):
+            self.inventory.commit(reservation)
+
+    def test_sweeper_releases_only_expired_active_reservations(self):
+        expired = self.inventory.reserve(self.user, self.item.id, 1, ttl=-1)
+        consumed = self.inventory.reserve(self.user, self.item.id, 1, ttl=-1)
+        self.inventory.commit(consumed)
+        active = self.inventory.reserve(self.user, self.item.id, 1, ttl=600)
+
+        out = StringIO()
+        call_command("release_expired_reservations", stdout=out)
+
+        self.assertIn("1 expired reservations released", out.getvalue())
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(
+            dict(StockReservation.objects.values_list("id", "status")),
+            {expired.id: StockReservation.RELEASED, consumed.id: StockReservation.CONSUMED, active.id: StockReservation.ACTIVE},
+        )
+
+    def test_stock_changes_refresh_facets_and_item_cache(self):
+        self.assertEqual(item_cache_service.get(str(self.item.id))["stock"], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = self.inventory.reserve(self.user, self.item.id, 3)
+
+        self.assertEqual(item_cache_service.get(str(self.item.id))["stock"], 0)
+        self.assertEqual(CategoryFacet.objects.get(category=self.category).in_stock_count, 0)
+
+        self.inventory.release(reservation)
+        self.assertEqual(CategoryFacet.objects.get(category=self.category).in_stock_count, 1)
+
+    def test_purchase_endpoint_decrements_stock(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = {
+            "item": str(self.item.id), "quantity": 2, "payment_method": "ATM",
+            "first_name": "Romeu", "last_name": "Cajamba", "city": "Luanda", "country": "Angola",
+            "street_address": "Sambizanga", "house_number": "13", "phone": "123456789", "email": "romeu@example.com",
+        }
+
+        self.assertEqual(client.post("/api/v1/store/purchase/", payload).status_code, 202)
+        self.assertEqual(client.post("/api/v1/store/purchase/", payload).status_code, 400)
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.ACTIVE)
+
+        PaymentService().process_due()
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.CONSUMED)
+
+
+class TestInventoryConcurrency(TransactionTestCase):
+    """
+    Compradores em paralelo no mesmo item: nunca se vende mais do que o stock.
+    """
+
+    BUYERS = 8
+    STOCK = 5
+
+    def test_concurrent_reservations_do_not_oversell(self):
+        user = get_user_model().objects.create_user(username="buyer", password="buyer-password")
+        item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=self.STOCK)
+        barrier = threading.Barrier(self.BUYERS)
+        results, errors = [], []
+
+        def reserve():
+            while True:
+                try:
+                    return InventoryService().reserve(user, item.id, 1)
+                except OperationalError as e:
+                    # A base SQLite de testes recusa escritas simultâneas em vez de esperar; a transação foi desfeita
+                    if connection.vendor != "sqlite" or "locked" not in str(e):
+                        raise
+
+        def buyer():
+            try:
+                barrier.wait()
+                results.append(reserve())
+            except ValueError:
+                results.append(None)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buyer) for _ in range(self.BUYERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len([r for r in results if r is not None]), self.STOCK)
+        self.assertEqual(Item.objects.get(id=item.id).stock, 0)
+        self.assertEqual(StockReservation.objects.count(), self.STOCK)
@@ -0,0 +1,88 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from store.helpers.two_tier_cache import LocalTTLCache
+from store.models import Category, Item
+from store.services.item_cache_service import ItemCacheService, item_cache_service
+
+
+class TestLocalTTLCache(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        local = LocalTTLCache(maxsize=2, ttl=60)
+        local.set("a", 1)
+        local.set("b", 2)
+        local.get("a")
+        local.set("c", 3)
+
+        self.assertEqual(local.get("a"), 1)
+        self.assertIsNone(local.get("b"))
+        self.assertEqual(local.get("c"), 3)
+
+    def test_expired_entries_are_dropped(self):
+        local = LocalTTLCache(maxsize=2, ttl=-1)
+        local.set("a", 1)
+        self.assertIsNone(local.get("a"))
+
+
+class TestItemCacheService(TestCase):
+    """
+    Testes da cache de detalhes de itens em dois níveis (LRU local + Redis).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Camisas")
+        self.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=3, category=self.category)
+        self.other = Item.objects.create(name="Calça", price=Decimal("20.00"), stock=1)
+        self.service = ItemCacheService()
+
+    def test_local_hit_skips_database(self):
+        self.service.get(self.item.id)
+        with self.assertNumQueries(0):
+            data = self.service.get(self.item.id)
+        self.assertEqual(data["category"]["name"], "Camisas")
+        self.assertEqual(self.service.stats()["hit_local"], 1)
+
+    def test_other_worker_reads_from_redis_tier(self):
+        self.service.get(self.item.id)
+        other_worker = ItemCacheService()
+        with self.assertNumQueries(0):
+            other_worker.get(self.item.id)
+        self.assertEqual(other_worker.stats()["hit_redis"], 1)
+
+    def test_save_invalidates_both_tiers_on_every_worker(self):
+        other_worker = ItemCacheService()
+        other_worker.get(self.item.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.price = Decimal("15.00")
+            self.item.save()
+
+        self.assertEqual(other_worker.get(self.item.id)["price"], "15.00")
+
+    def test_category_rename_invalidates_its_items(self):
+        self.service.get(self.item.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Camisolas"
+            self.category.save()
+        self.assertEqual(self.service.get(self.item.id)["category"]["name"], "Camisolas")
+
+    def test_get_many_loads_all_misses_in_one_query(self):
+        self.service.get(self.item.id)
+        with self.assertNumQueries(1):
+            data = self.service.get_many([self.item.id, self.other.id, self.other.id])
+        self.assertEqual(set(data), {str(self.item.id), str(self.other.id)})
+
+    def test_unknown_item_returns_none(self):
+        self.assertIsNone(self.service.get("00000000-0000-0000-0000-000000000000"))
+
+    def test_detail_endpoint_uses_cache(self):
+        item_cache_service.cache.local.clear()
+        client = APIClient()
+        client.get(f"/api/v1/store/items/{self.item.id}/")
+        with self.assertNumQueries(0):
+            response = client.get(f"/api/v1/store/items/{self.item.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "Camisa")
@@ -0,0 +1,79 @@
+from decimal import Decimal
+from django.test import TestCase
+from rest_framework.test import APIClient
+from store.helpers.pagination import decode_cursor, encode_cursor
+from store.infra.respository import StoreRepository
+from store.models import Item
+
+
+class TestKeysetPagination(TestCase):
+    """
+    Testes da paginação por cursor da listagem de itens.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Item.objects.bulk_create([
+            Item(name=f"Item {i}", price=Decimal("10.00"), stock=i) for i in range(25)
+        ])
+        cls.ordered_ids = list(Item.objects.order_by("created_at", "id").values_list("id", flat=True))
+
+    def setUp(self):
+        self.repository = StoreRepository()
+
+    def test_walks_forward_through_every_item_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page = self.repository.list_items(cursor=cursor, limit=10)
+            seen.extend(item.id for item in page.items)
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+
+        self.assertEqual(seen, self.ordered_ids)
+
+    def test_first_page_has_no_prev_cursor(self):
+        page = self.repository.list_items(limit=10)
+        self.assertIsNone(page.prev_cursor)
+        self.assertIsNotNone(page.next_cursor)
+
+    def test_prev_cursor_returns_previous_page(self):
+        first = self.repository.list_items(limit=10)
+        second = self.repository.list_items(cursor=first.next_cursor, limit=10)
+        back = self.repository.list_items(cursor=second.prev_cursor, limit=10)
+
+        self.assertEqual([i.id for i in back.items], [i.id for i in first.items])
+        self.assertIsNone(back.prev_cursor)
+        self.assertEqual(back.next_cursor, first.next_cursor)
+
+    def test_last_page_has_no_next_cursor(self):
+        first = self.repository.list_items(limit=20)
+        last = self.repository.list_items(cursor=first.next_cursor, limit=20)
+        self.assertEqual(len(last.items), 5)
+        self.assertIsNone(last.next_cursor)
+
+    def test_cursor_round_trip(self):
+        item = Item.objects.first()
+        created_at, id, direction = decode_cursor(encode_cursor(item.created_at, item.id, "next"))
+        self.assertEqual((created_at, id, direction), (item.created_at, str(item.id), "next"))
+
+    def test_invalid_cursor_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_endpoint_returns_cursors_and_limits_page_size(self):
+        client = APIClient()
+        response = client.get("/api/v1/store/items/", {"limit": 500})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 25)
+
+        response = client.get("/api/v1/store/items/", {"limit": 5})
+        body = response.json()
+        self.assertEqual(len(body["results"]), 5)
+        self.assertIsNotNone(body["next"])
+        self.assertIsNone(body["prev"])
+
+    def test_endpoint_rejects_invalid_cursor(self):
+        response = APIClient().get("/api/v1/store/items/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,240 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import MagicMock, patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from store.helpers.payment_gateway import FakePaymentGateway, PaymentGatewayError, PaymentTimeout
+from store.models import Item, Payment, Purchase, StockReservation
+from store.services.inventory_service import InventoryService
+from store.services.payment_service import PaymentService
+from store.services.store_service import StoreService
+
+SHIPPING = {
+    "first_name": "Romeu", "last_name": "Cajamba", "city": "Luanda", "country": "Angola",
+    "street_address": "Sambizanga", "house_number": "13", "phone": "123456789", "email": "romeu@example.com",
+}
+
+
+@override_settings(PAYMENT_MAX_ATTEMPTS=3, PAYMENT_RETRY_DELAY=2, PAYMENT_TIMEOUT=5)
+class TestPaymentPipeline(TestCase):
+    """
+    Testes do pipeline de pagamentos: PENDING -> PAID/FAILED, retries com backoff e leases dos workers.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="payer", password="payer-password")
+
+    def setUp(self):
+        self.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=5)
+        self.gateway = MagicMock()
+        self.payments = PaymentService(gateway=self.gateway)
+        self.store = StoreService(payments=self.payments)
+
+    def buy(self, quantity=2):
+        return self.store.purchase_item(self.user, str(self.item.id), quantity, "ATM", None, SHIPPING)
+
+    def stock(self):
+        return Item.objects.get(id=self.item.id).stock
+
+    def make_due(self):
+        Payment.objects.update(next_attempt_at=timezone.now())
+
+    def test_purchase_starts_pending_with_the_stock_reserved(self):
+        purchase = self.buy()
+
+        self.assertEqual(Purchase.objects.get().status, Purchase.PENDING)
+        self.assertEqual(purchase.payment.amount, Decimal("20.00"))
+        self.assertEqual(StockReservation.objects.get().payment, purchase.payment)
+        self.assertEqual(self.stock(), 3)
+        self.gateway.process_payment.assert_not_called()
+
+    def test_approved_payment(self):
+        purchase = self.buy()
+        self.gateway.process_payment.return_value = True
+
+        self.assertEqual(self.payments.process_due(), 1)
+
+        self.gateway.process_payment.assert_called_once_with(
+            method="ATM", amount=20.0, reference=str(purchase.payment.id), timeout=5
+        )
+        self.assertEqual(Purchase.objects.get().status, Purchase.PAID)
+        self.assertEqual(Payment.objects.get().status, Payment.PAID)
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.CONSUMED)
+        self.assertEqual(self.stock(), 3)
+        self.assertEqual(self.payments.process_due(), 0)
+
+    def test_declined_payment_fails_at_once_and_returns_the_stock(self):
+        self.buy()
+        self.gateway.process_payment.return_value = False
+
+        self.payments.process_due()
+
+        payment = Payment.objects.get()
+        self.assertEqual((payment.status, payment.attempts, payment.last_error), (Payment.FAILED, 1, "Payment declined"))
+        self.assertEqual(Purchase.objects.get().status, Purchase.FAILED)
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.RELEASED)
+        self.assertEqual(self.stock(), 5)
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        self.buy()
+        self.gateway.process_payment.side_effect = [PaymentTimeout("slow"), PaymentGatewayError("down"), True]
+
+        before = timezone.now()
+        self.payments.process_due()
+        payment = Payment.objects.get()
+        self.assertEqual((payment.status, payment.attempts, payment.last_error), (Payment.PENDING, 1, "slow"))
+        self.assertGreaterEqual(payment.next_attempt_at, before + timedelta(seconds=2))
+
+        # Ainda não chegou a hora da próxima tentativa
+        self.assertEqual(self.payments.process_due(), 0)
+
+        self.make_due()
+        before = timezone.now()
+        self.payments.process_due()
+        self.assertGreaterEqual(Payment.objects.get().next_attempt_at, before + timedelta(seconds=4))
+
+        self.make_due()
+        self.payments.process_due()
+        self.assertEqual(Purchase.objects.get().status, Purchase.PAID)
+        self.assertEqual(Payment.objects.get().attempts, 3)
+
+    def test_gives_up_after_max_attempts(self):
+        self.buy()
+        self.gateway.process_payment.side_effect = PaymentGatewayError("down")
+
+        for _ in range(3):
+            self.make_due()
+            self.payments.process_due()
+
+        payment = Payment.objects.get()
+        self.assertEqual((payment.status, payment.attempts, payment.last_error), (Payment.FAILED, 3, "down"))
+        self.assertEqual(self.stock(), 5)
+
+    def test_claimed_payment_is_leased(self):
+        self.buy()
+
+        claimed = self.payments.claim_due()
+
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(self.payments.claim_due(), [])
+        self.assertGreater(Payment.objects.get().next_attempt_at, timezone.now() + timedelta(seconds=9))
+
+    def test_stale_worker_result_is_discarded(self):
+        self.buy()
+        self.gateway.process_payment.return_value = False
+        stale = self.payments.claim_due()[0]
+
+        # O lease expirou e outro worker reclamou e pagou
+        self.make_due()
+        fresh = self.payments.claim_due()[0]
+        self.gateway.process_payment.return_value = True
+        self.payments.process(fresh)
+
+        self.gateway.process_payment.return_value = False
+        self.assertEqual(self.payments.process(stale), Payment.PAID)
+        self.assertEqual(Purchase.objects.get().status, Purchase.PAID)
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.CONSUMED)
+
+    def test_sweeper_keeps_reservations_of_pending_payments(self):
+        self.buy()
+        InventoryService().reserve(self.user, self.item.id, 1)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(InventoryService().release_expired(), 1)
+
+        self.assertEqual(StockReservation.objects.get(payment__isnull=False).status, StockReservation.ACTIVE)
+        self.assertEqual(self.stock(), 3)
+
+    def test_worker_pool(self):
+        for _ in range(3):
+            self.buy(quantity=1)
+
+        with patch.object(PaymentService, "_process_in_thread", return_value=Payment.PAID) as process:
+            self.assertEqual(self.payments.process_due(workers=4), 3)
+
+        self.assertEqual(process.call_count, 3)
+
+    def test_command(self):
+        self.buy()
+        out = StringIO()
+
+        with patch("store.helpers.payment_gateway.PaymentGateway.process_payment", return_value=True):
+            call_command("process_payments", "--workers", "1", stdout=out)
+
+        self.assertIn("1 payments processed", out.getvalue())
+        self.assertEqual(Purchase.objects.get().status, Purchase.PAID)
+
+
+class TestPaymentStatusEndpoints(TestCase):
+    """
+    Polling do estado de compras e encomendas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="poller", password="poller-password")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=5)
+
+    def test_poll_purchase_until_paid(self):
+        response = self.client.post(
+            "/api/v1/store/purchase/", {**SHIPPING, "item": str(self.item.id), "quantity": 1, "payment_method": "ATM"}
+        )
+        self.assertEqual(response.status_code, 202)
+        url = f"/api/v1/store/purchases/{response.json()['id']}/"
+
+        pending = self.client.get(url)
+        self.assertEqual(pending.json()["status"], Purchase.PENDING)
+        self.assertEqual(pending["Retry-After"], "2")
+
+        PaymentService().process_due()
+
+        paid = self.client.get(url)
+        self.assertEqual(paid.json()["status"], Purchase.PAID)
+        self.assertFalse(paid.has_header("Retry-After"))
+
+    def test_other_users_cannot_see_the_purchase(self):
+        purchase = StoreService().purchase_item(self.user, str(self.item.id), 1, "ATM", None, SHIPPING)
+        other = get_user_model().objects.create_user(username="other", password="other-password")
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.client.get(f"/api/v1/store/purchases/{purchase.id}/").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/v1/store/orders/{purchase.id}/").status_code, 404)
+
+
+class TestFakePaymentGateway(TestCase):
+    """
+    O gateway falso usado nos testes de carga.
+    """
+
+    def test_outcomes_follow_the_configured_rates(self):
+        gateway = FakePaymentGateway(latency=(0, 0), error_rate=0.2, decline_rate=0.3, seed=42)
+        outcomes = {"approved": 0, "declined": 0, "error": 0}
+
+        for _ in range(2000):
+            try:
+                outcomes["approved" if gateway.process_payment("ATM", 10.0) else "declined"] += 1
+            except PaymentGatewayError:
+                outcomes["error"] += 1
+
+        self.assertAlmostEqual(outcomes["error"] / 2000, 0.2, delta=0.03)
+        self.assertAlmostEqual(outcomes["declined"] / 2000, 0.3, delta=0.03)
+
+    def test_latency_above_the_timeout(self):
+        gateway = FakePaymentGateway(latency=(0.2, 0.2), error_rate=0, decline_rate=0)
+
+        with self.assertRaises(PaymentTimeout):
+            gateway.process_payment("ATM", 10.0, timeout=0.01)
+        self.assertTrue(gateway.process_payment("ATM", 10.0, timeout=1))
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            FakePaymentGateway(latency=(0, 0)).process_payment("PIX", 10.0)
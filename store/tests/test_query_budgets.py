@@ -0,0 +1,329 @@
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from store.models import CartItem, Category, Favorite, Item, Order, OrderItem, Purchase, Upload
+from store.services.sales_rollup_service import sales_rollup_service
+from store.services.item_cache_service import item_cache_service
+from store.services.upload_service import upload_service
+from store.urls import urlpatterns
+
+# Número máximo de queries SQL por endpoint (rota de store/urls.py + método HTTP).
+# Os orçamentos não podem depender do tamanho dos dados: cada endpoint é medido com
+# poucos e com muitos registos e o número de queries tem de ser o mesmo.
+QUERY_BUDGETS = {
+    ("GET", "store/items/"): 1,
+    # Categoria + INSERT do item + faceta da categoria (SELECT/UPDATE), em SAVEPOINTs aninhados
+    ("POST", "store/items/"): 8,
+    ("GET", "store/items/search/"): 2,
+    ("GET", "store/featured/"): 1,
+    ("GET", "store/categories/facets/"): 1,
+    ("GET", "store/items/<uuid:item_id>/"): 1,
+    # Item + estado anterior (SELECT FOR UPDATE) + UPDATE + faceta da categoria (SELECT, faixa de preço, UPDATE),
+    # em SAVEPOINTs aninhados
+    ("PUT", "store/items/<uuid:item_id>/"): 10,
+    # Item + estado anterior (SELECT FOR UPDATE) + um DELETE por tabela dependente (o cascade não depende
+    # do número de linhas) + faceta da categoria
+    ("DELETE", "store/items/<uuid:item_id>/"): 13,
+    ("GET", "store/favorites/"): 1,
+    # Item + get_or_create do favorito (SELECT, INSERT num SAVEPOINT)
+    ("POST", "store/favorites/"): 5,
+    ("DELETE", "store/favorites/remove/"): 2,
+    # Sem Redis nos testes o índice de favoritos responde pelo banco; com Redis, nenhuma query
+    ("POST", "store/favorites/lookup/"): 1,
+    ("GET", "store/cart/"): 1,
+    ("POST", "store/cart/"): 2,
+    # Itens (in_bulk) + upsert das somas + upsert das substituições + DELETE, numa transação (SAVEPOINT/RELEASE)
+    ("POST", "store/cart/batch/"): 6,
+    # Linhas do carrinho + itens em falta na cache de itens (com as caches quentes, nenhuma)
+    ("GET", "store/cart/summary/"): 2,
+    ("DELETE", "store/cart/remove/"): 2,
+    # Duas leituras do item + reserva (UPDATE condicional, INSERT) + compra e pagamento na fila,
+    # numa transação com a reserva aninhada (SAVEPOINT/RELEASE dentro do TestCase); o gateway é chamado pelos workers
+    ("POST", "store/purchase/"): 10,
+    # Carrinho + DELETE das linhas + reserva de todas as linhas + encomenda, linhas e pagamento na fila
+    # (cada lote num só statement)
+    ("POST", "store/checkout/"): 13,
+    ("GET", "store/purchases/"): 1,
+    ("GET", "store/purchases/<uuid:purchase_id>/"): 1,
+    # Encomenda + linhas (prefetch)
+    ("GET", "store/orders/<uuid:order_id>/"): 2,
+    ("POST", "store/uploads/"): 1,
+    ("GET", "store/uploads/<uuid:upload_id>/"): 1,
+    # Upload + UPDATE condicional do offset (os bytes vão para o disco, não para o banco)
+    ("PATCH", "store/uploads/<uuid:upload_id>/"): 2,
+    ("GET", "store/analytics/sales/"): 1,
+    ("GET", "store/analytics/top/"): 1,
+}
+
+SIZES = (2, 25)
+
+
+class TestQueryBudgets(APITestCase):
+    """
+    Falha quando um endpoint da loja passa o seu orçamento de queries ou quando
+    o número de queries cresce com o tamanho dos dados (N+1).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="budget", password="budget-password")
+        cls.staff = get_user_model().objects.create_user(username="budget-staff", password="budget-password", is_staff=True)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def grow(self, size: int):
+        """Garante pelo menos `size` itens (cada um com categoria, favorito e linha no carrinho)."""
+        for i in range(Item.objects.count(), size):
+            category = Category.objects.create(name=f"Categoria {i}")
+            item = Item.objects.create(name=f"Camisa {i}", price=Decimal("10.00"), stock=100, category=category)
+            Favorite.objects.create(user=self.user, item=item)
+            CartItem.objects.create(user=self.user, item=item, quantity=1)
+
+    def assertQueryBudget(self, method, route, url_for, data=None, **extra):
+        budget = QUERY_BUDGETS[(method, route)]
+        counts = []
+
+        for size in SIZES:
+            self.grow(size)
+            cache.clear()
+            item_cache_service.cache.local.clear()
+            url = url_for() if callable(url_for) else url_for
+            body = data() if callable(data) else data
+
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method.lower())(url, body, **extra)
+
+            self.assertLess(response.status_code, 400, response.content)
+            counts.append(len(queries))
+
+        self.assertLessEqual(max(counts), budget, f"{method} {route} over budget: {counts} > {budget}")
+        self.assertEqual(counts[0], counts[-1], f"{method} {route} queries grow with data size: {counts}")
+
+    def test_every_store_route_declares_a_budget(self):
+        for pattern in urlpatterns:
+            view_class = pattern.callback.view_class
+            for method in view_class.http_method_names:
+                if method == "options" or not hasattr(view_class, method):
+                    continue
+                self.assertIn(
+                    (method.upper(), str(pattern.pattern)), QUERY_BUDGETS,
+                    f"no query budget declared for {method.upper()} {pattern.pattern}",
+                )
+
+    def test_item_list(self):
+        self.assertQueryBudget("GET", "store/items/", "/api/v1/store/items/", {"limit": 100})
+
+    def test_item_search(self):
+        self.assertQueryBudget("GET", "store/items/search/", "/api/v1/store/items/search/", {"q": "camisa", "limit": 100})
+
+    def test_featured(self):
+        self.assertQueryBudget("GET", "store/featured/", "/api/v1/store/featured/")
+
+    def test_category_facets(self):
+        self.assertQueryBudget("GET", "store/categories/facets/", "/api/v1/store/categories/facets/")
+
+    def test_item_create(self):
+        self.assertQueryBudget(
+            "POST", "store/items/", "/api/v1/store/items/",
+            lambda: {"name": "Camisa nova", "price": "10.00", "stock": 1, "category": str(Category.objects.latest("name").id)},
+            format="json",
+        )
+
+    def test_item_update(self):
+        self.assertQueryBudget(
+            "PUT", "store/items/<uuid:item_id>/",
+            lambda: f"/api/v1/store/items/{Item.objects.latest('created_at').id}/",
+            {"name": "Camisa renomeada", "price": "12.00", "stock": 5}, format="json",
+        )
+
+    def test_item_delete(self):
+        def url():
+            # Um item à parte, com favorito e linha no carrinho: os itens de grow() ficam
+            item = Item.objects.create(name="Camisa a apagar", price=Decimal("10.00"), stock=1, category=Category.objects.first())
+            Favorite.objects.create(user=self.user, item=item)
+            CartItem.objects.create(user=self.user, item=item, quantity=1)
+            return f"/api/v1/store/items/{item.id}/"
+
+        self.assertQueryBudget("DELETE", "store/items/<uuid:item_id>/", url)
+
+    def test_item_detail(self):
+        self.assertQueryBudget(
+            "GET", "store/items/<uuid:item_id>/",
+            lambda: f"/api/v1/store/items/{Item.objects.latest('created_at').id}/",
+        )
+
+    def test_favorites(self):
+        self.assertQueryBudget("GET", "store/favorites/", "/api/v1/store/favorites/")
+
+    def test_favorite_add(self):
+        def url():
+            item = Item.objects.latest("created_at")
+            Favorite.objects.filter(user=self.user, item=item).delete()
+            return f"/api/v1/store/favorites/?item_id={item.id}"
+
+        self.assertQueryBudget("POST", "store/favorites/", url)
+
+    def test_favorite_remove(self):
+        self.assertQueryBudget(
+            "DELETE", "store/favorites/remove/",
+            lambda: f"/api/v1/store/favorites/remove/?item_id={Favorite.objects.latest('created_at').item_id}",
+        )
+
+    def test_favorite_lookup(self):
+        self.assertQueryBudget(
+            "POST", "store/favorites/lookup/", "/api/v1/store/favorites/lookup/",
+            lambda: {"item_ids": [str(item_id) for item_id in Item.objects.values_list("id", flat=True)]}, format="json",
+        )
+
+    def test_cart(self):
+        self.assertQueryBudget("GET", "store/cart/", "/api/v1/store/cart/")
+
+    def test_cart_add(self):
+        self.assertQueryBudget(
+            "POST", "store/cart/", "/api/v1/store/cart/",
+            lambda: {"item_id": str(Item.objects.latest("created_at").id), "quantity": 1},
+        )
+
+    def test_cart_batch(self):
+        def payload():
+            # Pelo menos um item para cada operação
+            self.grow(3)
+            ids = [str(item_id) for item_id in Item.objects.order_by("created_at").values_list("id", flat=True)]
+            return {"operations": [
+                *({"item_id": item_id, "op": "add", "quantity": 1} for item_id in ids[0::3]),
+                *({"item_id": item_id, "op": "set", "quantity": 2} for item_id in ids[1::3]),
+                *({"item_id": item_id, "op": "remove"} for item_id in ids[2::3]),
+            ]}
+
+        self.assertQueryBudget("POST", "store/cart/batch/", "/api/v1/store/cart/batch/", payload, format="json")
+
+    def test_cart_summary(self):
+        self.assertQueryBudget("GET", "store/cart/summary/", "/api/v1/store/cart/summary/")
+
+    def test_cart_remove(self):
+        self.assertQueryBudget(
+            "DELETE", "store/cart/remove/",
+            lambda: f"/api/v1/store/cart/remove/?item_id={CartItem.objects.latest('added_at').item_id}",
+        )
+
+    def test_purchase(self):
+        def payload():
+            return {
+                "item": str(Item.objects.latest("created_at").id), "quantity": 1, "payment_method": "ATM",
+                "first_name": "Romeu", "last_name": "Cajamba", "city": "Luanda", "country": "Angola",
+                "street_address": "Sambizanga", "house_number": "13", "phone": "123456789",
+                "email": "romeu@example.com",
+            }
+
+        self.assertQueryBudget("POST", "store/purchase/", "/api/v1/store/purchase/", payload)
+
+    def test_checkout(self):
+        def payload():
+            # O checkout anterior esvaziou o carrinho
+            for item in Item.objects.exclude(cartitem__user=self.user):
+                CartItem.objects.create(user=self.user, item=item, quantity=1)
+            return {
+                "payment_method": "ATM", "first_name": "Romeu", "last_name": "Cajamba", "city": "Luanda",
+                "country": "Angola", "street_address": "Sambizanga", "house_number": "13",
+                "phone": "123456789", "email": "romeu@example.com",
+            }
+
+        self.assertQueryBudget("POST", "store/checkout/", "/api/v1/store/checkout/", payload)
+
+    def test_purchase_list(self):
+        def url():
+            item = Item.objects.latest("created_at")
+            Purchase.objects.bulk_create(
+                Purchase(
+                    user=self.user, item=item, quantity=1, total_price=Decimal("10.00"), payment_method="ATM",
+                    first_name="Romeu", last_name="Cajamba", city="Luanda", country="Angola",
+                    street_address="Sambizanga", house_number="13", phone="123456789", email="romeu@example.com",
+                )
+                for _ in range(Item.objects.count())
+            )
+            return "/api/v1/store/purchases/?limit=100"
+
+        self.assertQueryBudget("GET", "store/purchases/", url)
+
+    def test_purchase_detail(self):
+        def url():
+            purchase = Purchase.objects.create(
+                user=self.user, item=Item.objects.latest("created_at"), quantity=1, total_price=Decimal("10.00"),
+                payment_method="ATM", first_name="Romeu", last_name="Cajamba", city="Luanda", country="Angola",
+                street_address="Sambizanga", house_number="13", phone="123456789", email="romeu@example.com",
+            )
+            return f"/api/v1/store/purchases/{purchase.id}/"
+
+        self.assertQueryBudget("GET", "store/purchases/<uuid:purchase_id>/", url)
+
+    def test_order_detail(self):
+        def url():
+            order = Order.objects.create(
+                user=self.user, total_price=Decimal("10.00"), payment_method="ATM", first_name="Romeu",
+                last_name="Cajamba", city="Luanda", country="Angola", street_address="Sambizanga",
+                house_number="13", phone="123456789", email="romeu@example.com",
+            )
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, item=item, quantity=1, unit_price=item.price) for item in Item.objects.all()
+            )
+            return f"/api/v1/store/orders/{order.id}/"
+
+        self.assertQueryBudget("GET", "store/orders/<uuid:order_id>/", url)
+
+    def test_upload_create(self):
+        with tempfile.TemporaryDirectory() as staging, override_settings(UPLOAD_STAGING_DIR=staging):
+            self.assertQueryBudget(
+                "POST", "store/uploads/", "/api/v1/store/uploads/",
+                {"purpose": Upload.PAYMENT_PROOF, "filename": "proof.pdf", "size": 10}, format="json",
+            )
+
+    def test_upload_detail(self):
+        with tempfile.TemporaryDirectory() as staging, override_settings(UPLOAD_STAGING_DIR=staging):
+            upload = upload_service.create(self.user, Upload.PAYMENT_PROOF, "proof.pdf", 10)
+            self.assertQueryBudget("GET", "store/uploads/<uuid:upload_id>/", f"/api/v1/store/uploads/{upload.id}/")
+
+    def test_upload_chunk(self):
+        with tempfile.TemporaryDirectory() as staging, override_settings(UPLOAD_STAGING_DIR=staging):
+            def url():
+                upload = upload_service.create(self.user, Upload.PAYMENT_PROOF, "proof.pdf", 10)
+                return f"/api/v1/store/uploads/{upload.id}/"
+
+            self.assertQueryBudget(
+                "PATCH", "store/uploads/<uuid:upload_id>/", url, b"12345",
+                content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET="0",
+            )
+
+
+    def record_sales(self):
+        """Uma venda paga por item, para os agregados crescerem com os dados."""
+        items = Item.objects.all()
+        sales_rollup_service.record(
+            (item.id, timezone.now() - timedelta(hours=i), item.id, item.category_id, 1, item.price)
+            for i, item in enumerate(items)
+        )
+
+    def test_sales_series(self):
+        self.client.force_authenticate(self.staff)
+
+        def url():
+            self.record_sales()
+            return "/api/v1/store/analytics/sales/?granularity=hour"
+
+        self.assertQueryBudget("GET", "store/analytics/sales/", url)
+
+    def test_top_sellers(self):
+        self.client.force_authenticate(self.staff)
+
+        def url():
+            self.record_sales()
+            return "/api/v1/store/analytics/top/?limit=100"
+
+        self.assertQueryBudget("GET", "store/analytics/top/", url)
@@ -0,0 +1,74 @@
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import skipIf
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from api.renderers import FastJSONParser, FastJSONRenderer, orjson
+from store.models import Category, Item, Purchase
+from store.serializers import ItemSerializer, PurchaseSerializer
+
+
+class TestFastJSON(TestCase):
+    """
+    O renderer/parser rápido tem de produzir os mesmos bytes que o JSONRenderer do DRF.
+    """
+
+    def assertSameBytes(self, data, media_type="application/json"):
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_item_and_purchase_payloads(self):
+        user = get_user_model().objects.create_user(username="json", password="json-password")
+        category = Category.objects.create(name="Calçado", description="Sapatos   e ténis")
+        item = Item.objects.create(name="Sapatilha", price=Decimal("59.90"), stock=2, category=category)
+        purchase = Purchase.objects.create(
+            user=user, item=item, quantity=2, total_price=Decimal("119.80"), payment_method="ATM",
+            first_name="Romeu", last_name="Cajamba", city="Luanda", country="Angola",
+            street_address="Sambizanga", house_number="13", phone="123", email="r@example.com",
+        )
+
+        self.assertSameBytes(ItemSerializer(Item.objects.all(), many=True).data)
+        self.assertSameBytes(PurchaseSerializer(purchase).data)
+
+    def test_raw_python_types(self):
+        self.assertSameBytes({
+            "id": uuid.uuid4(),
+            "price": Decimal("10.50"),
+            "at": datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            "naive": datetime(2025, 1, 2, 3, 4, 5),
+            1: ["ção", None, True, 2 ** 70],
+        })
+
+    def test_indent_falls_back_to_drf(self):
+        self.assertSameBytes({"a": [1, 2]}, "application/json; indent=4")
+
+    def test_floats_keep_their_value(self):
+        # O orjson escreve alguns floats de outra forma (1e16 em vez de 1e+16), mas o valor lido é o mesmo
+        data = {"small": 1e-7, "large": 1e16, "edge": [1e-05, 0.0001, 9999999999999998.0, -0.0, 0.1, 2.5]}
+        self.assertEqual(
+            JSONParser().parse(BytesIO(FastJSONRenderer().render(data))),
+            JSONParser().parse(BytesIO(JSONRenderer().render(data))),
+        )
+
+    @skipIf(orjson is None, "orjson não está instalado")
+    def test_fast_json_is_not_slower_than_drf(self):
+        call_command("bench_json", items=2_000, repeat=5, stdout=StringIO())
+
+    def test_parser_matches_drf(self):
+        body = '{"name": "Camisa", "price": "10.00", "tags": ["ção"], "n": 9007199254740993, "f": 0.1}'.encode()
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(body)),
+            JSONParser().parse(BytesIO(body)),
+        )
+
+    def test_parser_rejects_invalid_json(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"price": NaN}'))
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from store.models import CartItem, Category, Item, Purchase, SalesRollup
+from store.services.payment_service import PaymentService
+from store.services.sales_rollup_service import SalesRollupService
+from store.services.store_service import StoreService
+
+SHIPPING = {
+    "first_name": "Romeu", "last_name": "Cajamba", "city": "Luanda", "country": "Angola",
+    "street_address": "Sambizanga", "house_number": "13", "phone": "123456789", "email": "romeu@example.com",
+}
+
+
+class TestSalesRollups(TestCase):
+    """
+    Testes dos agregados de vendas: atualização quando o pagamento passa, backfill e endpoints de analytics.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user(username="buyer", password="buyer-password")
+        cls.staff = User.objects.create_user(username="analyst", password="analyst-password", is_staff=True)
+
+    def setUp(self):
+        self.shirts = Category.objects.create(name="Camisas")
+        self.shirt = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=50, category=self.shirts)
+        self.polo = Item.objects.create(name="Polo", price=Decimal("25.00"), stock=50, category=self.shirts)
+        self.store = StoreService()
+        self.service = SalesRollupService()
+
+    def pay(self, approved=True):
+        with patch("store.helpers.payment_gateway.PaymentGateway.process_payment", return_value=approved):
+            PaymentService().process_due(workers=1)
+
+    def buy(self, item, quantity):
+        return self.store.purchase_item(self.user, str(item.id), quantity, "ATM", None, SHIPPING)
+
+    def checkout(self, lines):
+        for item, quantity in lines:
+            CartItem.objects.create(user=self.user, item=item, quantity=quantity)
+        return self.store.checkout(self.user, "ATM", None, SHIPPING)
+
+    def rollup(self, dimension, key, granularity=SalesRollup.DAY):
+        row = SalesRollup.objects.get(dimension=dimension, key=key, granularity=granularity)
+        return row.units, row.revenue, row.order_count
+
+    def test_paid_sales_are_added_incrementally(self):
+        self.buy(self.shirt, 2)
+        self.pay()
+        self.checkout([(self.shirt, 1), (self.polo, 3)])
+        self.pay()
+
+        self.assertEqual(self.rollup(SalesRollup.ITEM, self.shirt.id), (3, Decimal("30.00"), 2))
+        self.assertEqual(self.rollup(SalesRollup.ITEM, self.polo.id), (3, Decimal("75.00"), 1))
+        # A encomenda tem duas linhas da mesma categoria mas conta uma vez
+        self.assertEqual(self.rollup(SalesRollup.CATEGORY, self.shirts.id), (6, Decimal("105.00"), 2))
+        self.assertEqual(self.rollup(SalesRollup.TOTAL, SalesRollup.TOTAL_KEY, SalesRollup.HOUR), (6, Decimal("105.00"), 2))
+
+    def test_unpaid_sales_are_not_counted(self):
+        self.buy(self.shirt, 2)
+        self.assertFalse(SalesRollup.objects.exists())
+
+        self.pay(approved=False)
+        self.assertFalse(SalesRollup.objects.exists())
+
+    def test_backfill_matches_the_incremental_rollups_and_is_idempotent(self):
+        self.buy(self.shirt, 2)
+        self.pay()
+        self.checkout([(self.shirt, 1), (self.polo, 3)])
+        self.pay()
+        # Uma venda antiga, anterior aos agregados
+        old = self.buy(self.polo, 1)
+        Purchase.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=3))
+        self.pay()
+        SalesRollup.objects.filter(period_start__lt=timezone.now() - timedelta(days=2)).delete()
+
+        incremental = set(SalesRollup.objects.values_list("dimension", "key", "granularity", "period_start", "units", "revenue", "order_count"))
+        out = StringIO()
+        call_command("backfill_sales_rollups", "--chunk-size", "1", stdout=out)
+        self.assertIn("Sales rollups rebuilt for", out.getvalue())
+        call_command("backfill_sales_rollups", stdout=StringIO())
+
+        rebuilt = set(SalesRollup.objects.values_list("dimension", "key", "granularity", "period_start", "units", "revenue", "order_count"))
+        self.assertTrue(incremental < rebuilt)
+        self.assertEqual(SalesRollup.objects.filter(dimension=SalesRollup.TOTAL, granularity=SalesRollup.DAY).count(), 2)
+        self.assertEqual(
+            SalesRollup.objects.filter(dimension=SalesRollup.ITEM, key=self.polo.id, granularity=SalesRollup.DAY)
+            .order_by("period_start").values_list("units", flat=True)[0],
+            1,
+        )
+
+    def test_period_start(self):
+        moment = timezone.make_aware(datetime(2026, 3, 14, 15, 9, 26))
+
+        self.assertEqual(SalesRollupService.period_start(moment, SalesRollup.HOUR), timezone.make_aware(datetime(2026, 3, 14, 15)))
+        self.assertEqual(SalesRollupService.period_start(moment, SalesRollup.DAY), timezone.make_aware(datetime(2026, 3, 14)))
+
+    def test_series_endpoint(self):
+        self.buy(self.shirt, 2)
+        self.checkout([(self.polo, 1)])
+        self.pay()
+        client = APIClient()
+        client.force_authenticate(self.staff)
+
+        response = client.get("/api/v1/store/analytics/sales/", {"granularity": "hour"})
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body["units"], body["revenue"], body["order_count"]), (3, "45.00", 2))
+        self.assertEqual(len(body["results"]), 1)
+
+        response = client.get("/api/v1/store/analytics/sales/", {"item_id": str(self.polo.id)})
+        self.assertEqual((response.json()["units"], response.json()["revenue"]), (1, "25.00"))
+
+        response = client.get("/api/v1/store/analytics/sales/", {"granularity": "hour", "since": "2020-01-01"})
+        self.assertEqual(response.status_code, 400)
+        response = client.get("/api/v1/store/analytics/sales/", {"granularity": "week"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_top_endpoint(self):
+        self.buy(self.shirt, 4)
+        self.buy(self.polo, 2)
+        self.pay()
+        client = APIClient()
+        client.force_authenticate(self.staff)
+
+        response = client.get("/api/v1/store/analytics/top/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([row["id"] for row in response.json()], [str(self.polo.id), str(self.shirt.id)])
+
+        response = client.get("/api/v1/store/analytics/top/", {"order_by": "units", "limit": 1})
+        self.assertEqual(response.json(), [{"id": str(self.shirt.id), "units": 4, "revenue": "40.00", "order_count": 1}])
+
+        response = client.get("/api/v1/store/analytics/top/", {"dimension": "category"})
+        self.assertEqual(response.json()[0]["id"], str(self.shirts.id))
+
+    def test_analytics_is_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        self.assertEqual(client.get("/api/v1/store/analytics/sales/").status_code, 403)
+        self.assertEqual(client.get("/api/v1/store/analytics/top/").status_code, 403)
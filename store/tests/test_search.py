@@ -0,0 +1,59 @@
+from decimal import Decimal
+from django.test import TestCase
+from rest_framework.test import APIClient
+from store.infra.respository import StoreRepository
+from store.models import Category, Item
+
+
+class TestItemSearch(TestCase):
+    """
+    Testes da pesquisa de texto completo (FTS5 no SQLite, tsvector no PostgreSQL).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shoes = Category.objects.create(name="Sapatos")
+        cls.shirts = Category.objects.create(name="Camisas")
+        cls.sneaker = Item.objects.create(name="Sapatilha azul", description="Confortável", price=Decimal("50.00"), category=cls.shoes)
+        cls.shirt = Item.objects.create(name="Camisa de linho", description="Combina com sapatilha azul", price=Decimal("30.00"), category=cls.shirts)
+        cls.cap = Item.objects.create(name="Boné", description="Algodão", price=Decimal("10.00"), category=cls.shirts)
+
+    def setUp(self):
+        self.repository = StoreRepository()
+
+    def test_name_match_ranks_above_description_match(self):
+        results = self.repository.search_items("sapatilha azul", limit=10)
+        self.assertEqual(results, [self.sneaker, self.shirt])
+
+    def test_matches_category_name_and_prefix(self):
+        self.assertEqual(self.repository.search_items("camis", limit=10)[0], self.shirt)
+        self.assertIn(self.cap, self.repository.search_items("camisas", limit=10))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.cap.name = "Chapéu de palha"
+        self.cap.save()
+        self.assertEqual(self.repository.search_items("palha", limit=10), [self.cap])
+
+        self.cap.delete()
+        self.assertEqual(self.repository.search_items("palha", limit=10), [])
+
+    def test_index_follows_category_rename(self):
+        Category.objects.filter(id=self.shoes.id).update(name="Calçado")
+        self.assertEqual(self.repository.search_items("calçado", limit=10), [self.sneaker])
+
+    def test_punctuation_only_query_returns_nothing(self):
+        self.assertEqual(self.repository.search_items("\"*:&", limit=10), [])
+
+    def test_endpoint_paginates_ranked_results(self):
+        client = APIClient()
+        body = client.get("/api/v1/store/items/search/", {"q": "azul", "limit": 1}).json()
+        self.assertEqual([r["id"] for r in body["results"]], [str(self.sneaker.id)])
+        self.assertEqual(body["next"], 2)
+
+        body = client.get("/api/v1/store/items/search/", {"q": "azul", "limit": 1, "page": 2}).json()
+        self.assertEqual([r["id"] for r in body["results"]], [str(self.shirt.id)])
+        self.assertIsNone(body["next"])
+        self.assertEqual(body["prev"], 1)
+
+    def test_endpoint_requires_query(self):
+        self.assertEqual(APIClient().get("/api/v1/store/items/search/").status_code, 400)
@@ -1,8 +1,8 @@
 from django.test import TestCase
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 from decimal import Decimal
 from store.services.store_service import StoreService
-from store.models import Item
+from store.models import CartItem, Item, Payment, Purchase
 from django.contrib.auth import get_user_model
 
 
@@ -24,6 +24,7 @@ class TestStoreService(TestCase):
     def setUp(self):
         """Executa antes de cada teste individual."""
         self.mock_repo = MagicMock()
+        self.mock_repo.create_reservation.side_effect = lambda reservation: reservation
         self.store_service = StoreService(store_repository=self.mock_repo)
         self.sample_user = self.__class__.sample_user  # ✅ agora garantido
 
@@ -52,10 +53,17 @@ class TestStoreService(TestCase):
         self.mock_repo.get_item_by_id.assert_called_once_with(id="item-1")
 
     def test_search_items(self):
-        self.mock_repo.search_by_name.return_value = ["item1"]
-        results = self.store_service.search_items("item")
+        self.mock_repo.search_items.return_value = ["item1"]
+        results, has_next = self.store_service.search_items("item", page=2, limit=10)
         self.assertEqual(results, ["item1"])
-        self.mock_repo.search_by_name.assert_called_once_with(name="item")
+        self.assertFalse(has_next)
+        self.mock_repo.search_items.assert_called_once_with(query="item", limit=11, offset=10)
+
+    def test_search_items_has_next_page(self):
+        self.mock_repo.search_items.return_value = ["item1", "item2", "item3"]
+        results, has_next = self.store_service.search_items("item", limit=2)
+        self.assertEqual(results, ["item1", "item2"])
+        self.assertTrue(has_next)
 
     def test_create_item(self):
         data = {
@@ -116,9 +124,10 @@ class TestStoreService(TestCase):
 
     def test_add_to_cart_success(self):
         self.mock_repo.get_item_by_id.return_value = self.sample_item
-        self.mock_repo.add_cart_item.return_value = "cart_item"
+        cart_item = CartItem(user=self.sample_user, item_id="item-1", quantity=2)
+        self.mock_repo.add_cart_item.return_value = cart_item
         result = self.store_service.add_to_cart(self.sample_user, "item-1", 2)
-        self.assertEqual(result, "cart_item")
+        self.assertEqual(result, cart_item)
 
     def test_add_to_cart_not_enough_stock(self):
         self.mock_repo.get_item_by_id.return_value = self.sample_item
@@ -143,11 +152,13 @@ class TestStoreService(TestCase):
 
     #         PURCHASE
 
-    @patch("store.services.store_service.PaymentGateway.process_payment")
-    def test_purchase_item_success(self, mock_payment):
+    def test_purchase_item_success(self):
         self.mock_repo.get_item_by_id.return_value = self.sample_item
-        self.mock_repo.create_purchase.return_value = "purchase"
-        mock_payment.return_value = True
+        self.mock_repo.decrement_stock.return_value = (3, None, Decimal("10.0"))
+        self.mock_repo.create_purchase.side_effect = lambda purchase: purchase
+        self.mock_repo.create_payment.side_effect = lambda payment: payment
+        gateway = MagicMock()
+        self.store_service.payments.gateway = gateway
 
         shipping_data = {
             "first_name": "Romeu",
@@ -164,8 +175,24 @@ class TestStoreService(TestCase):
             self.sample_user, "item-1", 2, "credit", "file.pdf", shipping_data
         )
 
-        self.assertEqual(result, "purchase")
-        mock_payment.assert_called_once()
+        # A compra fica PENDING com o stock reservado; o gateway só é chamado pelos workers
+        self.assertEqual(result.status, Purchase.PENDING)
+        self.assertEqual(result.total_price, Decimal("20.0"))
+        gateway.process_payment.assert_not_called()
+        self.mock_repo.decrement_stock.assert_called_once_with("item-1", 2)
+        payment = self.mock_repo.create_payment.call_args.args[0]
+        self.assertEqual((payment.purchase, payment.amount, payment.status), (result, Decimal("20.0"), Payment.PENDING))
+        self.assertEqual(self.mock_repo.create_reservation.call_args.args[0].payment, payment)
+        self.mock_repo.consume_reservation.assert_not_called()
+
+    def test_purchase_item_sold_out_by_concurrent_buyer(self):
+        # O item lido ainda tinha stock, mas o UPDATE condicional já não encontra unidades
+        self.mock_repo.get_item_by_id.return_value = self.sample_item
+        self.mock_repo.decrement_stock.return_value = None
+
+        with self.assertRaisesMessage(ValueError, "Not enough stock"):
+            self.store_service.purchase_item(self.sample_user, "item-1", 2, "ATM", None, {})
+        self.mock_repo.create_purchase.assert_not_called()
 
     def test_purchase_item_not_enough_stock(self):
         self.mock_repo.get_item_by_id.return_value = self.sample_item
@@ -180,27 +207,3 @@ class TestStoreService(TestCase):
             self.sample_user, "item-1", 1, "credit", "file.pdf", {}
         )
         self.assertIsNone(result)
-
-    @patch("store.services.store_service.PaymentGateway.process_payment")
-    def test_purchase_item_payment_failed(self, mock_payment):
-        self.mock_repo.get_item_by_id.return_value = self.sample_item
-        mock_payment.return_value = False
-
-        with self.assertRaises(ValueError):
-            self.store_service.purchase_item(
-                self.sample_user,
-                "item-1",
-                1,
-                "credit",
-                "file.pdf",
-                {
-                    "first_name": "John",
-                    "last_name": "Doe",
-                    "city": "City",
-                    "country": "Country",
-                    "street_address": "Street",
-                    "house_number": "123",
-                    "phone": "123456789",
-                    "email": "john@example.com",
-                },
-            )
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from store.models import Item, Purchase, Upload
+
+CONTENT = os.urandom(300 * 1024)
+
+PURCHASE = {
+    "quantity": 1, "payment_method": "ATM", "first_name": "Romeu", "last_name": "Cajamba",
+    "city": "Luanda", "country": "Angola", "street_address": "Sambizanga", "house_number": "13",
+    "phone": "123456789", "email": "romeu@example.com",
+}
+
+
+class TestChunkedUploads(TestCase):
+    """
+    Testes dos uploads em partes: envio retomável, limites, sha256 e associação a compras e itens.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="uploader", password="uploader-password")
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        settings = override_settings(
+            MEDIA_ROOT=os.path.join(self.root, "media"),
+            UPLOAD_STAGING_DIR=os.path.join(self.root, "staging"),
+            UPLOAD_MAX_CHUNK_SIZE=128 * 1024,
+            UPLOAD_MAX_PAYMENT_PROOF_SIZE=512 * 1024,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def start(self, size=len(CONTENT), **extra):
+        response = self.client.post(
+            "/api/v1/store/uploads/",
+            {"purpose": Upload.PAYMENT_PROOF, "filename": "../comprovativo.pdf", "size": size, **extra},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["id"]
+
+    def send(self, upload_id, offset, chunk):
+        return self.client.generic(
+            "PATCH", f"/api/v1/store/uploads/{upload_id}/", chunk,
+            content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self, content=CONTENT, chunk_size=100 * 1024, **extra):
+        upload_id = self.start(size=len(content), **extra)
+        for offset in range(0, len(content), chunk_size):
+            response = self.send(upload_id, offset, content[offset:offset + chunk_size])
+            self.assertEqual(response.status_code, 200, response.content)
+        return upload_id
+
+    def test_chunks_are_assembled_and_hashed(self):
+        upload_id = self.upload(sha256=hashlib.sha256(CONTENT).hexdigest())
+
+        upload = Upload.objects.get(id=upload_id)
+        self.assertEqual(upload.status, Upload.COMPLETE)
+        self.assertEqual(upload.sha256, hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual(upload.filename, "comprovativo.pdf")
+        with upload.file.open("rb") as stored:
+            self.assertEqual(stored.read(), CONTENT)
+        # As partes em staging são apagadas no fim
+        self.assertFalse(os.path.exists(os.path.join(self.root, "staging", upload_id)))
+
+    def test_resume_after_a_dropped_chunk(self):
+        upload_id = self.start()
+        self.send(upload_id, 0, CONTENT[:100 * 1024])
+
+        status = self.client.get(f"/api/v1/store/uploads/{upload_id}/")
+        self.assertEqual(status["Upload-Offset"], str(100 * 1024))
+
+        # Repetir a parte já recebida: 409 com o offset onde retomar
+        conflict = self.send(upload_id, 0, CONTENT[:100 * 1024])
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict.json()["error"]["details"]["offset"], 100 * 1024)
+
+        self.send(upload_id, 100 * 1024, CONTENT[100 * 1024:200 * 1024])
+        response = self.send(upload_id, 200 * 1024, CONTENT[200 * 1024:])
+        self.assertEqual(response.json()["status"], Upload.COMPLETE)
+        with Upload.objects.get(id=upload_id).file.open("rb") as stored:
+            self.assertEqual(stored.read(), CONTENT)
+
+    def test_size_limits(self):
+        response = self.client.post(
+            "/api/v1/store/uploads/",
+            {"purpose": Upload.PAYMENT_PROOF, "filename": "big.pdf", "size": 600 * 1024},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        upload_id = self.start()
+        self.assertEqual(self.send(upload_id, 0, CONTENT[:200 * 1024]).status_code, 400)
+
+        small = self.start(size=10)
+        self.assertEqual(self.send(small, 0, b"x" * 11).status_code, 400)
+        self.assertEqual(Upload.objects.get(id=small).received, 0)
+
+    def test_checksum_mismatch_fails_the_upload(self):
+        upload_id = self.start(sha256="0" * 64)
+        self.send(upload_id, 0, CONTENT[:100 * 1024])
+        self.send(upload_id, 100 * 1024, CONTENT[100 * 1024:200 * 1024])
+        response = self.send(upload_id, 200 * 1024, CONTENT[200 * 1024:])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Upload.objects.get(id=upload_id).status, Upload.FAILED)
+
+    def test_other_users_cannot_touch_the_upload(self):
+        upload_id = self.start()
+        other = get_user_model().objects.create_user(username="other", password="other-password")
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.client.get(f"/api/v1/store/uploads/{upload_id}/").status_code, 404)
+        self.assertEqual(self.send(upload_id, 0, b"x").status_code, 404)
+
+    def test_purchase_attaches_the_upload_without_file_bytes(self):
+        item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=5)
+        upload_id = self.upload()
+
+        response = self.client.post(
+            "/api/v1/store/purchase/", {**PURCHASE, "item": str(item.id), "payment_proof_upload": upload_id}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 202, response.content)
+        purchase = Purchase.objects.get()
+        self.assertEqual(purchase.payment_proof.name, Upload.objects.get(id=upload_id).file.name)
+        self.assertEqual(Upload.objects.get(id=upload_id).status, Upload.ATTACHED)
+
+        # Um upload só pode ser associado uma vez
+        again = self.client.post(
+            "/api/v1/store/purchase/", {**PURCHASE, "item": str(item.id), "payment_proof_upload": upload_id}, format="json"
+        )
+        self.assertEqual(again.status_code, 400)
+        self.assertEqual(Item.objects.get().stock, 4)
+
+    def start_image(self, content, filename="camisa.png"):
+        response = self.client.post(
+            "/api/v1/store/uploads/",
+            {"purpose": Upload.ITEM_IMAGE, "filename": filename, "size": len(content)},
+            format="json",
+        )
+        return response.json()["id"], self.send(response.json()["id"], 0, content)
+
+    def test_item_image_from_upload(self):
+        image = BytesIO()
+        Image.new("RGB", (4, 4), "red").save(image, "PNG")
+        upload_id, response = self.start_image(image.getvalue())
+        self.assertEqual(response.status_code, 200, response.content)
+
+        # Um comprovativo não serve de imagem
+        proof_id = self.upload()
+        wrong = self.client.post(
+            "/api/v1/store/items/", {"name": "Camisa", "price": "10.00", "stock": 1, "image_upload": proof_id}, format="json"
+        )
+        self.assertEqual(wrong.status_code, 400)
+
+        created = self.client.post(
+            "/api/v1/store/items/", {"name": "Camisa", "price": "10.00", "stock": 1, "image_upload": upload_id}, format="json"
+        )
+
+        self.assertEqual(created.status_code, 201, created.content)
+        self.assertEqual(Item.objects.get().image.name, Upload.objects.get(id=upload_id).file.name)
+
+    def test_item_image_upload_must_be_an_image(self):
+        upload_id, response = self.start_image(b"\x89PNG not really an image")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Upload.objects.get(id=upload_id).status, Upload.FAILED)
+        created = self.client.post(
+            "/api/v1/store/items/", {"name": "Camisa", "price": "10.00", "stock": 1, "image_upload": upload_id}, format="json"
+        )
+        self.assertEqual(created.status_code, 400)
+
+    def test_purge_expired_uploads(self):
+        pending = self.start()
+        self.send(pending, 0, CONTENT[:100 * 1024])
+        attached = self.upload()
+        Upload.objects.filter(id=attached).update(status=Upload.ATTACHED)
+        Upload.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        out = StringIO()
+        call_command("purge_uploads", stdout=out)
+
+        self.assertIn("1 expired uploads purged", out.getvalue())
+        self.assertEqual(list(Upload.objects.values_list("id", flat=True)), [Upload.objects.get(id=attached).id])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "staging", pending)))
@@ -1,19 +1,34 @@
 from django.urls import path
 from store.views import (
-    ItemListCreateView, ItemDetailView,
-    FavoriteListCreateView, FavoriteRemoveView,
-    CartListAddView, CartRemoveView,
-    PurchaseView,
-    FeaturedItemView
+    ItemListCreateView, ItemDetailView, ItemSearchView,
+    FavoriteListCreateView, FavoriteRemoveView, FavoriteLookupView,
+    CartListAddView, CartBatchView, CartSummaryView, CartRemoveView,
+    PurchaseView, CheckoutView, PurchaseListView, PurchaseDetailView, OrderDetailView,
+    FeaturedItemView, CategoryFacetView,
+    UploadCreateView, UploadDetailView,
+    SalesSeriesView, TopSellersView
 )
 
 urlpatterns = [
     path("store/items/", ItemListCreateView.as_view()),
+    path("store/items/search/", ItemSearchView.as_view()),
     path("store/featured/", FeaturedItemView.as_view(), name="featured-products"),
+    path("store/categories/facets/", CategoryFacetView.as_view()),
     path("store/items/<uuid:item_id>/", ItemDetailView.as_view()),
     path("store/favorites/", FavoriteListCreateView.as_view()),
     path("store/favorites/remove/", FavoriteRemoveView.as_view()),
+    path("store/favorites/lookup/", FavoriteLookupView.as_view()),
     path("store/cart/", CartListAddView.as_view()),
+    path("store/cart/batch/", CartBatchView.as_view()),
+    path("store/cart/summary/", CartSummaryView.as_view()),
     path("store/cart/remove/", CartRemoveView.as_view()),
     path("store/purchase/", PurchaseView.as_view()),
+    path("store/purchases/", PurchaseListView.as_view()),
+    path("store/purchases/<uuid:purchase_id>/", PurchaseDetailView.as_view()),
+    path("store/checkout/", CheckoutView.as_view()),
+    path("store/orders/<uuid:order_id>/", OrderDetailView.as_view()),
+    path("store/uploads/", UploadCreateView.as_view()),
+    path("store/uploads/<uuid:upload_id>/", UploadDetailView.as_view()),
+    path("store/analytics/sales/", SalesSeriesView.as_view()),
+    path("store/analytics/top/", TopSellersView.as_view()),
 ]
@@ -1,19 +1,33 @@
 from rest_framework import status, permissions
 from rest_framework.response import Response
+import functools
+import uuid
 from typing import Any, Dict, cast
 from rest_framework.views import APIView
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import urlencode
+from django.conf import settings
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from store.services.store_service import StoreService
 from store.services.cache_service import ProductCacheService
+from store.services.catalog_cache_service import CatalogCacheService
+from store.services.category_facet_service import CategoryFacetService
+from store.services.idempotency_service import idempotency_service
+from store.services.sales_rollup_service import sales_rollup_service
+from store.services.upload_service import UploadOffsetMismatch, upload_service
 from store.serializers import (
-    ItemSerializer, ItemCreateUpdateSerializer,
-    FavoriteSerializer, CartItemSerializer, 
-    CartAddSerializer, PurchaseSerializer, PurchaseRequestSerializer
+    ItemSerializer, ItemCreateUpdateSerializer, CategoryFacetSerializer,
+    FavoriteSerializer, FavoriteLookupSerializer, CartItemSerializer, CartSummarySerializer, CartBatchSerializer, CartOperationResultSerializer,
+    CartAddSerializer, PurchaseSerializer, PurchaseListSerializer, PurchaseRequestSerializer,
+    CheckoutRequestSerializer, OrderSerializer,
+    UploadCreateSerializer, UploadSerializer,
+    SalesSeriesSerializer, TopSellerSerializer
 )
 from store.models import Item, Favorite, CartItem, Purchase
-from store.helpers.errors.error import ( DatabaseError, NotFoundError, UnauthorizedError, BadRequestError, AppError) 
+from store.helpers.errors.error import ( DatabaseError, NotFoundError, UnauthorizedError, BadRequestError, ConflictError, AppError) 
 
 
 store_service = StoreService()
@@ -27,22 +41,144 @@ class AuthenticatedAPIView(APIView):
                 code="unauthorized"
             )
         return super().dispatch(request, *args, **kwargs)
+
+
+class IsStaffUser(permissions.BasePermission):
+    """Só utilizadores com is_staff (relatórios internos)."""
+
+    def has_permission(self, request, view):
+        return bool(getattr(request.user, "is_staff", False))
     
 
-class ItemListCreateView(APIView):
+def idempotent(handler):
+    """
+    Suporte a Idempotency-Key num handler de escrita (post/put/...).
+
+    Com o header, o pedido só é executado uma vez por utilizador, endpoint e chave: as repetições
+    recebem a resposta guardada (com Idempotent-Replayed: true) e os duplicados simultâneos esperam
+    pelo pedido original. Sem o header, o handler corre normalmente.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        client_key = request.META.get("HTTP_IDEMPOTENCY_KEY")
+        if client_key is None:
+            return handler(self, request, *args, **kwargs)
+
+        if not client_key or len(client_key) > 255:
+            raise BadRequestError(safe_message="Invalid Idempotency-Key", code="bad_request", status_code=400)
+
+        user_id = getattr(request, "user_id", None) or getattr(request.user, "pk", None)
+        key = idempotency_service.scoped_key(user_id, request.method, request.path, client_key)
+        fingerprint = idempotency_service.fingerprint(_request_payload(request))
+
+        def execute():
+            response = handler(self, request, *args, **kwargs)
+            return response.status_code, response.data
+
+        status_code, data, replayed = idempotency_service.run(key, fingerprint, execute)
+        response = Response(data, status=status_code)
+        if replayed:
+            response["Idempotent-Replayed"] = "true"
+        return response
+
+    return wrapper
+
+
+IDEMPOTENCY_KEY_HEADER = openapi.Parameter(
+    "Idempotency-Key", openapi.IN_HEADER, type=openapi.TYPE_STRING, required=False,
+    description="Unique key per logical request; retries with the same key return the first response",
+)
+
+
+def _request_payload(request):
+    """Dados do pedido numa forma estável (o boundary do multipart muda de tentativa para tentativa)."""
+    data = request.data
+    if hasattr(data, "lists"):
+        return sorted(
+            (key, [[value.name, value.size] if hasattr(value, "size") else value for value in values])
+            for key, values in data.lists()
+        )
+    return data
+
+
+class CatalogCachedAPIView(APIView):
+    """
+    Cache HTTP para leituras anónimas do catálogo.
+
+    Os GET sem token são respondidos com os bytes JSON guardados para a versão atual do catálogo,
+    com ETag forte e Cache-Control. Um If-None-Match igual responde 304 sem tocar no ORM nem nos serializers.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method != "GET"
+            or getattr(request, "user_id", None) is not None
+            or "text/html" in request.META.get("HTTP_ACCEPT", "")
+        ):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = request.path + "?" + urlencode(sorted(request.GET.lists()), doseq=True)
+        version = CatalogCacheService.version()
+        etag = CatalogCacheService.etag(version, key)
+
+        if etag in self._if_none_match(request):
+            return self._with_cache_headers(HttpResponseNotModified(), etag)
+
+        content = CatalogCacheService.get_response(version, key)
+        if content is not None:
+            return self._with_cache_headers(HttpResponse(content, content_type="application/json"), etag)
+
+        response = super().dispatch(request, *args, **kwargs)
+
+        renderer = getattr(response, "accepted_renderer", None)
+        if response.status_code == status.HTTP_200_OK and renderer is not None and renderer.format == "json":
+            response.render()
+            CatalogCacheService.set_response(version, key, response.content)
+            self._with_cache_headers(response, etag)
+
+        return response
+
+    @staticmethod
+    def _if_none_match(request):
+        header = request.META.get("HTTP_IF_NONE_MATCH", "")
+        return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+    @staticmethod
+    def _with_cache_headers(response, etag):
+        response["ETag"] = etag
+        response["Cache-Control"] = "public, max-age=%d" % getattr(settings, "CATALOG_CACHE_MAX_AGE", 60)
+        patch_vary_headers(response, ("Accept", "Authorization", "Cookie"))
+        return response
+
+
+class ItemListCreateView(CatalogCachedAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     @swagger_auto_schema(
         operation_summary="List all items",
-        operation_description="Returns a list of items. Public endpoint.",
+        operation_description="Returns a page of items ordered by creation date. Use the `next`/`prev` cursors to navigate. Public endpoint.",
+        manual_parameters=[
+            openapi.Parameter("cursor", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Opaque cursor returned as `next` or `prev`"),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Page size (max 100)"),
+        ],
         responses={200: ItemSerializer(many=True)},
         tags=["Store - Items"]
     )
     def get(self, request):
         try:
-            items = store_service.list_item()
-            serializer = ItemSerializer(items, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            page = store_service.list_item(
+                cursor=request.query_params.get("cursor"),
+                limit=request.query_params.get("limit"),
+            )
+            serializer = ItemSerializer(page.items, many=True)
+            return Response({
+                "results": serializer.data,
+                "next": page.next_cursor,
+                "prev": page.prev_cursor,
+            }, status=status.HTTP_200_OK)
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
         except AppError:
             raise
         except Exception:
@@ -69,14 +205,55 @@ class ItemListCreateView(APIView):
             if not serializer.is_valid():
                 raise BadRequestError(safe_message="Ivalid data", extra=serializer.errors, code="bad_request", status_code=400)
 
-            item = store_service.create_item(serializer.validated_data)
+            item = store_service.create_item(serializer.validated_data, user=request.user)
             
             return Response(ItemSerializer(item).data, status=status.HTTP_201_CREATED)
         
+        except ValueError as e: raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
         except AppError: raise
         except Exception: raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
 
-class FeaturedItemView(APIView):
+class ItemSearchView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Search items",
+        operation_description="Full-text search over item name, description and category name, ordered by relevance. Public endpoint.",
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True, description="Search terms"),
+            openapi.Parameter("page", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Page number, starting at 1"),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Page size (max 100)"),
+        ],
+        responses={200: ItemSerializer(many=True), 400: "Invalid parameters"},
+        tags=["Store - Items"]
+    )
+    def get(self, request):
+        try:
+            query = request.query_params.get("q", "").strip()
+            if not query:
+                raise BadRequestError(safe_message="Search query is required", code="bad_request", status_code=400)
+
+            try:
+                page = int(request.query_params.get("page", 1))
+            except ValueError:
+                raise BadRequestError(safe_message="Invalid page", code="bad_request", status_code=400)
+
+            items, has_next = store_service.search_items(query, page=page, limit=request.query_params.get("limit"))
+
+            return Response({
+                "results": ItemSerializer(items, many=True).data,
+                "page": page,
+                "next": page + 1 if has_next else None,
+                "prev": page - 1 if page > 1 else None,
+            }, status=status.HTTP_200_OK)
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred while searching items.", code="internal_error", status_code=500)
+
+class FeaturedItemView(CatalogCachedAPIView):
     permission_classes = [permissions.AllowAny]
 
     @swagger_auto_schema(
@@ -88,7 +265,25 @@ class FeaturedItemView(APIView):
         products = ProductCacheService.get_featured_products()
         return Response(products, status=status.HTTP_200_OK)
 
-class ItemDetailView(APIView):
+class CategoryFacetView(CatalogCachedAPIView):
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Category facets",
+        operation_description="Item count, in-stock count and price range per category, read from a pre-aggregated table. Public endpoint.",
+        responses={200: CategoryFacetSerializer(many=True)},
+        tags=["Store - Categories"]
+    )
+    def get(self, request):
+        try:
+            facets = CategoryFacetService.list_facets()
+            return Response(CategoryFacetSerializer(facets, many=True).data, status=status.HTTP_200_OK)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred while fetching categories.", code="internal_error", status_code=500)
+
+class ItemDetailView(CatalogCachedAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     @swagger_auto_schema(
@@ -102,10 +297,10 @@ class ItemDetailView(APIView):
     )
     def get(self, request, item_id: str):
         try:
-            item = store_service.get_items(item_id)
+            item = store_service.get_item_detail(item_id)
             if not item:
                 raise NotFoundError(safe_message="Item not found", status_code=404, code="not_found")
-            return Response(ItemSerializer(item).data, status=status.HTTP_200_OK)
+            return Response(item, status=status.HTTP_200_OK)
         except AppError:
             raise
         except Exception:
@@ -126,10 +321,12 @@ class ItemDetailView(APIView):
     )
     def put(self, request, item_id: str):
         try:
-            item = store_service.update_item(item_id, request.data)
+            item = store_service.update_item(item_id, request.data, user=request.user)
             if not item:
                 raise NotFoundError(safe_message="Item not found", status_code=404, code="not_found")
             return Response(ItemSerializer(item).data, status=status.HTTP_200_OK)
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
         except AppError:
             raise
         except Exception:
@@ -234,6 +431,37 @@ class FavoriteRemoveView(APIView):
         except Exception:
             raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
 
+class FavoriteLookupView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Check which items are favorites",
+        operation_description=(
+            "Takes up to FAVORITE_LOOKUP_MAX_IDS item ids (a product grid) and returns {item_id: true|false} "
+            "for each one, answered from the per-user favorites index in Redis."
+        ),
+        request_body=FavoriteLookupSerializer,
+        responses={200: "results: {item_id: bool}", 400: "Invalid data", 500: "Internal server error"},
+        tags=["Store - Favorites"],
+    )
+    def post(self, request):
+        try:
+            serializer = FavoriteLookupSerializer(data=request.data)
+
+            if not serializer.is_valid():
+                raise BadRequestError(safe_message="Invalid data", extra=serializer.errors, status_code=400)
+
+            data = cast(Dict[str, Any], serializer.validated_data)
+            results = store_service.lookup_favorites(request.user, data["item_ids"])
+
+            return Response({"results": results}, status=status.HTTP_200_OK)
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
 # Cart
 class CartListAddView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -255,6 +483,7 @@ class CartListAddView(APIView):
     @swagger_auto_schema(
         operation_summary="Add item to cart",
         request_body=CartAddSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_HEADER],
         responses={
             201: CartItemSerializer(),
             400: "Invalid data",
@@ -263,6 +492,7 @@ class CartListAddView(APIView):
         },
         tags=["Store - Cart"],
     )
+    @idempotent
     def post(self, request):
         try:
             serializer = CartAddSerializer(data=request.data)
@@ -282,6 +512,68 @@ class CartListAddView(APIView):
                 raise NotFoundError(safe_message="Item not found", status_code=404, code="not_found")
 
             return Response(CartItemSerializer(cart_item).data, status=status.HTTP_201_CREATED)
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+class CartBatchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Apply several cart operations at once",
+        operation_description=(
+            "Applies a list of {item_id, op, quantity} operations in one transaction, for syncing a cart kept offline. "
+            "op is add (adds quantity), set (replaces the quantity; 0 removes the line) or remove. "
+            "Operations on the same item are combined in order. Returns one result per operation with its status "
+            "(ok, not_found, insufficient_stock) and the quantity the line ended with; failed operations do not stop the others."
+        ),
+        request_body=CartBatchSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_HEADER],
+        responses={
+            200: CartOperationResultSerializer(many=True),
+            400: "Invalid data",
+            500: "Internal server error",
+        },
+        tags=["Store - Cart"],
+    )
+    @idempotent
+    def post(self, request):
+        try:
+            serializer = CartBatchSerializer(data=request.data)
+
+            if not serializer.is_valid():
+                raise BadRequestError(safe_message="Invalid data", extra=serializer.errors, status_code=400)
+
+            data = cast(Dict[str, Any], serializer.validated_data)
+            results = store_service.update_cart(request.user, data["operations"])
+
+            return Response({"results": CartOperationResultSerializer(results, many=True).data}, status=status.HTTP_200_OK)
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+class CartSummaryView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Cart summary for authenticated user",
+        operation_description=(
+            "Every cart line with the item, quantity and line total, plus the cart total, the number of units "
+            "and stock warnings (out_of_stock / insufficient_stock) for lines that cannot be bought as they are."
+        ),
+        responses={200: CartSummarySerializer()},
+        tags=["Store - Cart"],
+    )
+    def get(self, request):
+        try:
+            summary = store_service.get_cart_summary(request.user)
+            return Response(CartSummarySerializer(summary).data, status=status.HTTP_200_OK)
         except AppError:
             raise
         except Exception:
@@ -322,21 +614,27 @@ class CartRemoveView(APIView):
 # Purchase
 class PurchaseView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    parser_classes = [MultiPartParser, FormParser]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
 
     @swagger_auto_schema(
         operation_summary="Purchase an item",
-        operation_description="Complete a purchase for a single item. Sends shipping data and optional payment proof (file).",
+        operation_description=(
+            "Reserves the stock and creates the purchase with status PENDING. The payment is processed in the background; "
+            "poll GET /store/purchases/{id}/ until the status is PAID or FAILED. The payment proof can be sent as a file "
+            "or, for large files, as payment_proof_upload: the id of a finished upload (POST /store/uploads/)."
+        ),
         request_body=PurchaseRequestSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_HEADER],
         responses={
-            201: PurchaseSerializer(),
-            400: "Invalid input or payment failed",
+            202: PurchaseSerializer(),
+            400: "Invalid input or not enough stock",
             401: "Unauthorized",
             404: "Item not found",
             500: "Internal server error",
         },
         tags=["Store - Purchase"],
     )
+    @idempotent
     def post(self, request):
         try:
             serializer = PurchaseSerializer(data=request.data)
@@ -375,6 +673,7 @@ class PurchaseView(APIView):
             }
 
             payment_proof = data.get("payment_proof") or request.FILES.get("payment_proof")
+            payment_proof_upload = request.data.get("payment_proof_upload")
 
             purchase = store_service.purchase_item(
                 user=request.user,
@@ -383,14 +682,378 @@ class PurchaseView(APIView):
                 payment_method=str(data.get("payment_method")),
                 payment_proof_file=payment_proof,
                 shipping_data=shipping_data,
+                payment_proof_upload=uuid.UUID(str(payment_proof_upload)) if payment_proof_upload else None,
             )
 
             if not purchase:
                 raise NotFoundError(safe_message="Item not found", status_code=404, code="not_found")
 
-            return Response(PurchaseSerializer(purchase).data, status=status.HTTP_201_CREATED)
+            return Response(PurchaseSerializer(purchase).data, status=status.HTTP_202_ACCEPTED)
 
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
         except AppError:
             raise
         except Exception:
-            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
\ No newline at end of file
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+class CheckoutView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+
+    @swagger_auto_schema(
+        operation_summary="Checkout the cart",
+        operation_description=(
+            "Buys every item in the user's cart as a single order: one payment for the total and one shipping address. "
+            "The order is created with status PENDING, the cart is emptied, and the payment runs in the background; "
+            "poll GET /store/orders/{id}/ until it is PAID or FAILED (the lines are then added back to the cart)."
+        ),
+        request_body=CheckoutRequestSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_HEADER],
+        responses={
+            202: OrderSerializer(),
+            400: "Invalid input, empty cart or not enough stock",
+            401: "Unauthorized",
+            500: "Internal server error",
+        },
+        tags=["Store - Purchase"],
+    )
+    @idempotent
+    def post(self, request):
+        try:
+            serializer = CheckoutRequestSerializer(data=request.data)
+
+            if not serializer.is_valid():
+                raise BadRequestError(safe_message="Invalid data", extra=serializer.errors, status_code=400)
+
+            data = cast(Dict[str, Any], serializer.validated_data)
+            shipping_data = {
+                field: data[field]
+                for field in ("first_name", "last_name", "city", "country", "street_address", "house_number", "phone", "email")
+            }
+
+            order = store_service.checkout(
+                user=request.user,
+                payment_method=data["payment_method"],
+                payment_proof_file=data.get("payment_proof"),
+                shipping_data=shipping_data,
+                payment_proof_upload=data.get("payment_proof_upload"),
+            )
+
+            return Response(OrderSerializer(order).data, status=status.HTTP_202_ACCEPTED)
+
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+
+def payment_status_response(data):
+    """Resposta do polling de estado; enquanto o pagamento está PENDING indica quando voltar a perguntar."""
+    response = Response(data, status=status.HTTP_200_OK)
+    if data["status"] == Purchase.PENDING:
+        response["Retry-After"] = str(getattr(settings, "PAYMENT_POLL_INTERVAL", 2))
+    return response
+
+
+class PurchaseListView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="List purchases of authenticated user",
+        operation_description=(
+            "Returns a page of the user's purchases, newest first, without the shipping fields. "
+            "Use the `next`/`prev` cursors to navigate; `since`/`until` filter by purchase date."
+        ),
+        manual_parameters=[
+            openapi.Parameter("cursor", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Opaque cursor returned as `next` or `prev`"),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Page size (max 100)"),
+            openapi.Parameter("since", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="ISO 8601 date or datetime (inclusive)"),
+            openapi.Parameter("until", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="ISO 8601 date or datetime (exclusive)"),
+        ],
+        responses={200: PurchaseListSerializer(many=True), 400: "Invalid parameters"},
+        tags=["Store - Purchase"],
+    )
+    def get(self, request):
+        try:
+            page = store_service.list_purchases(
+                user=request.user,
+                cursor=request.query_params.get("cursor"),
+                limit=request.query_params.get("limit"),
+                since=request.query_params.get("since"),
+                until=request.query_params.get("until"),
+            )
+            return Response({
+                "results": PurchaseListSerializer(page.items, many=True).data,
+                "next": page.next_cursor,
+                "prev": page.prev_cursor,
+            }, status=status.HTTP_200_OK)
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+
+class PurchaseDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Get a purchase",
+        operation_description="Returns the purchase with its payment status (PENDING, PAID or FAILED). While PENDING, Retry-After says when to poll again.",
+        responses={
+            200: PurchaseSerializer(),
+            401: "Unauthorized",
+            404: "Purchase not found",
+            500: "Internal server error",
+        },
+        tags=["Store - Purchase"],
+    )
+    def get(self, request, purchase_id: str):
+        try:
+            purchase = store_service.get_purchase(user=request.user, purchase_id=purchase_id)
+            if not purchase:
+                raise NotFoundError(safe_message="Purchase not found", status_code=404, code="not_found")
+            return payment_status_response(PurchaseSerializer(purchase).data)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+
+class OrderDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Get an order",
+        operation_description="Returns the order with its lines and payment status (PENDING, PAID or FAILED). While PENDING, Retry-After says when to poll again.",
+        responses={
+            200: OrderSerializer(),
+            401: "Unauthorized",
+            404: "Order not found",
+            500: "Internal server error",
+        },
+        tags=["Store - Purchase"],
+    )
+    def get(self, request, order_id: str):
+        try:
+            order = store_service.get_order(user=request.user, order_id=order_id)
+            if not order:
+                raise NotFoundError(safe_message="Order not found", status_code=404, code="not_found")
+            return payment_status_response(OrderSerializer(order).data)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+
+# Uploads
+class UploadCreateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Start a chunked upload",
+        operation_description=(
+            "Declares a payment proof or item image upload (name, total size and optional sha256). The bytes are then "
+            "sent with PATCH /store/uploads/{id}/ in chunks; the finished upload is attached by id when creating "
+            "a purchase, an order or an item."
+        ),
+        request_body=UploadCreateSerializer,
+        responses={
+            201: UploadSerializer(),
+            400: "Invalid data or file too large",
+            401: "Unauthorized",
+            500: "Internal server error",
+        },
+        tags=["Store - Uploads"],
+    )
+    def post(self, request):
+        try:
+            serializer = UploadCreateSerializer(data=request.data)
+
+            if not serializer.is_valid():
+                raise BadRequestError(safe_message="Invalid data", extra=serializer.errors, status_code=400)
+
+            data = cast(Dict[str, Any], serializer.validated_data)
+            upload = upload_service.create(
+                user=request.user,
+                purpose=data["purpose"],
+                filename=data["filename"],
+                size=data["size"],
+                content_type=data.get("content_type", ""),
+                sha256=data.get("sha256", ""),
+            )
+
+            response = Response(UploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+            response["Upload-Offset"] = "0"
+            return response
+
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+
+class UploadDetailView(APIView):
+    """
+    Estado e envio das partes de um upload. O PATCH lê o corpo em streaming (não passa pelos parsers do DRF),
+    por isso uma parte grande nunca fica inteira em memória.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Get upload status",
+        operation_description="Returns the upload with the number of bytes received; a client that lost its connection resumes from Upload-Offset.",
+        responses={200: UploadSerializer(), 401: "Unauthorized", 404: "Upload not found"},
+        tags=["Store - Uploads"],
+    )
+    def get(self, request, upload_id: str):
+        try:
+            upload = upload_service.get(request.user, upload_id)
+            if not upload:
+                raise NotFoundError(safe_message="Upload not found", status_code=404, code="not_found")
+
+            response = Response(UploadSerializer(upload).data, status=status.HTTP_200_OK)
+            response["Upload-Offset"] = str(upload.received)
+            return response
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+    @swagger_auto_schema(
+        operation_summary="Send a chunk",
+        operation_description=(
+            "Raw bytes of the next chunk (Content-Type: application/offset+octet-stream). Upload-Offset must be the "
+            "number of bytes already received; on 409 the client resumes from the offset in the error details. "
+            "The chunk that reaches the declared size completes the upload."
+        ),
+        manual_parameters=[
+            openapi.Parameter("Upload-Offset", openapi.IN_HEADER, type=openapi.TYPE_INTEGER, required=True),
+        ],
+        responses={
+            200: UploadSerializer(),
+            400: "Invalid chunk, size limit exceeded or checksum mismatch",
+            404: "Upload not found",
+            409: "Offset does not match the bytes received",
+        },
+        tags=["Store - Uploads"],
+    )
+    def patch(self, request, upload_id: str):
+        try:
+            upload = upload_service.get(request.user, upload_id)
+            if not upload:
+                raise NotFoundError(safe_message="Upload not found", status_code=404, code="not_found")
+
+            try:
+                offset = int(request.META["HTTP_UPLOAD_OFFSET"])
+                length = int(request.META["CONTENT_LENGTH"])
+            except (KeyError, ValueError):
+                raise BadRequestError(safe_message="Upload-Offset and Content-Length are required", code="bad_request", status_code=400)
+
+            upload = upload_service.write_chunk(upload, offset, request.stream, length)
+
+            response = Response(UploadSerializer(upload).data, status=status.HTTP_200_OK)
+            response["Upload-Offset"] = str(upload.received)
+            return response
+
+        except UploadOffsetMismatch as e:
+            raise ConflictError(safe_message=str(e), code="upload_offset_mismatch", extra={"offset": e.offset})
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+
+
+# Analytics
+SALES_RANGE_PARAMETERS = [
+    openapi.Parameter("since", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="ISO 8601 date or datetime (inclusive)"),
+    openapi.Parameter("until", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="ISO 8601 date or datetime (exclusive, default now)"),
+]
+
+
+class SalesSeriesView(APIView):
+    permission_classes = [IsStaffUser]
+
+    @swagger_auto_schema(
+        operation_summary="Sales per hour or day",
+        operation_description=(
+            "Units, revenue and number of paid purchases/orders per period, for the whole store, one item or one category, "
+            "read from the pre-aggregated sales rollups. Only periods with sales are listed. Staff only."
+        ),
+        manual_parameters=[
+            openapi.Parameter("granularity", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["hour", "day"], description="Default day"),
+            openapi.Parameter("item_id", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("category_id", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            *SALES_RANGE_PARAMETERS,
+        ],
+        responses={200: SalesSeriesSerializer(), 400: "Invalid parameters", 403: "Forbidden"},
+        tags=["Store - Analytics"],
+    )
+    def get(self, request):
+        try:
+            series = sales_rollup_service.series(
+                granularity=request.query_params.get("granularity"),
+                since=request.query_params.get("since"),
+                until=request.query_params.get("until"),
+                item_id=_uuid_param(request, "item_id"),
+                category_id=_uuid_param(request, "category_id"),
+            )
+            return Response(SalesSeriesSerializer(series).data, status=status.HTTP_200_OK)
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+
+class TopSellersView(APIView):
+    permission_classes = [IsStaffUser]
+
+    @swagger_auto_schema(
+        operation_summary="Best selling items or categories",
+        operation_description="Items or categories ranked by revenue, units or orders over a date range, from the daily sales rollups. Staff only.",
+        manual_parameters=[
+            openapi.Parameter("dimension", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["item", "category"], description="Default item"),
+            openapi.Parameter("order_by", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["revenue", "units", "order_count"], description="Default revenue"),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Default 10, max 100"),
+            *SALES_RANGE_PARAMETERS,
+        ],
+        responses={200: TopSellerSerializer(many=True), 400: "Invalid parameters", 403: "Forbidden"},
+        tags=["Store - Analytics"],
+    )
+    def get(self, request):
+        try:
+            rows = sales_rollup_service.top(
+                dimension=request.query_params.get("dimension"),
+                since=request.query_params.get("since"),
+                until=request.query_params.get("until"),
+                limit=request.query_params.get("limit"),
+                order_by=request.query_params.get("order_by"),
+            )
+            return Response(TopSellerSerializer(rows, many=True).data, status=status.HTTP_200_OK)
+        except ValueError as e:
+            raise BadRequestError(safe_message=str(e), code="bad_request", status_code=400)
+        except AppError:
+            raise
+        except Exception:
+            raise DatabaseError(safe_message="An unexpected error occurred.", code="internal_error", status_code=500)
+
+
+def _uuid_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}")
@@ -14,6 +14,7 @@ class UserEntity:
     is_active: bool
     confirmation_code: Optional[str] = None
     confirmation_expires_at: Optional[datetime] = None
+    token_version: int = 0
 
     def is_valid(self) -> bool:
         return "@" in self.email
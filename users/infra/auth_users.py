@@ -0,0 +1,62 @@
+from typing import Any, Dict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from loguru import logger
+from users.domain.entities.user_entity import UserEntity
+
+
+class AuthUsers:
+    """
+    Conta do AUTH_USER_MODEL de cada utilizador da app (users.User): é ela que as FKs da loja (carrinho,
+    favoritos, compras...) referenciam, por isso é ela que vai para request.user.
+
+    A conta é criada no primeiro pedido autenticado do utilizador, com username = id e sem senha utilizável
+    (o login continua a ser o da app), e fica na cache: com ela quente, resolver request.user não faz
+    nenhuma query. Nome, e-mail e is_active seguem os do utilizador.
+    """
+    PREFIX = "auth_user:"
+
+    def get(self, user: UserEntity):
+        key = self._key(user.id)
+        try:
+            account = cache.get(key)
+        except Exception as e:
+            logger.warning("Auth user cache unavailable, using the database: {}", e)
+            account = None
+
+        fields = self._fields(user)
+        stored = account is not None
+        if not stored:
+            account, _ = get_user_model().objects.get_or_create(
+                username=str(user.id), defaults={**fields, "password": make_password(None)}
+            )
+
+        changed = [name for name, value in fields.items() if getattr(account, name) != value]
+        if changed:
+            for name in changed:
+                setattr(account, name, fields[name])
+            account.save(update_fields=changed)
+
+        if changed or not stored:
+            try:
+                cache.set(key, account, timeout=getattr(settings, "USER_CACHE_TTL", 300))
+            except Exception as e:
+                logger.warning("Auth user {} not cached: {}", user.id, e)
+        return account
+
+    @staticmethod
+    def _fields(user: UserEntity) -> Dict[str, Any]:
+        return {
+            "email": user.email,
+            "first_name": user.name,
+            "last_name": user.last_name,
+            "is_active": user.is_active,
+        }
+
+    def _key(self, user_id) -> str:
+        return f"{self.PREFIX}{user_id}"
+
+
+auth_users = AuthUsers()
@@ -0,0 +1,68 @@
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from loguru import logger
+from users.models import User
+
+
+class TokenVersions:
+    """
+    Contador token_version de cada utilizador: a fonte é a coluna users_user.token_version, espelhada no Redis.
+
+    Os tokens levam a versão com que foram emitidos e o AuthMiddleware só os aceita se ela ainda for a atual,
+    o que custa uma leitura no Redis por pedido (o banco só é lido quando a chave não está lá).
+    Incrementar a versão revoga de imediato todos os tokens emitidos antes.
+    """
+    PREFIX = "token_version:"
+    # Utilizador apagado: nenhum token coincide
+    REVOKED = -1
+
+    def get(self, user_id: str) -> int:
+        key = self._key(user_id)
+        try:
+            version = cache.get(key)
+            if version is not None:
+                return version
+        except Exception as e:
+            logger.warning("Token version cache unavailable, using the database: {}", e)
+            return self._load(user_id)
+
+        version = self._load(user_id)
+        # add: se um bump gravou entretanto a versão nova, fica a dele
+        if not cache.add(key, version, timeout=self._ttl()):
+            version = cache.get(key, version)
+        return version
+
+    def prime(self, user_id: str, version: int) -> None:
+        try:
+            cache.add(self._key(user_id), version, timeout=self._ttl())
+        except Exception as e:
+            logger.warning("Token version cache unavailable: {}", e)
+
+    def bump(self, user_id: str) -> None:
+        """Revoga os tokens do utilizador. Numa conta apagada, a versão passa a REVOKED."""
+        User.objects.filter(id=user_id).update(token_version=F("token_version") + 1)
+        transaction.on_commit(lambda: self._publish(user_id))
+
+    def _publish(self, user_id: str) -> None:
+        # Lida depois do commit: dois bumps seguidos publicam os dois a última versão
+        try:
+            cache.set(self._key(user_id), self._load(user_id), timeout=self._ttl())
+        except Exception as e:
+            logger.warning("Token version of user {} not published: {}", user_id, e)
+
+    def _load(self, user_id: str) -> int:
+        version: Optional[int] = User.objects.filter(id=user_id).values_list("token_version", flat=True).first()
+        return self.REVOKED if version is None else version
+
+    def _key(self, user_id) -> str:
+        return f"{self.PREFIX}{user_id}"
+
+    @staticmethod
+    def _ttl() -> int:
+        return getattr(settings, "TOKEN_VERSION_CACHE_TTL", 60 * 60 * 24)
+
+
+token_versions = TokenVersions()
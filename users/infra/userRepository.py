@@ -1,6 +1,7 @@
 from users.domain.entities.user_entity import UserEntity
 from users.domain.contracts.iuser_repository import IUserRepository
 from users.models import User
+from users.infra.user_cache import user_cache
 from typing import Optional, List
 
 class UserRepository(IUserRepository):
@@ -26,7 +27,8 @@ class UserRepository(IUserRepository):
             updated_at=users.updated_at,
             is_active=users.is_active,
             confirmation_code=users.confirmation_code,
-            confirmation_expires_at=users.confirmation_expires_at
+            confirmation_expires_at=users.confirmation_expires_at,
+            token_version=users.token_version
         )
 
     def get_by_email(self, email: str) -> UserEntity | None:
@@ -44,7 +46,8 @@ class UserRepository(IUserRepository):
             updated_at=users.updated_at,
             is_active=users.is_active,
             confirmation_code=users.confirmation_code,
-            confirmation_expires_at=users.confirmation_expires_at
+            confirmation_expires_at=users.confirmation_expires_at,
+            token_version=users.token_version
         )
     
     def get_by_id(self, id:str) -> UserEntity | None:
@@ -63,7 +66,8 @@ class UserRepository(IUserRepository):
             updated_at=users.updated_at,
             is_active=users.is_active,
             confirmation_code=users.confirmation_code,
-            confirmation_expires_at=users.confirmation_expires_at
+            confirmation_expires_at=users.confirmation_expires_at,
+            token_version=users.token_version
         )
 
     def get_all_users(self) -> Optional[List[UserEntity]]:
@@ -79,7 +83,8 @@ class UserRepository(IUserRepository):
             updated_at=user.updated_at,
             is_active=user.is_active,
             confirmation_code=user.confirmation_code,
-            confirmation_expires_at=user.confirmation_expires_at
+            confirmation_expires_at=user.confirmation_expires_at,
+            token_version=user.token_version
             )
             for user in users
         ]
@@ -94,7 +99,9 @@ class UserRepository(IUserRepository):
         db_user.name = user.name
         db_user.last_name = user.last_name
         db_user.email = user.email
-        db_user.save()
+        # Só os campos alterados: um save completo podia repor um token_version antigo
+        db_user.save(update_fields=["name", "last_name", "email", "updated_at"])
+        user_cache.invalidate(db_user.id)
 
         return UserEntity(
             id=str(db_user.id),
@@ -106,13 +113,15 @@ class UserRepository(IUserRepository):
             updated_at=db_user.updated_at,
             is_active=db_user.is_active,
             confirmation_code=db_user.confirmation_code,
-            confirmation_expires_at=db_user.confirmation_expires_at
+            confirmation_expires_at=db_user.confirmation_expires_at,
+            token_version=db_user.token_version
         )
 
     def delete_user(self, id:str) -> None:
         
         user = User.objects.get(id=id)
         user.delete()
+        user_cache.invalidate(id)
 
     def recover_password(self, email: str, password: str) -> Optional[UserEntity]:
         try:
@@ -121,7 +130,8 @@ class UserRepository(IUserRepository):
             return None
         
         user.password=password
-        user.save()
+        user.save(update_fields=["password", "updated_at"])
+        user_cache.invalidate(user.id)
 
         return UserEntity(
             id=str(user.id),
@@ -133,7 +143,8 @@ class UserRepository(IUserRepository):
             updated_at=user.updated_at,
             is_active=user.is_active,
             confirmation_code=user.confirmation_code,
-            confirmation_expires_at=user.confirmation_expires_at
+            confirmation_expires_at=user.confirmation_expires_at,
+            token_version=user.token_version
         )
     
     def update_password(self, id:str, password: str) -> Optional[UserEntity]:
@@ -143,7 +154,8 @@ class UserRepository(IUserRepository):
             return None
         
         user.password=password
-        user.save()
+        user.save(update_fields=["password", "updated_at"])
+        user_cache.invalidate(user.id)
 
         return UserEntity(
             id=str(user.id),
@@ -155,7 +167,8 @@ class UserRepository(IUserRepository):
             updated_at=user.updated_at,
             is_active=user.is_active,
             confirmation_code=user.confirmation_code,
-            confirmation_expires_at=user.confirmation_expires_at
+            confirmation_expires_at=user.confirmation_expires_at,
+            token_version=user.token_version
         )
     
     def activate_user(self, email: str) -> Optional[UserEntity]:
@@ -167,7 +180,8 @@ class UserRepository(IUserRepository):
         user.is_active = True
         user.confirmation_code = None
         user.confirmation_expires_at = None
-        user.save()
+        user.save(update_fields=["is_active", "confirmation_code", "confirmation_expires_at", "updated_at"])
+        user_cache.invalidate(user.id)
 
         return UserEntity(
             id=str(user.id),
@@ -180,4 +194,5 @@ class UserRepository(IUserRepository):
             is_active=user.is_active,
             confirmation_code=user.confirmation_code,
             confirmation_expires_at=user.confirmation_expires_at,
+            token_version=user.token_version,
         )
\ No newline at end of file
@@ -0,0 +1,58 @@
+import itertools
+import time
+from dataclasses import replace
+from typing import Callable, Dict, Optional
+from django.conf import settings
+from django.db import transaction
+from loguru import logger
+from store.helpers.two_tier_cache import TwoTierCache
+from users.domain.entities.user_entity import UserEntity
+
+
+class UserCache:
+    """
+    Cache dos utilizadores autenticados, pela chave `sub` do JWT: LRU local por processo à frente do Redis
+    (a mesma TwoTierCache da cache de itens). Evita o SELECT em users_user que o AuthMiddleware fazia em
+    cada pedido. O UserRepository invalida a entrada depois do commit de cada escrita no utilizador.
+
+    A entidade guardada vai sem o hash da senha nem o código de confirmação: quem precisa deles
+    (login, troca de senha, confirmação) lê o utilizador do banco.
+    """
+
+    def __init__(self, cache: Optional[TwoTierCache] = None):
+        self.cache = cache or TwoTierCache(
+            namespace="user",
+            timeout=getattr(settings, "USER_CACHE_TTL", 300),
+            local_maxsize=getattr(settings, "USER_CACHE_LOCAL_MAXSIZE", 4096),
+            local_ttl=getattr(settings, "USER_CACHE_LOCAL_TTL", 30),
+        )
+        self._lookups = itertools.count(1)
+
+    def get(self, user_id: str, loader: Callable[[str], Optional[UserEntity]]) -> Optional[UserEntity]:
+        started = time.perf_counter()
+        try:
+            return self.cache.get(str(user_id), lambda ids: self._load(ids, loader))
+        finally:
+            self.cache.metrics.observe("lookup", time.perf_counter() - started)
+            interval = getattr(settings, "USER_CACHE_STATS_INTERVAL", 10000)
+            if interval and next(self._lookups) % interval == 0:
+                logger.info("User cache stats: {}", self.stats())
+
+    def invalidate(self, user_id) -> None:
+        # Depois do commit: um pedido a meio não volta a pôr na cache o utilizador antigo
+        transaction.on_commit(lambda: self.cache.invalidate(str(user_id)))
+
+    def stats(self) -> Dict[str, float]:
+        return self.cache.metrics.snapshot()
+
+    @staticmethod
+    def _load(user_ids, loader: Callable[[str], Optional[UserEntity]]) -> Dict[str, UserEntity]:
+        loaded = {}
+        for user_id in user_ids:
+            user = loader(user_id)
+            if user is not None:
+                loaded[user_id] = replace(user, password="", confirmation_code=None)
+        return loaded
+
+
+user_cache = UserCache()
@@ -1,13 +1,30 @@
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from django.contrib.auth.models import AnonymousUser
 from django.conf import settings
 from loguru import logger
 from typing import Optional
 from users.services.auth_service import AuthService
 from users.helpers.errors.error import UnauthorizedError
 from users.infra.userRepository import UserRepository
+from users.infra.user_cache import user_cache
+from users.infra.auth_users import auth_users
+from users.infra.token_versions import token_versions
 from jwt import InvalidTokenError, ExpiredSignatureError
 
 class AuthMiddleware(MiddlewareMixin):
+    """
+    Identifica o utilizador pelo JWT (header Authorization: Bearer ou cookie).
+
+    Depois de verificar a assinatura, só confirma que o token_version do token ainda é o atual (uma leitura
+    no Redis): uma troca de senha, a ativação ou a remoção da conta revogam os tokens emitidos antes. Tokens
+    de contas por ativar (is_active=False) não autenticam.
+
+    request.token_user é o utilizador da app (UserEntity), montado a partir das claims; tokens sem claims
+    leem-no da cache de utilizadores (ou do banco). request.user é a conta do AUTH_USER_MODEL ligada a ele,
+    a que as FKs da loja referenciam. Os dois são lazy: os endpoints que não os leem não fazem nenhuma query
+    de utilizador. Sem token válido, request.user fica o do Django (sessão ou anónimo).
+    """
     def __init__(self, get_response=None):
         super().__init__(get_response)
         self.auth_service = AuthService(UserRepository())
@@ -26,7 +43,6 @@ class AuthMiddleware(MiddlewareMixin):
         
         if not token:
             request.user_id = None
-            request.user = None
             return None
         
         try:
@@ -34,27 +50,49 @@ class AuthMiddleware(MiddlewareMixin):
             user_id = payload.get("sub")
             request.user_id = user_id
 
-            if isinstance(user_id, str):
-                try: 
-                    request.user = self.auth_service.user_repository.get_by_id(user_id)
-                except Exception:
-                    request.user = None
+            if not isinstance(user_id, str):
+                request.user_id = None
+            elif payload.get("token_version", 0) != token_versions.get(user_id):
+                logger.warning("Revoked token for user {}", user_id)
+                request.user_id = None
+            elif payload.get("is_active") is False:
+                logger.warning("Token of inactive user {}", user_id)
+                request.user_id = None
             else:
-                request.user = None
+                if "is_active" in payload:
+                    token_user = self.auth_service.user_from_claims(payload)
+                else:
+                    token_user = SimpleLazyObject(lambda: self.get_user(user_id))
+                request.token_user = token_user
+                request.user = SimpleLazyObject(lambda: self.get_account(token_user))
                 
         except ExpiredSignatureError:
             logger.warning("Token expired, please do the login")
             request.user_id = None
-            request.user = None
         
         except InvalidTokenError as e:
             logger.warning("Ivalid token: {}", e)
             request.user_id = None
-            request.user = None
         
         except Exception as e:
             logger.exception("Error decoding token: {}", e)
             request.user_id = None
-            request.user = None
 
-        return None
\ No newline at end of file
+        return None
+
+    def get_user(self, user_id: str):
+        try:
+            return user_cache.get(user_id, self.auth_service.user_repository.get_by_id)
+        except Exception as e:
+            logger.warning("Could not load user {}: {}", user_id, e)
+            return None
+
+    def get_account(self, token_user):
+        # O bool resolve o token_user lazy: utilizador inexistente ou por ativar -> anónimo
+        if not token_user or not token_user.is_active:
+            return AnonymousUser()
+        try:
+            return auth_users.get(token_user)
+        except Exception as e:
+            logger.warning("Could not load the account of user {}: {}", token_user.id, e)
+            return AnonymousUser()
\ No newline at end of file
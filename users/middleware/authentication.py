@@ -0,0 +1,14 @@
+from rest_framework.authentication import BaseAuthentication
+
+
+class TokenMiddlewareAuthentication(BaseAuthentication):
+    """
+    Autenticação do DRF a partir do que o AuthMiddleware já verificou: com um token válido devolve o
+    request.user lazy sem o resolver, por isso as views que não leem request.user não vão à cache nem ao banco.
+    """
+
+    def authenticate(self, request):
+        django_request = request._request
+        if getattr(django_request, "user_id", None) is None:
+            return None
+        return django_request.user, None
@@ -13,6 +13,8 @@ class User(models.Model):
    is_active = models.BooleanField(default=False)
    confirmation_code = models.CharField(max_length=6, null=True, blank=True)
    confirmation_expires_at = models.DateTimeField(null=True, blank=True)
+   # Incrementado quando a senha muda, a conta é ativada ou é apagada: os tokens emitidos antes deixam de valer
+   token_version = models.PositiveIntegerField(default=0)
 
    def __str__(self):
       return f"{self.name} - {self.last_name} - {self.email} - {self.created_at} - {self.updated_at}"
@@ -6,6 +6,7 @@ from django.conf import settings
 from users.domain.contracts.iuser_repository import IUserRepository
 from users.domain.entities.user_entity import UserEntity
 from django.contrib.auth.hashers import check_password
+from users.infra.token_versions import token_versions
 
 class AuthService:
     def __init__(self, user_repository: IUserRepository):
@@ -21,8 +22,14 @@ class AuthService:
         
         return user
     
-    def create_access_token(self, user_id: str) -> str:
+    def create_access_token(self, user: UserEntity | str) -> str:
+        """
+        Com a entidade, o token leva as claims de que as views precisam (nome, e-mail, is_active) e o
+        token_version: o AuthMiddleware monta request.token_user a partir delas sem ler o utilizador.
+        Só com o id, o token leva a versão 0 e o utilizador é lido quando request.token_user for usado.
+        """
         now = datetime.utcnow()
+        user_id = user.id if isinstance(user, UserEntity) else str(user)
 
         payload: Dict[str, Any] = {
             "sub": str(user_id),
@@ -32,6 +39,16 @@ class AuthService:
             "iss": getattr(settings, "JWT_ISSUER", "trendify-e-commerce")
         }
 
+        if isinstance(user, UserEntity):
+            payload.update({
+                "name": user.name,
+                "last_name": user.last_name,
+                "email": user.email,
+                "is_active": user.is_active,
+                "token_version": user.token_version,
+            })
+            token_versions.prime(user_id, user.token_version)
+
         token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
         return token
@@ -39,4 +56,19 @@ class AuthService:
     def decode_token(self, token: str) -> Dict[str, Any]:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM], issuer=getattr(settings, "JWT_ISSUER", None))
 
-        return payload
\ No newline at end of file
+        return payload
+
+    @staticmethod
+    def user_from_claims(payload: Dict[str, Any]) -> UserEntity:
+        # Sem senha nem datas: quem precisa delas lê o utilizador do banco
+        return UserEntity(
+            id=payload["sub"],
+            name=payload.get("name", ""),
+            last_name=payload.get("last_name", ""),
+            email=payload.get("email", ""),
+            password="",
+            created_at=None,
+            updated_at=None,
+            is_active=bool(payload.get("is_active")),
+            token_version=payload.get("token_version", 0),
+        )
\ No newline at end of file
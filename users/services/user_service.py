@@ -4,14 +4,17 @@ from datetime import datetime
 from django.contrib.auth.hashers import make_password, check_password
 from users.domain.contracts.iuser_repository import IUserRepository
 from users.domain.entities.user_entity import UserEntity
+from users.infra.token_versions import TokenVersions, token_versions
 import random
 from datetime import timedelta
 from  django.utils import timezone
 
 
 class UserService:
-    def __init__(self, user_repository:IUserRepository):
+    def __init__(self, user_repository:IUserRepository, versions: Optional[TokenVersions] = None):
         self.user_repository =user_repository
+        # Revoga os tokens já emitidos (troca de senha, remoção da conta)
+        self.token_versions = versions or token_versions
     
     def create_user(self, name: str, last_name: str, email: str, password: str):
         
@@ -104,6 +107,7 @@ class UserService:
             return ValueError("Usuário não existente❌")
         
         user = self.user_repository.delete_user(id=id)
+        self.token_versions.bump(id)
 
         return user
     
@@ -116,6 +120,7 @@ class UserService:
         new_password = make_password(password)
 
         user = self.user_repository.recover_password(email=email, password=new_password)
+        self.token_versions.bump(user.id)
 
         send_email_changed_password(
             assunto="🔑 Senha alterada com sucesso",
@@ -138,6 +143,7 @@ class UserService:
         hashed_password = make_password(new_password)
 
         user = self.user_repository.update_password(id, password=hashed_password)
+        self.token_versions.bump(id)
 
         send_email_changed_password(
             assunto="🔑 Senha alterada com sucesso",
@@ -164,4 +170,9 @@ class UserService:
             raise ValueError("Código expirado ⏰")
 
         # Ativar conta e invalidar código
-        return self.user_repository.activate_user(email=user.email)
\ No newline at end of file
+        activated = self.user_repository.activate_user(email=user.email)
+        if activated:
+            # Os tokens emitidos com is_active=False deixam de valer: o próximo login já leva a conta ativa
+            self.token_versions.bump(activated.id)
+
+        return activated
\ No newline at end of file
@@ -1,3 +1,303 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from store.models import CartItem, Item
+from users.infra.token_versions import TokenVersions, token_versions
+from users.infra.userRepository import UserRepository
+from users.infra.user_cache import user_cache
+from users.middleware.auth_middleware import AuthMiddleware
+from users.models import User
+from users.services.auth_service import AuthService
+from users.services.user_service import UserService
 
-# Create your tests here.
+
+class TestUserCache(TestCase):
+    """
+    Testes da cache de utilizadores usada pelo AuthMiddleware.
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.cache.local.clear()
+        user_cache.cache.metrics.reset()
+
+        self.user = User.objects.create(
+            name="Romeu", last_name="Cajamba", email="romeu@example.com", password="hash", is_active=True
+        )
+        self.repository = UserRepository()
+        self.middleware = AuthMiddleware(get_response=lambda request: None)
+        self.token = AuthService(self.repository).create_access_token(self.user.id)
+        token_versions.get(str(self.user.id))
+
+    def authenticate(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.middleware.process_request(request)
+        # request.token_user é lazy: o bool resolve-o
+        return request.token_user if request.token_user else None
+
+    def test_user_is_read_from_the_database_once(self):
+        with self.assertNumQueries(1):
+            first = self.authenticate()
+        with self.assertNumQueries(0):
+            second = self.authenticate()
+
+        self.assertEqual((first.id, second.name), (str(self.user.id), "Romeu"))
+        # O hash da senha não vai para a cache
+        self.assertEqual(second.password, "")
+
+        stats = user_cache.stats()
+        self.assertEqual((stats["miss"], stats["hit_local"], stats["hit_ratio"]), (1, 1, 0.5))
+        self.assertIn("lookup_avg_ms", stats)
+        self.assertIn("lookup_max_ms", stats)
+
+    def test_writes_invalidate_the_entry(self):
+        entity = self.authenticate()
+
+        entity.name = "Romeu Manuel"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.repository.update_user(entity)
+        self.assertEqual(self.authenticate().name, "Romeu Manuel")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.repository.update_password(str(self.user.id), "new-hash")
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.repository.delete_user(str(self.user.id))
+        self.assertIsNone(self.authenticate())
+
+    def test_activation_invalidates_the_entry(self):
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        self.assertFalse(self.authenticate().is_active)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.repository.activate_user(self.user.email)
+
+        self.assertTrue(self.authenticate().is_active)
+
+    def test_unknown_user(self):
+        token = AuthService(self.repository).create_access_token("00000000-0000-0000-0000-000000000000")
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.middleware.process_request(request)
+
+        # Sem utilizador não há token_version que coincida
+        self.assertIsNone(request.user_id)
+
+
+class WhoAmIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"username": request.user.username})
+
+
+class TestLazyRequestUser(TestCase):
+    """
+    Testes do request.user lazy do AuthMiddleware.
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.cache.local.clear()
+
+        self.user = User.objects.create(name="Romeu", email="romeu@example.com", password="hash", is_active=True)
+        self.middleware = AuthMiddleware(get_response=lambda request: None)
+        self.token = AuthService(UserRepository()).create_access_token(self.user.id)
+        token_versions.get(str(self.user.id))
+
+    def test_user_is_only_loaded_when_read(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+        with self.assertNumQueries(0):
+            self.middleware.process_request(request)
+        self.assertEqual(request.user_id, str(self.user.id))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(request.token_user.name, "Romeu")
+
+    def test_public_endpoint_does_no_user_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/store/featured/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if "users_user" in query["sql"]])
+
+    def test_drf_views_see_the_token_user(self):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.middleware.process_request(request)
+
+        response = WhoAmIView.as_view()(request)
+
+        self.assertEqual((response.status_code, response.data), (200, {"username": str(self.user.id)}))
+
+    def test_token_of_a_deleted_user(self):
+        User.objects.filter(id=self.user.id).delete()
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.middleware.process_request(request)
+
+        self.assertEqual(WhoAmIView.as_view()(request).status_code, 403)
+
+    def test_invalid_token(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION="Bearer not-a-token")
+        self.middleware.process_request(request)
+
+        self.assertIsNone(request.user_id)
+
+
+class TestTokenClaims(TestCase):
+    """
+    Testes das claims do token e da revogação por token_version.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+        self.repository = UserRepository()
+        self.user = User.objects.create(
+            name="Romeu", last_name="Cajamba", email="romeu@example.com", password=make_password("old-password"), is_active=True
+        )
+        self.auth_service = AuthService(self.repository)
+        self.middleware = AuthMiddleware(get_response=lambda request: None)
+        self.token = self.auth_service.create_access_token(self.repository.get_by_id(str(self.user.id)))
+
+    def authenticate(self, token=None):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}")
+        self.middleware.process_request(request)
+        return request
+
+    def test_user_comes_from_the_claims(self):
+        with self.assertNumQueries(0):
+            request = self.authenticate()
+
+        self.assertEqual(request.user_id, str(self.user.id))
+        token_user = request.token_user
+        self.assertEqual((token_user.name, token_user.email, token_user.is_active), ("Romeu", "romeu@example.com", True))
+
+    def test_request_user_is_the_linked_auth_account(self):
+        account = self.authenticate().user
+        self.assertTrue(account.is_authenticated)
+        self.assertEqual(
+            (account.username, account.email, account.first_name, account.last_name),
+            (str(self.user.id), "romeu@example.com", "Romeu", "Cajamba"),
+        )
+        self.assertFalse(account.has_usable_password())
+
+        # Com a conta na cache, resolver request.user não faz nenhuma query
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().user.pk, account.pk)
+
+        User.objects.filter(id=self.user.id).update(name="Romeu Manuel")
+        token = self.auth_service.create_access_token(self.repository.get_by_id(str(self.user.id)))
+        self.assertEqual(self.authenticate(token).user.pk, account.pk)
+        self.assertEqual(get_user_model().objects.get(pk=account.pk).first_name, "Romeu Manuel")
+
+    def test_version_is_read_from_the_database_once_when_redis_misses(self):
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().user_id, str(self.user.id))
+
+    def test_password_change_revokes_outstanding_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserService(self.repository).update_user_password(str(self.user.id), "old-password", "new-password")
+
+        self.assertIsNone(self.authenticate().user_id)
+
+        token = self.auth_service.create_access_token(self.repository.get_by_id(str(self.user.id)))
+        self.assertEqual(self.authenticate(token).user_id, str(self.user.id))
+
+    def test_password_recovery_revokes_outstanding_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserService(self.repository).recovery_user_password(self.user.email, "new-password")
+
+        self.assertIsNone(self.authenticate().user_id)
+
+    def test_account_deletion_revokes_outstanding_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserService(self.repository).delete_user_by_id(str(self.user.id))
+
+        self.assertIsNone(self.authenticate().user_id)
+        self.assertEqual(token_versions.get(str(self.user.id)), TokenVersions.REVOKED)
+
+    def test_inactive_account_tokens_are_rejected_and_activation_revokes_them(self):
+        User.objects.filter(id=self.user.id).update(
+            is_active=False, confirmation_code="123456", confirmation_expires_at=timezone.now() + timedelta(minutes=5)
+        )
+        token = self.auth_service.create_access_token(self.repository.get_by_id(str(self.user.id)))
+        self.assertIsNone(self.authenticate(token).user_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserService(self.repository).confirm_user(self.user.email, "123456")
+
+        # O token antigo leva is_active=False: a ativação muda a versão e obriga a novo login
+        self.assertEqual(User.objects.get(id=self.user.id).token_version, 1)
+        self.assertIsNone(self.authenticate(token).user_id)
+        token = self.auth_service.create_access_token(self.repository.get_by_id(str(self.user.id)))
+        self.assertTrue(self.authenticate(token).user.is_authenticated)
+
+    def test_inactive_user_of_a_token_without_claims_is_anonymous(self):
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        request = self.authenticate(self.auth_service.create_access_token(str(self.user.id)))
+
+        self.assertFalse(request.user.is_authenticated)
+
+    def test_profile_update_keeps_the_version(self):
+        entity = self.repository.get_by_id(str(self.user.id))
+        User.objects.filter(id=self.user.id).update(token_version=3)
+
+        entity.name = "Romeu Manuel"
+        self.repository.update_user(entity)
+
+        self.assertEqual(User.objects.get(id=self.user.id).token_version, 3)
+
+
+class TestStoreWithAppToken(TestCase):
+    """
+    Login pela LoginView e pedidos à loja com o token devolvido, de ponta a ponta.
+    """
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create(
+            name="Romeu", last_name="Cajamba", email="romeu@example.com", password=make_password("secret-password"), is_active=True
+        )
+
+        response = self.client.post(
+            "/api/v1/login/", {"email": "romeu@example.com", "password": "secret-password"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 202, response.content)
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {response.json()['access_token']}"}
+
+    def test_store_endpoints_accept_the_login_token(self):
+        for path in ("cart/", "cart/summary/", "favorites/", "purchases/"):
+            with self.subTest(path=path):
+                response = self.client.get(f"/api/v1/store/{path}", **self.headers)
+                self.assertEqual(response.status_code, 200, response.content)
+
+    def test_cart_rows_belong_to_the_linked_account(self):
+        item = Item.objects.create(name="Camisa", price=Decimal("10.00"), stock=5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/v1/store/cart/", {"item_id": str(item.id), "quantity": 2}, content_type="application/json", **self.headers
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+
+        account = get_user_model().objects.get(username=str(User.objects.get().id))
+        self.assertEqual(list(CartItem.objects.values_list("user_id", "quantity")), [(account.pk, 2)])
+
+        summary = self.client.get("/api/v1/store/cart/summary/", **self.headers).json()
+        self.assertEqual(summary["item_count"], 2)
@@ -67,7 +67,7 @@ class LoginView(APIView):
         if not user:
             raise UnauthorizedError(safe_message="Invalid credentials", status_code=401, code="unathorized")
         
-        token = self.auth_service.create_access_token(user.id)
+        token = self.auth_service.create_access_token(user)
 
         #define cookie HttOnly + returna token
         response = Response({